@@ -0,0 +1,101 @@
+"""
+Add_movies uchun bazaning o'z full-text qidiruvi:
+- SQLite: FTS5 virtual jadval (external content) + triggerlar
+- PostgreSQL: generated tsvector ustun + GIN indeks (yozuvlar bilan avtomatik sinxron)
+
+Django SQLite da Add_movies jadvalini qayta yaratganda (AlterField/AddField) triggerlar o'chadi,
+shuning uchun bunday migratsiyalar triggerlarni qayta yaratadi. Migratsiyalar bu moduldan import
+qilmaydi - har biri o'z paytidagi SQL ni o'zida saqlaydi (bu yerdagi o'zgarish eski migratsiyalarga ta'sir qilmaydi).
+"""
+
+FTS_TABLE = "add_all_movie_fts"
+MOVIES_TABLE = "add_all_add_movies"
+# Nom o'rniga uning qidiruv kaliti (add_all/text.py): kirill/lotin, tutuq belgilar bir xil
+FTS_COLUMNS = ("search_key", "movies_description", "genre", "country")
+
+# PostgreSQL og'irliklari: nom (A) > janr (B) > davlat (C) > tavsif (D)
+POSTGRES_WEIGHTS = {"movies_name": "A", "search_key": "A", "genre": "B", "country": "C", "movies_description": "D"}
+
+
+def sqlite_install(columns):
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            {names},
+            content='{MOVIES_TABLE}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {MOVIES_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, {names}) VALUES (new.id, {new_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {MOVIES_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {names}) VALUES ('delete', old.id, {old_values});
+        END
+        """,
+        # count, latest_activity kabi tez-tez o'zgaradigan ustunlar FTS ga tegmaydi
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {names} ON {MOVIES_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {names}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {FTS_TABLE}(rowid, {names}) VALUES (new.id, {new_values});
+        END
+        """,
+    ]
+
+
+SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def postgres_install(columns):
+    document = " ||\n".join(
+        f"setweight(to_tsvector('simple', coalesce({column}, '')), '{POSTGRES_WEIGHTS[column]}')"
+        for column in columns
+    )
+    return [
+        f"""
+        ALTER TABLE {MOVIES_TABLE} ADD COLUMN IF NOT EXISTS search_document tsvector
+        GENERATED ALWAYS AS ({document}) STORED
+        """,
+        f"CREATE INDEX IF NOT EXISTS add_movies_search_gin ON {MOVIES_TABLE} USING GIN (search_document)",
+    ]
+
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS add_movies_search_gin",
+    f"ALTER TABLE {MOVIES_TABLE} DROP COLUMN IF EXISTS search_document",
+]
+
+
+def supports_search_document(connection):
+    return connection.vendor in ("sqlite", "postgresql")
+
+
+def install_search_document(connection, rebuild=True, columns=FTS_COLUMNS):
+    """Jadval/ustun va triggerlarni yaratadi (takror chaqirish xavfsiz), SQLite da indeksni to'ldiradi"""
+    install = {"sqlite": sqlite_install, "postgresql": postgres_install}.get(connection.vendor)
+    statements = install(columns) if install else []
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+        if rebuild and connection.vendor == "sqlite":
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif rebuild and connection.vendor == "postgresql":
+            cursor.execute("REINDEX INDEX add_movies_search_gin")
+
+
+def uninstall_search_document(connection):
+    statements = {"sqlite": SQLITE_UNINSTALL, "postgresql": POSTGRES_UNINSTALL}.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from add_all.models import Add_movies, notify_catalog_changed
+
+
+class Command(BaseCommand):
+    help = "Add_movies.series_count va latest_activity ustunlarini series ma'lumotlaridan qayta hisoblaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        ids = list(Add_movies.objects.order_by("pk").values_list("pk", flat=True))
+        updated = 0
+        for start in range(0, len(ids), batch_size):
+            updated += Add_movies.objects.filter(pk__in=ids[start:start + batch_size]).refresh_series_stats()
+        notify_catalog_changed(Add_movies)
+        self.stdout.write(self.style.SUCCESS(f"{updated} ta film yangilandi"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from add_all.models import Add_movies, vote_total
+
+
+class Command(BaseCommand):
+    help = "Add_movies.like_count va dislike_count ni LikeDislike jadvali bilan solishtirib, farqlarini tuzatadi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Faqat farqli filmlar sonini ko'rsatadi")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        drifted = list(
+            Add_movies.objects.annotate(actual_likes=vote_total(True), actual_dislikes=vote_total(False))
+            .exclude(like_count=F("actual_likes"), dislike_count=F("actual_dislikes"))
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"{len(drifted)} ta filmda farq bor")
+            return
+
+        updated = 0
+        for start in range(0, len(drifted), batch_size):
+            updated += Add_movies.objects.filter(pk__in=drifted[start:start + batch_size]).refresh_vote_counts()
+        self.stdout.write(self.style.SUCCESS(f"{updated} ta film tuzatildi"))
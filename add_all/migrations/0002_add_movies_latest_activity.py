@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:04
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_latest_activity(apps, schema_editor):
+    Add_movies = apps.get_model('add_all', 'Add_movies')
+    MovieSeries = apps.get_model('add_all', 'MovieSeries')
+    latest_series_date = (
+        MovieSeries.objects.filter(movie=OuterRef('pk'))
+        .order_by()
+        .values('movie')
+        .annotate(latest=Max('created_at'))
+        .values('latest')
+    )
+    Add_movies.objects.update(
+        latest_activity=Coalesce(Subquery(latest_series_date), F('created_at'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_all', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='add_movies',
+            name='latest_activity',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(backfill_latest_activity, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='add_movies',
+            index=models.Index(fields=['-latest_activity', '-id'], name='add_movies_activity_idx'),
+        ),
+    ]
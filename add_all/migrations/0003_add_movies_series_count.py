@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_series_count(apps, schema_editor):
+    Add_movies = apps.get_model('add_all', 'Add_movies')
+    MovieSeries = apps.get_model('add_all', 'MovieSeries')
+    series_total = (
+        MovieSeries.objects.filter(movie=OuterRef('pk'))
+        .order_by()
+        .values('movie')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Add_movies.objects.update(series_count=Coalesce(Subquery(series_total), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_all', '0002_add_movies_latest_activity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='add_movies',
+            name='series_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_series_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def create_catalog_version(apps, schema_editor):
+    CatalogVersion = apps.get_model('add_all', 'CatalogVersion')
+    CatalogVersion.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_all', '0003_add_movies_series_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_catalog_version, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:16
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_vote_counts(apps, schema_editor):
+    Add_movies = apps.get_model('add_all', 'Add_movies')
+    LikeDislike = apps.get_model('add_all', 'LikeDislike')
+
+    def total(vote):
+        votes = LikeDislike.objects.filter(movie=OuterRef('pk'), vote=vote).order_by().values('movie')
+        return Coalesce(Subquery(votes.annotate(total=Count('pk')).values('total')), 0)
+
+    Add_movies.objects.update(like_count=total(True), dislike_count=total(False))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_all', '0004_catalogversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='add_movies',
+            name='dislike_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='add_movies',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_vote_counts, migrations.RunPython.noop),
+    ]
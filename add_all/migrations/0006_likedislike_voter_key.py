@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+def backfill_voter_key(apps, schema_editor):
+    LikeDislike = apps.get_model('add_all', 'LikeDislike')
+    votes = LikeDislike.objects.only('user_id', 'ip_address', 'session_key')
+    for vote in votes.iterator():
+        # Eski unique_together (user/ip/session, movie) kalitlar takrorlanmasligini kafolatlaydi
+        if vote.user_id:
+            vote.voter_key = f'u:{vote.user_id}'
+        elif vote.ip_address:
+            vote.voter_key = f'ip:{vote.ip_address}'
+        elif vote.session_key:
+            vote.voter_key = f's:{vote.session_key}'
+        else:
+            vote.voter_key = f'id:{vote.pk}'
+        vote.save(update_fields=['voter_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_all', '0005_add_movies_vote_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='likedislike',
+            name='voter_key',
+            field=models.CharField(default='', editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_voter_key, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='likedislike',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='likedislike',
+            constraint=models.UniqueConstraint(fields=('movie', 'voter_key'), name='likedislike_movie_voter_uniq'),
+        ),
+    ]
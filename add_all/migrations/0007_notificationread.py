@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_reads(apps, schema_editor):
+    Notification = apps.get_model('add_all', 'Notification')
+    NotificationRead = apps.get_model('add_all', 'NotificationRead')
+    reads = []
+    for notification in Notification.objects.prefetch_related('read_by').iterator(chunk_size=500):
+        keys = {f'u:{user.pk}' for user in notification.read_by.all()}
+        keys.update(f'ip:{ip}' for ip in notification.read_by_ips or [] if ip)
+        reads.extend(NotificationRead(notification=notification, reader_key=key) for key in keys)
+    NotificationRead.objects.bulk_create(reads, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_all', '0006_likedislike_voter_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationRead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reader_key', models.CharField(max_length=64)),
+                ('read_at', models.DateTimeField(auto_now_add=True)),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reads', to='add_all.notification')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('reader_key', 'notification'), name='notification_read_uniq')],
+            },
+        ),
+        migrations.RunPython(copy_reads, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='notification',
+            name='read_by',
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='read_by_ips',
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_all', '0007_notificationread'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reader_key', models.CharField(max_length=64, unique=True)),
+                ('last_seen_id', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
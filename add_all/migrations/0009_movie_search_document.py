@@ -0,0 +1,87 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:10
+
+from django.db import migrations
+
+# Migratsiya yozilgan paytdagi holat - add_all/fts.py keyinchalik o'zgarsa ham bu SQL o'zgarmaydi
+FTS_TABLE = 'add_all_movie_fts'
+MOVIES_TABLE = 'add_all_add_movies'
+COLUMNS = 'movies_name, movies_description, genre, country'
+NEW_VALUES = 'new.movies_name, new.movies_description, new.genre, new.country'
+OLD_VALUES = 'old.movies_name, old.movies_description, old.genre, old.country'
+
+SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {COLUMNS},
+        content='{MOVIES_TABLE}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {MOVIES_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {MOVIES_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {COLUMNS} ON {MOVIES_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES});
+        INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES});
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_INSTALL = [
+    f"""
+    ALTER TABLE {MOVIES_TABLE} ADD COLUMN IF NOT EXISTS search_document tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(movies_name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(movies_description, '')), 'D') ||
+        setweight(to_tsvector('simple', coalesce(genre, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(country, '')), 'C')
+    ) STORED
+    """,
+    f"CREATE INDEX IF NOT EXISTS add_movies_search_gin ON {MOVIES_TABLE} USING GIN (search_document)",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS add_movies_search_gin",
+    f"ALTER TABLE {MOVIES_TABLE} DROP COLUMN IF EXISTS search_document",
+]
+
+
+def run(schema_editor, statements):
+    with schema_editor.connection.cursor() as cursor:
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            cursor.execute(statement)
+
+
+def install(apps, schema_editor):
+    run(schema_editor, {'sqlite': SQLITE_INSTALL, 'postgresql': POSTGRES_INSTALL})
+
+
+def uninstall(apps, schema_editor):
+    run(schema_editor, {'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRES_UNINSTALL})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_all', '0008_notificationwatermark'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
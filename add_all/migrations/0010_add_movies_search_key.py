@@ -0,0 +1,139 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:41
+
+import unicodedata
+
+from django.db import migrations, models
+
+# Migratsiya yozilgan paytdagi holat: add_all/text.py va add_all/fts.py keyinchalik
+# o'zgarsa ham bu migratsiya xuddi shu kalit va SQL bilan ishlaydi
+CYRILLIC = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo', 'ж': 'j', 'з': 'z',
+    'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'x', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sh',
+    'ъ': '', 'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    'ў': 'o', 'қ': 'q', 'ғ': 'g', 'ҳ': 'h',
+    'ә': 'a', 'ө': 'o', 'ү': 'u', 'ұ': 'u', 'ң': 'ng', 'һ': 'h', 'ӣ': 'i', 'ӯ': 'u', 'ҷ': 'j',
+}
+APOSTROPHES = "'`´ʻʼʹ‘’′"
+TRANSLATION = str.maketrans({**CYRILLIC, **{mark: '' for mark in APOSTROPHES}})
+
+FTS_TABLE = 'add_all_movie_fts'
+MOVIES_TABLE = 'add_all_add_movies'
+
+
+def normalize(text):
+    text = str(text or '').casefold()
+    text = unicodedata.normalize('NFC', text).translate(TRANSLATION)
+    text = ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+    return ' '.join(text.split())
+
+
+def sqlite_install(columns):
+    names = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            {names},
+            content='{MOVIES_TABLE}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {MOVIES_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, {names}) VALUES (new.id, {new_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {MOVIES_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {names}) VALUES ('delete', old.id, {old_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {names} ON {MOVIES_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {names}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {FTS_TABLE}(rowid, {names}) VALUES (new.id, {new_values});
+        END
+        """,
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    ]
+
+
+def postgres_install(name_column):
+    return [
+        f"""
+        ALTER TABLE {MOVIES_TABLE} ADD COLUMN IF NOT EXISTS search_document tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce({name_column}, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(movies_description, '')), 'D') ||
+            setweight(to_tsvector('simple', coalesce(genre, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(country, '')), 'C')
+        ) STORED
+        """,
+        f"CREATE INDEX IF NOT EXISTS add_movies_search_gin ON {MOVIES_TABLE} USING GIN (search_document)",
+    ]
+
+
+SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS add_movies_search_gin",
+    f"ALTER TABLE {MOVIES_TABLE} DROP COLUMN IF EXISTS search_document",
+]
+
+
+def run(schema_editor, statements):
+    with schema_editor.connection.cursor() as cursor:
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            cursor.execute(statement)
+
+
+def backfill_search_key(apps, schema_editor):
+    Add_movies = apps.get_model('add_all', 'Add_movies')
+    movies = list(Add_movies.objects.only('movies_name'))
+    for movie in movies:
+        movie.search_key = normalize(movie.movies_name)
+    Add_movies.objects.bulk_update(movies, ['search_key'], batch_size=1000)
+
+
+def drop_search_document(apps, schema_editor):
+    run(schema_editor, {'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRES_UNINSTALL})
+
+
+def install(apps, schema_editor):
+    # AddField SQLite da jadvalni qayta yaratadi, FTS esa endi nom o'rniga search_key ni indekslaydi
+    run(schema_editor, {
+        'sqlite': sqlite_install(('search_key', 'movies_description', 'genre', 'country')),
+        'postgresql': postgres_install('search_key'),
+    })
+
+
+def install_legacy(apps, schema_editor):
+    run(schema_editor, {
+        'sqlite': sqlite_install(('movies_name', 'movies_description', 'genre', 'country')),
+        'postgresql': postgres_install('movies_name'),
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_all', '0009_movie_search_document'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_search_document, install_legacy),
+        migrations.AddField(
+            model_name='add_movies',
+            name='search_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=256),
+        ),
+        migrations.RunPython(backfill_search_key, migrations.RunPython.noop),
+        migrations.RunPython(install, drop_search_document),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_all', '0010_add_movies_search_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarityState',
+            fields=[
+                ('movie', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='add_all.add_movies')),
+                ('fingerprint', models.CharField(max_length=32)),
+                ('min_score', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SimilarMovie',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='add_all.add_movies')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_to', to='add_all.add_movies')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('movie', 'rank'), name='similar_movie_rank_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,135 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:31
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Migratsiya yozilgan paytdagi add_all/text.py va add_all/fts.py holati (keyingi o'zgarishlar ta'sir qilmaydi)
+CYRILLIC = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo', 'ж': 'j', 'з': 'z',
+    'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'x', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sh',
+    'ъ': '', 'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    'ў': 'o', 'қ': 'q', 'ғ': 'g', 'ҳ': 'h',
+    'ә': 'a', 'ө': 'o', 'ү': 'u', 'ұ': 'u', 'ң': 'ng', 'һ': 'h', 'ӣ': 'i', 'ӯ': 'u', 'ҷ': 'j',
+}
+APOSTROPHES = "'`´ʻʼʹ‘’′"
+TRANSLATION = str.maketrans({**CYRILLIC, **{mark: '' for mark in APOSTROPHES}})
+
+FTS_TABLE = 'add_all_movie_fts'
+MOVIES_TABLE = 'add_all_add_movies'
+COLUMNS = 'search_key, movies_description, genre, country'
+NEW_VALUES = 'new.search_key, new.movies_description, new.genre, new.country'
+OLD_VALUES = 'old.search_key, old.movies_description, old.genre, old.country'
+
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {MOVIES_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {MOVIES_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {COLUMNS} ON {MOVIES_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES});
+        INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES});
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def normalize(text):
+    text = str(text or '').casefold()
+    text = unicodedata.normalize('NFC', text).translate(TRANSLATION)
+    text = ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+    return ' '.join(text.split())
+
+
+def split_genres(text):
+    names = {}
+    for part in re.split(r'[,;/|]', text or ''):
+        name = ' '.join(part.split())
+        key = normalize(name)
+        if key and key not in names:
+            names[key] = name
+    return list(names.values())
+
+
+def parse_genres(apps, schema_editor):
+    Add_movies = apps.get_model('add_all', 'Add_movies')
+    Genre = apps.get_model('add_all', 'Genre')
+    MovieGenre = apps.get_model('add_all', 'MovieGenre')
+    genre_ids = {}
+    links = []
+    for pk, genre in Add_movies.objects.values_list('pk', 'genre').iterator(chunk_size=2000):
+        for name in split_genres(genre):
+            key = normalize(name)[:64]
+            if key not in genre_ids:
+                genre_ids[key] = Genre.objects.create(key=key, name=name[:64]).pk
+            links.append(MovieGenre(movie_id=pk, genre_id=genre_ids[key]))
+    MovieGenre.objects.bulk_create(links, batch_size=1000)
+
+
+def restore_search_document(apps, schema_editor):
+    # SQLite da genres AddField jadvalni qayta yaratadi - FTS triggerlari tiklanadi
+    # (PostgreSQL dagi generated ustun jadval bilan qoladi)
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in SQLITE_TRIGGERS:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_all', '0011_similar_movies'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('name', models.CharField(max_length=64)),
+            ],
+            options={
+                'ordering': ('name',),
+            },
+        ),
+        migrations.CreateModel(
+            name='MovieGenre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('genre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movie_genres', to='add_all.genre')),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movie_genres', to='add_all.add_movies')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='add_movies',
+            name='genres',
+            field=models.ManyToManyField(blank=True, related_name='movies', through='add_all.MovieGenre', to='add_all.genre'),
+        ),
+        migrations.AddIndex(
+            model_name='add_movies',
+            index=models.Index(fields=['country', '-latest_activity', '-id'], name='add_movies_country_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='add_movies',
+            index=models.Index(fields=['year', '-latest_activity', '-id'], name='add_movies_year_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='moviegenre',
+            constraint=models.UniqueConstraint(fields=('genre', 'movie'), name='movie_genre_uniq'),
+        ),
+        migrations.RunPython(parse_genres, migrations.RunPython.noop),
+        migrations.RunPython(restore_search_document, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Migratsiya yozilgan paytdagi add_all/fts.py triggerlari (keyingi o'zgarishlar ta'sir qilmaydi)
+FTS_TABLE = 'add_all_movie_fts'
+MOVIES_TABLE = 'add_all_add_movies'
+COLUMNS = 'search_key, movies_description, genre, country'
+NEW_VALUES = 'new.search_key, new.movies_description, new.genre, new.country'
+OLD_VALUES = 'old.search_key, old.movies_description, old.genre, old.country'
+
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {MOVIES_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {MOVIES_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {COLUMNS} ON {MOVIES_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES});
+        INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES});
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def restore_search_document(apps, schema_editor):
+    # trending_score AddField SQLite da jadvalni qayta yaratadi - FTS triggerlari tiklanadi
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in SQLITE_TRIGGERS:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_all', '0012_genres'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieViewBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('span_hours', models.PositiveSmallIntegerField(default=1)),
+                ('views', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='add_movies',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='add_movies',
+            index=models.Index(fields=['-trending_score', '-id'], name='add_movies_trending_idx'),
+        ),
+        migrations.AddField(
+            model_name='movieviewbucket',
+            name='movie',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_buckets', to='add_all.add_movies'),
+        ),
+        migrations.AddIndex(
+            model_name='movieviewbucket',
+            index=models.Index(fields=['bucket'], name='movie_view_bucket_time_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='movieviewbucket',
+            constraint=models.UniqueConstraint(fields=('movie', 'bucket'), name='movie_view_bucket_uniq'),
+        ),
+        migrations.RunPython(restore_search_document, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_all', '0013_trending'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['movie', '-created_at', '-id'], name='comment_movie_created_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_all', '0014_comment_movie_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='savedfilm',
+            index=models.Index(fields=['user', 'film'], name='savedfilm_user_film_idx'),
+        ),
+    ]
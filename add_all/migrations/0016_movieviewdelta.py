@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_all', '0015_savedfilm_user_film_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieViewDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('views', models.PositiveIntegerField(default=1)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_deltas', to='add_all.add_movies')),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_all', '0017_add_movies_document_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='notificationwatermark',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 22:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('add_all', '0018_notification_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='likedislike',
+            name='revision',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,12 +1,88 @@
-from django.db import models
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
 from django.utils import timezone
 from users.models import User
 
+from .text import normalize, split_genres
+
+# Katalog (filmlar, qismlar, bo'limlar) o'zgarganda commit dan keyin yuboriladi.
+# movie_ids: o'zgargan filmlar to'plami yoki None (noma'lum / hammasi), version: yangi katalog versiyasi
+catalog_changed = Signal()
+
+class CatalogVersion(models.Model):
+    """Katalog har o'zgarganda oshadigan yagona qator: javob keshlari shu versiyaga bog'lanadi"""
+    CATALOG_PK = 1
+
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    @classmethod
+    def current(cls):
+        return cls.objects.filter(pk=cls.CATALOG_PK).first() or cls(pk=cls.CATALOG_PK)
+
+    @classmethod
+    def bump(cls):
+        updated = cls.objects.filter(pk=cls.CATALOG_PK).update(
+            version=F("version") + 1, updated_at=timezone.now()
+        )
+        if not updated:
+            cls.objects.get_or_create(pk=cls.CATALOG_PK, defaults={"version": 1})
+        return cls.current().version
+
+def notify_catalog_changed(model, movie_ids=None):
+    version = CatalogVersion.bump()
+    # Film sahifasi hujjatlari o'zgarish bilan bitta tranzaksiyada eskiradi
+    if movie_ids is None:
+        Add_movies.objects.bump_document_version()
+    else:
+        ids = list(movie_ids)
+        for start in range(0, len(ids), 1000):
+            Add_movies.objects.filter(pk__in=ids[start:start + 1000]).bump_document_version()
+    transaction.on_commit(partial(
+        catalog_changed.send, sender=model, movie_ids=movie_ids, version=version
+    ))
+
+class CatalogQuerySet(models.QuerySet):
+    """Bulk o'zgarishlardan keyin ham katalog versiyasini oshiradi"""
+    # Faqat shu ustunlar o'zgarsa versiya oshmaydi
+    versionless_fields = frozenset()
+    # O'zgargan filmlarni aniqlash uchun ustun (None - filmlar noma'lum)
+    movie_id_field = None
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if objs:
+            movie_ids = None
+            if self.movie_id_field:
+                movie_ids = {getattr(obj, self.movie_id_field) for obj in objs}
+            notify_catalog_changed(self.model, movie_ids)
+        return objs
+
+    def update(self, **kwargs):
+        # bulk_update() ham shu metod orqali ishlaydi
+        if set(kwargs) <= self.versionless_fields:
+            return super().update(**kwargs)
+        movie_ids = None
+        if self.movie_id_field:
+            movie_ids = set(self.values_list(self.movie_id_field, flat=True))
+        updated = super().update(**kwargs)
+        if updated:
+            notify_catalog_changed(self.model, movie_ids)
+        return updated
+
 class Add_departments(models.Model):
     department_name = models.CharField(max_length=512)
     image = models.FileField(null=True, blank=True)
     description = models.CharField(max_length=30)
 
+    objects = CatalogQuerySet.as_manager()
+
     class Meta:
         ordering = ("-pk",)
 
@@ -17,6 +93,101 @@ class Add_departments(models.Model):
     def movie_count(self):
         return self.add_departments.count()
 
+class AddMoviesQuerySet(CatalogQuerySet):
+    # count - ko'rishlar soni, like/dislike - ovozlar, trending_score - davriy hisob,
+    # document_version - katalog versiyasi bilan birga oshadi,
+    # qolganlari series o'zgarishidan hisoblanadi (u o'zi versiyani oshiradi)
+    versionless_fields = frozenset({
+        "count", "series_count", "latest_activity", "like_count", "dislike_count", "trending_score",
+        "document_version",
+    })
+    movie_id_field = "pk"
+
+    # search_key nomdan hisoblanadi - save() dan o'tmaydigan bulk yozuvlarda ham
+    # genres (MovieGenre) esa genre satridan quriladi
+    def bulk_create(self, objs, *args, **kwargs):
+        for obj in objs:
+            obj.search_key = normalize(obj.movies_name)
+        objs = super().bulk_create(objs, *args, **kwargs)
+        sync_movie_genres([(obj.pk, obj.genre) for obj in objs if obj.pk is not None])
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if "movies_name" in fields:
+            for obj in objs:
+                obj.search_key = normalize(obj.movies_name)
+            fields = [*fields, "search_key"]
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+        if "genre" in fields:
+            sync_movie_genres([(obj.pk, obj.genre) for obj in objs])
+        return updated
+
+    def update(self, **kwargs):
+        if isinstance(kwargs.get("movies_name"), str):
+            kwargs["search_key"] = normalize(kwargs["movies_name"])
+        movie_ids = list(self.values_list("pk", flat=True)) if "genre" in kwargs else None
+        updated = super().update(**kwargs)
+        for start in range(0, len(movie_ids or ()), 1000):
+            self.model.objects.filter(pk__in=movie_ids[start:start + 1000]).sync_genres()
+        return updated
+
+    def sync_genres(self):
+        sync_movie_genres(self.order_by().values_list("pk", "genre"))
+
+    def refresh_series_stats(self):
+        """
+        series_count va latest_activity ni qaytadan hisoblaydi
+        (latest_activity = oxirgi qism sanasi yoki film sanasi)
+        """
+        series = MovieSeries.objects.filter(movie=OuterRef("pk")).order_by().values("movie")
+        return self.update(
+            series_count=Coalesce(Subquery(series.annotate(total=Count("pk")).values("total")), 0),
+            latest_activity=Coalesce(
+                Subquery(series.annotate(latest=Max("created_at")).values("latest")), F("created_at")
+            ),
+        )
+
+    def bump_document_version(self):
+        """Film sahifasi hujjatlarini eskirtiradi (api/documents.py)"""
+        return self.update(document_version=F("document_version") + 1)
+
+    def refresh_vote_counts(self):
+        """like_count va dislike_count ni LikeDislike jadvalidan qaytadan hisoblaydi"""
+        return self.update(like_count=vote_total(True), dislike_count=vote_total(False))
+
+def sync_movie_genres(rows, batch_size=1000):
+    """(film_id, genre satri) juftlarini Genre/MovieGenre jadvallariga yoyadi (eski bog'lanishlar almashtiriladi)"""
+    rows = list(rows)
+    for start in range(0, len(rows), batch_size):
+        batch = [
+            (pk, {normalize(name)[:GENRE_MAX_LENGTH]: name[:GENRE_MAX_LENGTH] for name in split_genres(genre)})
+            for pk, genre in rows[start:start + batch_size]
+        ]
+        names = {key: name for _, movie_genres in batch for key, name in movie_genres.items()}
+        Genre.objects.bulk_create([Genre(key=key, name=name) for key, name in names.items()], ignore_conflicts=True)
+        genre_ids = dict(Genre.objects.filter(key__in=names).values_list("key", "pk"))
+        MovieGenre.objects.filter(movie_id__in=[pk for pk, _ in batch]).delete()
+        MovieGenre.objects.bulk_create([
+            MovieGenre(movie_id=pk, genre_id=genre_ids[key]) for pk, movie_genres in batch for key in movie_genres
+        ])
+
+def vote_total(vote):
+    votes = LikeDislike.objects.filter(movie=OuterRef("pk"), vote=vote).order_by().values("movie")
+    return Coalesce(Subquery(votes.annotate(total=Count("pk")).values("total")), 0)
+
+GENRE_MAX_LENGTH = 64
+
+class Genre(models.Model):
+    """Janrlar lug'ati: Add_movies.genre satridan (add_all/text.py split_genres) to'ldiriladi"""
+    key = models.CharField(max_length=GENRE_MAX_LENGTH, unique=True)
+    name = models.CharField(max_length=GENRE_MAX_LENGTH)
+
+    class Meta:
+        ordering = ("name",)
+
+    def __str__(self):
+        return self.name
+
 class Add_movies(models.Model):
     add_departments = models.ForeignKey(
         Add_departments, on_delete=models.CASCADE, related_name="add_departments"
@@ -24,6 +195,8 @@ class Add_movies(models.Model):
     movies_preview = models.FileField(null=True, blank=True, upload_to="movies_images")
     movies_preview_url = models.CharField(max_length=5024, blank=True, null=True)
     movies_name = models.CharField(max_length=128)
+    # Qidiruv kaliti (add_all/text.py): kichik harf, lotin, tutuq belgilarsiz; save() da to'ldiriladi
+    search_key = models.CharField(max_length=256, default="", editable=False, db_index=True)
     movies_description = models.CharField(max_length=2048)
     movies_url = models.CharField(max_length=10000000, null=True, blank=True)
     movies_local = models.FileField(null=True, blank=True)
@@ -31,16 +204,96 @@ class Add_movies(models.Model):
     count = models.PositiveIntegerField(default=0)
     year = models.CharField(max_length=32, default="")
     genre = models.CharField(max_length=512, default="")
+    # genre satrining indeksli ko'rinishi (filtr va facetlar uchun), save() dan keyin sinxronlanadi
+    genres = models.ManyToManyField(Genre, through="MovieGenre", related_name="movies", blank=True)
     all_series = models.CharField(max_length=512, default="")
     created_at = models.DateTimeField(default=timezone.now, editable=True)
     is_possible = models.BooleanField(default=False)
+    # Feedlar shu ustun bo'yicha tartiblanadi (series bilan JOIN qilmasdan)
+    latest_activity = models.DateTimeField(default=timezone.now, editable=False)
+    # Har bir qatorda series.count() so'rovi bo'lmasligi uchun
+    series_count = models.PositiveIntegerField(default=0, editable=False)
+    # Ovozlar soni har so'rovda COUNT qilinmasligi uchun (add_all/signals.py yangilaydi)
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    dislike_count = models.PositiveIntegerField(default=0, editable=False)
+    # Yaqindagi ko'rishlar, vaqt o'tishi bilan so'nadi (api/trending.py, update_trending buyrug'i)
+    trending_score = models.FloatField(default=0, editable=False)
+    # Film sahifasi hujjati (api/documents.py) shu versiya bilan keshlanadi: katalog o'zgarishi
+    # yoki izoh bilan birga, o'sha tranzaksiyada oshadi
+    document_version = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = AddMoviesQuerySet.as_manager()
 
     class Meta:
         ordering = ("-pk",)
+        indexes = [
+            models.Index(fields=["-latest_activity", "-id"], name="add_movies_activity_idx"),
+            # Feed filtrlari: shu qiymatdagi filmlar darhol tartiblangan holda
+            models.Index(fields=["country", "-latest_activity", "-id"], name="add_movies_country_idx"),
+            models.Index(fields=["year", "-latest_activity", "-id"], name="add_movies_year_idx"),
+            models.Index(fields=["-trending_score", "-id"], name="add_movies_trending_idx"),
+        ]
 
     def __str__(self):
         return self.movies_name
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.latest_activity = self.created_at
+        self.search_key = normalize(self.movies_name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "movies_name" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "search_key"}
+        elif update_fields is None and not self._state.adding and not kwargs.get("force_insert"):
+            # Hisoblagichlar va document_version faqat bazada F()/subquery bilan yangilanadi -
+            # eskirgan nusxa (admin, serializer) ularni orqaga qaytarmasin
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in AddMoviesQuerySet.versionless_fields
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Janr va sana o'zgarganini signalda bilish uchun (yuklanmagan bo'lsa None - har doim qayta hisoblanadi)
+        instance._loaded_genre = instance.__dict__.get("genre")
+        instance._loaded_created_at = instance.__dict__.get("created_at")
+        return instance
+
+class MovieGenre(models.Model):
+    movie = models.ForeignKey(Add_movies, on_delete=models.CASCADE, related_name="movie_genres")
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE, related_name="movie_genres")
+
+    class Meta:
+        constraints = [
+            # genre birinchi: "shu janrdagi filmlar" filtri va facet hisobi shu indeksdan
+            models.UniqueConstraint(fields=["genre", "movie"], name="movie_genre_uniq"),
+        ]
+
+class MovieSeriesQuerySet(CatalogQuerySet):
+    """Bulk operatsiyalardan keyin filmlarning series_count va latest_activity sini yangilaydi"""
+    movie_id_field = "movie_id"
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        Add_movies.objects.filter(pk__in={obj.movie_id for obj in objs}).refresh_series_stats()
+        return objs
+
+    def update(self, **kwargs):
+        rows = list(self.values_list("pk", "movie_id"))
+        # CatalogQuerySet.update ni chetlab o'tamiz: yangi movie_id larni ham bilishimiz kerak
+        updated = super(CatalogQuerySet, self).update(**kwargs)
+        movie_ids = {movie_id for _, movie_id in rows}
+        if "movie" in kwargs or "movie_id" in kwargs:
+            movie_ids.update(
+                MovieSeries.objects.filter(pk__in=[pk for pk, _ in rows]).values_list("movie_id", flat=True)
+            )
+        Add_movies.objects.filter(pk__in=movie_ids).refresh_series_stats()
+        if updated:
+            notify_catalog_changed(self.model, movie_ids)
+        return updated
+
 class MovieSeries(models.Model):
     movie = models.ForeignKey(
         Add_movies, on_delete=models.CASCADE, related_name="series"
@@ -50,12 +303,21 @@ class MovieSeries(models.Model):
     video_file = models.FileField(null=True, blank=True)
     created_at = models.DateTimeField(null=True, blank=True, default=timezone.now)
 
+    objects = MovieSeriesQuerySet.as_manager()
+
     class Meta:
         ordering = ("-pk",)
 
     def __str__(self):
         return f"{self.movie.movies_name} - {self.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Qism boshqa filmga ko'chirilsa eski filmni ham signalda yangilash uchun
+        instance._loaded_movie_id = instance.__dict__.get("movie_id")
+        return instance
+
 class SavedFilm(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     film = models.ForeignKey(Add_movies, on_delete=models.CASCADE)
@@ -63,6 +325,10 @@ class SavedFilm(models.Model):
 
     class Meta:
         ordering = ("-pk",)
+        indexes = [
+            # Film sahifasidagi is_saved: WHERE user_id = ? AND film_id = ?
+            models.Index(fields=["user", "film"], name="savedfilm_user_film_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.username} saved {self.film.movies_name}"
@@ -75,32 +341,161 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ("-pk",)
+        indexes = [
+            # Film sahifasidagi izohlar: WHERE movie_id = ? ORDER BY created_at DESC, id DESC (cursor)
+            models.Index(fields=["movie", "-created_at", "-id"], name="comment_movie_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.movie.movies_name}"
 
+class LikeDislikeQuerySet(models.QuerySet):
+    def cast(self, movie_id, voter_key, vote, **fields):
+        """
+        Ovozni (movie, voter_key) kaliti bo'yicha yozadi va yangi hisoblagichlarni qaytaradi.
+        Bitta tranzaksiyada ikki so'rov: INSERT ... ON CONFLICT DO UPDATE ... RETURNING (ovoz faqat
+        almashganda yoziladi, revision 0 - yangi qator) va hisoblagichlarni o'zgartiruvchi
+        UPDATE ... RETURNING. Xom SQL post_save signalidan o'tmaydi - ikki marta sanalmaydi.
+        Qaytaradi: ("created" | "updated" | "unchanged", {"like_count", "dislike_count"})
+        """
+        instance = self.model(movie_id=movie_id, voter_key=voter_key, vote=vote, **fields)
+        db_fields = [field for field in self.model._meta.concrete_fields if not field.primary_key]
+        quote = connection.ops.quote_name
+        table = quote(self.model._meta.db_table)
+        movies = quote(Add_movies._meta.db_table)
+        with transaction.atomic(), connection.cursor() as cursor:
+            # SELECT ... WHERE film bo'lmasa hech narsa qo'shmaydi (FK xatosi o'rniga)
+            cursor.execute(
+                f"""
+                INSERT INTO {table} ({", ".join(quote(field.column) for field in db_fields)})
+                SELECT {", ".join(["%s"] * len(db_fields))} FROM {movies} WHERE id = %s
+                ON CONFLICT (movie_id, voter_key) DO UPDATE
+                SET vote = excluded.vote, revision = {table}.revision + 1
+                WHERE {table}.vote <> excluded.vote
+                RETURNING revision
+                """,
+                [field.get_db_prep_save(getattr(instance, field.attname), connection) for field in db_fields]
+                + [movie_id],
+            )
+            row = cursor.fetchone()
+            if row is None:
+                # Ovoz o'zgarmagan yoki film yo'q
+                cursor.execute(f"SELECT like_count, dislike_count FROM {movies} WHERE id = %s", [movie_id])
+                state = "unchanged"
+            else:
+                state = "created" if row[0] == 0 else "updated"
+                added = instance.counter_field
+                removed = "dislike_count" if added == "like_count" else "like_count"
+                taken = 1 if state == "updated" else 0
+                cursor.execute(
+                    f"""
+                    UPDATE {movies} SET {added} = {added} + 1,
+                        {removed} = CASE WHEN {removed} > %s THEN {removed} - %s ELSE 0 END
+                    WHERE id = %s
+                    RETURNING like_count, dislike_count
+                    """,
+                    [taken, taken, movie_id],
+                )
+            counts = cursor.fetchone()
+            if counts is None:
+                raise Add_movies.DoesNotExist
+        return state, dict(zip(("like_count", "dislike_count"), counts))
+
 class LikeDislike(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     movie = models.ForeignKey(Add_movies, on_delete=models.CASCADE)
     vote = models.BooleanField()
     session_key = models.CharField(max_length=40, null=True, blank=True)
     ip_address = models.CharField(max_length=45, null=True, blank=True)
+    # Ovoz beruvchi: "u:<user_id>" yoki "ip:<ip>" - upsert shu kalit bo'yicha
+    voter_key = models.CharField(max_length=64, editable=False)
+    # Ovoz necha marta almashgan: cast() dagi upsert RETURNING da yangi qatorni shundan ajratadi
+    revision = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = LikeDislikeQuerySet.as_manager()
 
     class Meta:
-        unique_together = [
-            ("user", "movie"),
-            ("session_key", "movie"),
-            ("ip_address", "movie"),
+        constraints = [
+            models.UniqueConstraint(fields=["movie", "voter_key"], name="likedislike_movie_voter_uniq"),
         ]
         ordering = ("-pk",)
 
+    @staticmethod
+    def make_voter_key(user_id=None, ip_address=None, session_key=None):
+        if user_id:
+            return f"u:{user_id}"
+        if ip_address:
+            return f"ip:{ip_address}"
+        if session_key:
+            return f"s:{session_key}"
+        return ""
+
+    def save(self, *args, **kwargs):
+        if not self.voter_key:
+            self.voter_key = self.make_voter_key(self.user_id, self.ip_address, self.session_key)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Ovoz almashganini signalda bilish uchun bazadagi qiymatni eslab qolamiz
+        instance._loaded_vote = instance.__dict__.get("vote")
+        return instance
+
+    @property
+    def counter_field(self):
+        """Shu ovoz hisoblanadigan Add_movies ustuni"""
+        return "like_count" if self._meta.get_field("vote").to_python(self.vote) else "dislike_count"
+
+def unread_cache_key(version, reader_version, reader_key):
+    # Umumiy versiya yangi yoki o'chirilgan bildirishnomada, o'quvchi versiyasi uning o'qishlarida oshadi
+    return f"notifications:unread:{version}:{reader_version}:{reader_key}"
+
+class NotificationQuerySet(models.QuerySet):
+    def unread_count(self, reader_key):
+        """
+        O'qilmaganlar = watermark dan keyingi bildirishnomalar - shu oraliqdagi o'qilganlar.
+        Ikkalasi ham indeks bo'yicha oraliq COUNT, natija bazadagi versiyalar kaliti bilan keshlanadi
+        (har qanday worker va kesh backendida to'g'ri): keshdan o'qish - bitta nuqtaviy so'rov.
+        """
+        version, watermark, reader_version = NotificationVersion.reader_state(reader_key)
+        key = unread_cache_key(version, reader_version, reader_key)
+        count = cache.get(key)
+        if count is None:
+            total = self.filter(pk__gt=watermark).count()
+            read = NotificationRead.objects.filter(reader_key=reader_key, notification_id__gt=watermark).count()
+            count = max(total - read, 0)
+            cache.set(key, count, settings.NOTIFICATION_UNREAD_CACHE_TIMEOUT)
+        return count
+
+    def read_state(self, reader_key, notification_ids):
+        """Sahifa uchun: (watermark, shu id lar ichidan o'qilganlari to'plami) - ikki so'rov"""
+        if not reader_key:
+            return 0, set()
+        watermark = NotificationWatermark.last_seen(reader_key)
+        unseen = [pk for pk in notification_ids if pk > watermark]
+        read_ids = set()
+        if unseen:
+            read_ids = set(NotificationRead.objects.filter(
+                reader_key=reader_key, notification_id__in=unseen,
+            ).values_list("notification_id", flat=True))
+        return watermark, read_ids
+
+    def mark_all_read(self, reader_key):
+        """Watermark ni oxirgi bildirishnomaga suradi, undan pastdagi alohida o'qishlar kerak emas"""
+        last_id = self.aggregate(last=Max("pk"))["last"] or 0
+        with transaction.atomic():
+            NotificationWatermark.bump(reader_key, last_seen_id=last_id)
+            NotificationRead.objects.filter(reader_key=reader_key, notification_id__lte=last_id).delete()
+        return last_id
+
 class Notification(models.Model):
     title = models.TextField()
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     views_count = models.IntegerField(default=0)
-    read_by = models.ManyToManyField(User, related_name="read_notifications", blank=True)
-    read_by_ips = models.JSONField(default=list, blank=True)
+
+    objects = NotificationQuerySet.as_manager()
 
     class Meta:
         ordering = ("-pk",)
@@ -108,23 +503,154 @@ class Notification(models.Model):
     def __str__(self):
         return self.title[:50]
 
-    def mark_as_read(self, request):
-        if request.user.is_authenticated:
-            if not self.read_by.filter(id=request.user.id).exists():
-                self.read_by.add(request.user)
-                self.views_count += 1
-                self.save()
-        else:
-            ip = self.get_client_ip(request)
-            if ip and ip not in self.read_by_ips:
-                self.read_by_ips.append(ip)
-                self.views_count += 1
-                self.save()
+    def mark_as_read(self, request, count_view=True):
+        """
+        O'qilganini NotificationRead ga yozadi; birinchi o'qishda views_count atomar oshadi.
+        Bildirishnoma qatori qayta yozilmaydi. Yangi yozuv bo'lsa True qaytaradi.
+        """
+        reader_key = get_reader_key(request)
+        if not reader_key or self.pk <= NotificationWatermark.last_seen(reader_key):
+            return False
+        try:
+            with transaction.atomic():
+                NotificationRead.objects.create(notification=self, reader_key=reader_key)
+                NotificationWatermark.bump(reader_key)
+        except IntegrityError:
+            return False
+        if count_view:
+            Notification.objects.filter(pk=self.pk).update(views_count=F("views_count") + 1)
+            self.views_count += 1
+        return True
+
+    def is_read_by(self, reader_key):
+        if not reader_key:
+            return False
+        return self.pk <= NotificationWatermark.last_seen(reader_key) or self.reads.filter(reader_key=reader_key).exists()
 
     def get_client_ip(self, request):
-        x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(",")[0]
-        else:
-            ip = request.META.get("REMOTE_ADDR")
-        return ip
\ No newline at end of file
+        return get_client_ip(request)
+
+def get_client_ip(request):
+    x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
+    if x_forwarded_for:
+        ip = x_forwarded_for.split(",")[0]
+    else:
+        ip = request.META.get("REMOTE_ADDR")
+    return ip
+
+def get_reader_key(request):
+    """Bildirishnoma o'quvchisi: "u:<user_id>" yoki anonim uchun "ip:<ip>" """
+    if request.user.is_authenticated:
+        return f"u:{request.user.pk}"
+    ip = get_client_ip(request)
+    return f"ip:{ip}" if ip else None
+
+class NotificationRead(models.Model):
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name="reads")
+    reader_key = models.CharField(max_length=64)
+    read_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # reader_key birinchi: "shu o'quvchi nimalarni o'qigan" so'rovlari ham shu indeksdan foydalanadi
+            models.UniqueConstraint(fields=["reader_key", "notification"], name="notification_read_uniq"),
+        ]
+
+class NotificationWatermark(models.Model):
+    """O'quvchi ko'rgan oxirgi bildirishnoma: id <= last_seen_id bo'lganlar o'qilgan hisoblanadi"""
+    reader_key = models.CharField(max_length=64, unique=True)
+    last_seen_id = models.PositiveBigIntegerField(default=0)
+    # O'quvchi har bir o'qishida oshadi - o'qilmaganlar soni keshi shu bilan eskiradi
+    version = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def last_seen(cls, reader_key):
+        return cls.objects.filter(reader_key=reader_key).values_list("last_seen_id", flat=True).first() or 0
+
+    @classmethod
+    def bump(cls, reader_key, **fields):
+        """Qator bo'lmasa yaratadi; parallel so'rov oldin yaratgan bo'lsa UPDATE qaytariladi - oshirish yo'qolmaydi"""
+        readers = cls.objects.filter(reader_key=reader_key)
+        if readers.update(version=F("version") + 1, **fields):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(reader_key=reader_key, version=1, **fields)
+        except IntegrityError:
+            readers.update(version=F("version") + 1, **fields)
+
+class NotificationVersion(models.Model):
+    """Bildirishnoma qo'shilganda yoki o'chirilganda (o'sha tranzaksiyada) oshadigan yagona qator"""
+    SINGLETON_PK = 1
+
+    version = models.PositiveBigIntegerField(default=0)
+
+    @classmethod
+    def bump(cls):
+        singleton = cls.objects.filter(pk=cls.SINGLETON_PK)
+        if singleton.update(version=F("version") + 1):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(pk=cls.SINGLETON_PK, version=1)
+        except IntegrityError:
+            # Parallel birinchi bump qatorni yaratib ulgurdi
+            singleton.update(version=F("version") + 1)
+
+    @classmethod
+    def reader_state(cls, reader_key):
+        """(umumiy versiya, watermark, o'quvchi versiyasi) - bitta so'rov"""
+        reader = NotificationWatermark.objects.filter(reader_key=reader_key)
+        state = cls.objects.filter(pk=cls.SINGLETON_PK).annotate(
+            last_seen_id=Coalesce(Subquery(reader.values("last_seen_id")[:1]), 0),
+            reader_version=Coalesce(Subquery(reader.values("version")[:1]), 0),
+        ).values_list("version", "last_seen_id", "reader_version").first()
+        if state is None:
+            # Hali birorta bildirishnoma qo'shilmagan
+            return (0, *(reader.values_list("last_seen_id", "version").first() or (0, 0)))
+        return state
+
+class SimilarMovie(models.Model):
+    """O'xshash filmlar (oldindan hisoblangan, api/similarity.py): so'rovda bitta indeksli o'qish"""
+    movie = models.ForeignKey(Add_movies, on_delete=models.CASCADE, related_name="neighbours")
+    similar = models.ForeignKey(Add_movies, on_delete=models.CASCADE, related_name="similar_to")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["movie", "rank"], name="similar_movie_rank_uniq"),
+        ]
+
+class SimilarityState(models.Model):
+    """Film qo'shnilari qaysi belgilar (janr, davlat, yil, bo'lim) bo'yicha hisoblangani"""
+    movie = models.OneToOneField(Add_movies, on_delete=models.CASCADE, primary_key=True, related_name="+")
+    fingerprint = models.CharField(max_length=32)
+    # Eng kuchsiz saqlangan qo'shni bali (ro'yxat to'lmagan bo'lsa 0): yangi film shundan yuqori bo'lsa qayta hisoblanadi
+    min_score = models.FloatField(default=0)
+
+class MovieViewDelta(models.Model):
+    """
+    Hali yig'ilmagan ko'rishlar (api/counters.py): har ko'rish bitta INSERT, barcha workerlar uchun
+    umumiy bufer. Bitta flusher ularni Add_movies.count va MovieViewBucket ga o'tkazib o'chiradi.
+    """
+    movie = models.ForeignKey(Add_movies, on_delete=models.CASCADE, related_name="view_deltas")
+    views = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(default=timezone.now)
+
+class MovieViewBucket(models.Model):
+    """Film ko'rishlari soatlik (span_hours=1) yoki eskirgach kunlik (24) oraliqlarda"""
+    movie = models.ForeignKey(Add_movies, on_delete=models.CASCADE, related_name="view_buckets")
+    bucket = models.DateTimeField()
+    span_hours = models.PositiveSmallIntegerField(default=1)
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["movie", "bucket"], name="movie_view_bucket_uniq"),
+        ]
+        indexes = [
+            # Yig'ish va tozalash: eski oraliqlar
+            models.Index(fields=["bucket"], name="movie_view_bucket_time_idx"),
+        ]
+
@@ -0,0 +1,104 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import (
+    Add_departments, Add_movies, AddMoviesQuerySet, LikeDislike, MovieSeries, Notification, NotificationVersion,
+    SimilarityState, notify_catalog_changed,
+)
+
+
+@receiver(post_save, sender=MovieSeries)
+@receiver(post_delete, sender=MovieSeries)
+def update_movie_series_stats(sender, instance, **kwargs):
+    """
+    Qism qo'shilsa, tahrirlansa yoki o'chirilsa filmning series_count va latest_activity si yangilanadi;
+    boshqa filmga ko'chirilganda eski film ham
+    """
+    movie_ids = {instance.movie_id, getattr(instance, "_loaded_movie_id", None)} - {None}
+    Add_movies.objects.filter(pk__in=movie_ids).refresh_series_stats()
+    notify_catalog_changed(MovieSeries, movie_ids)
+    instance._loaded_movie_id = instance.movie_id
+
+
+@receiver(post_save, sender=Add_movies)
+def update_own_activity(sender, instance, created, update_fields=None, **kwargs):
+    # Yangi film save() da hisoblangan, created_at haqiqatan o'zgarganda qayta hisoblaymiz
+    # (save() update_fields ni doim to'ldiradi - ro'yxatda borligi o'zgarganini bildirmaydi)
+    if not created and instance.created_at != getattr(instance, "_loaded_created_at", None) and (
+        update_fields is None or "created_at" in update_fields
+    ):
+        Add_movies.objects.filter(pk=instance.pk).refresh_series_stats()
+    instance._loaded_created_at = instance.created_at
+    if update_fields is None or not set(update_fields) <= AddMoviesQuerySet.versionless_fields:
+        notify_catalog_changed(Add_movies, {instance.pk})
+
+
+@receiver(post_save, sender=Add_movies)
+def sync_movie_genres(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and "genre" not in update_fields:
+        return
+    if created or instance.genre != getattr(instance, "_loaded_genre", None):
+        Add_movies.objects.filter(pk=instance.pk).sync_genres()
+        instance._loaded_genre = instance.genre
+
+
+@receiver(post_delete, sender=Add_movies)
+def movie_deleted(sender, instance, **kwargs):
+    notify_catalog_changed(Add_movies, {instance.pk})
+
+
+@receiver(pre_delete, sender=Add_movies)
+def mark_similar_lists_stale(sender, instance, **kwargs):
+    # Shu filmni o'xshashlar ro'yxatida saqlaganlarning ro'yxati qisqaradi - keyingi yangilanishda to'ldiriladi
+    SimilarityState.objects.filter(movie__neighbours__similar=instance).update(fingerprint="")
+
+
+@receiver(post_save, sender=Add_departments)
+@receiver(post_delete, sender=Add_departments)
+def department_changed(sender, instance, **kwargs):
+    # Bo'lim nomi shu bo'lim filmlarining javobida bor (o'chirilganda filmlar CASCADE bilan oldinroq o'chadi)
+    notify_catalog_changed(
+        Add_departments, set(Add_movies.objects.filter(add_departments=instance).values_list("pk", flat=True))
+    )
+
+
+@receiver(post_save, sender=LikeDislike)
+def vote_saved(sender, instance, created, **kwargs):
+    """Yangi ovoz +1, almashgan ovoz bir ustundan ikkinchisiga o'tadi"""
+    movie = Add_movies.objects.filter(pk=instance.movie_id)
+    loaded = getattr(instance, "_loaded_vote", None)
+    if created:
+        movie.update(**{instance.counter_field: F(instance.counter_field) + 1})
+    elif loaded is None:
+        # Oldingi qiymat noma'lum (bazadan o'qilmagan obyekt) - shu filmni qayta sanaymiz
+        movie.refresh_vote_counts()
+    else:
+        previous = LikeDislike(vote=loaded).counter_field
+        if previous != instance.counter_field:
+            movie.update(**{
+                previous: Greatest(F(previous) - 1, 0),
+                instance.counter_field: F(instance.counter_field) + 1,
+            })
+    instance._loaded_vote = instance._meta.get_field("vote").to_python(instance.vote)
+
+
+@receiver(post_delete, sender=LikeDislike)
+def vote_deleted(sender, instance, **kwargs):
+    loaded = getattr(instance, "_loaded_vote", None)
+    field = LikeDislike(vote=loaded).counter_field if loaded is not None else instance.counter_field
+    # Greatest: ustun drift tufayli 0 bo'lsa ham manfiyga tushmaydi (reconcile_vote_counts tuzatadi)
+    Add_movies.objects.filter(pk=instance.movie_id).update(**{field: Greatest(F(field) - 1, 0)})
+
+
+@receiver(post_save, sender=Notification)
+def notification_created(sender, instance, created, **kwargs):
+    # Tahrirlash o'qilmaganlar soniga ta'sir qilmaydi
+    if created:
+        NotificationVersion.bump()
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    NotificationVersion.bump()
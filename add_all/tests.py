@@ -0,0 +1,314 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from users.models import User
+
+from .models import Add_departments, Add_movies, AddMoviesQuerySet, Genre, LikeDislike, MovieSeries
+from .text import normalize, split_genres
+
+
+class SeriesStatsTests(TestCase):
+    def setUp(self):
+        self.department = Add_departments.objects.create(department_name="Anime", description="")
+        self.created_at = timezone.now() - timedelta(days=10)
+        self.movie = Add_movies.objects.create(
+            add_departments=self.department,
+            movies_name="Naruto",
+            movies_description="",
+            country="Japan",
+            created_at=self.created_at,
+        )
+
+    def assertActivity(self, expected, series_count=None):
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.latest_activity, expected)
+        if series_count is not None:
+            self.assertEqual(self.movie.series_count, series_count)
+
+    def test_new_movie_uses_created_at(self):
+        self.assertActivity(self.created_at)
+
+    def test_series_save_and_delete(self):
+        series_date = timezone.now() - timedelta(days=1)
+        series = MovieSeries.objects.create(movie=self.movie, title="1", video_url="x", created_at=series_date)
+        self.assertActivity(series_date, series_count=1)
+
+        newer = timezone.now()
+        series.created_at = newer
+        series.save()
+        self.assertActivity(newer)
+
+        series.delete()
+        self.assertActivity(self.created_at, series_count=0)
+
+    def test_movie_created_at_change(self):
+        movie = Add_movies.objects.get(pk=self.movie.pk)
+        movie.created_at = timezone.now() - timedelta(days=20)
+        movie.save()
+        self.assertActivity(movie.created_at)
+
+        movie.movies_description = "yangi"
+        with self.assertNumQueries(4):
+            # Sana o'zgarmadi - series statistikasi qayta hisoblanmaydi
+            movie.save()
+
+    def test_series_moved_to_another_movie(self):
+        other = Add_movies.objects.create(
+            add_departments=self.department, movies_name="Bleach", movies_description="", country="Japan",
+        )
+        series_date = timezone.now() - timedelta(days=1)
+        series = MovieSeries.objects.create(movie=self.movie, title="1", video_url="x", created_at=series_date)
+        series = MovieSeries.objects.get(pk=series.pk)
+        versions = dict(Add_movies.objects.values_list("pk", "document_version"))
+
+        series.movie = other
+        series.save()
+        self.assertActivity(self.created_at, series_count=0)
+        other.refresh_from_db()
+        self.assertEqual((other.series_count, other.latest_activity), (1, series_date))
+        self.assertEqual(
+            dict(Add_movies.objects.values_list("pk", "document_version")),
+            {pk: version + 1 for pk, version in versions.items()},
+        )
+
+        # Saqlangandan keyin o'sha nusxa bilan ortga ko'chirish
+        series.movie = self.movie
+        series.save()
+        self.assertActivity(series_date, series_count=1)
+        other.refresh_from_db()
+        self.assertEqual(other.series_count, 0)
+
+    def test_bulk_operations(self):
+        series_date = timezone.now() - timedelta(days=2)
+        MovieSeries.objects.bulk_create([
+            MovieSeries(movie=self.movie, title=str(i), video_url="x", created_at=series_date)
+            for i in range(3)
+        ])
+        self.assertActivity(series_date, series_count=3)
+
+        newer = timezone.now()
+        MovieSeries.objects.filter(movie=self.movie).update(created_at=newer)
+        self.assertActivity(newer)
+
+        MovieSeries.objects.filter(movie=self.movie).delete()
+        self.assertActivity(self.created_at, series_count=0)
+
+    def test_backfill_command(self):
+        MovieSeries.objects.create(movie=self.movie, title="1", video_url="x", created_at=None)
+        Add_movies.objects.update(latest_activity=timezone.now(), series_count=0)
+        call_command("backfill_series_stats", stdout=StringIO())
+        self.assertActivity(self.created_at, series_count=1)
+
+
+class VoteCountTests(TestCase):
+    def setUp(self):
+        department = Add_departments.objects.create(department_name="Anime", description="")
+        self.movie = Add_movies.objects.create(
+            add_departments=department, movies_name="Naruto", movies_description="", country="Japan",
+        )
+
+    def assertCounts(self, likes, dislikes):
+        self.movie.refresh_from_db()
+        self.assertEqual((self.movie.like_count, self.movie.dislike_count), (likes, dislikes))
+
+    def test_create_flip_and_delete(self):
+        vote = LikeDislike.objects.create(movie=self.movie, vote=True, ip_address="1.1.1.1")
+        LikeDislike.objects.create(movie=self.movie, vote=True, ip_address="2.2.2.2")
+        self.assertCounts(2, 0)
+
+        vote.vote = "False"  # so'rovdan kelgan qiymat ham BooleanField kabi talqin qilinadi
+        vote.save()
+        self.assertCounts(1, 1)
+        vote.save()
+        self.assertCounts(1, 1)
+
+        LikeDislike.objects.get(pk=vote.pk).delete()
+        self.assertCounts(1, 0)
+        LikeDislike.objects.filter(movie=self.movie).delete()
+        self.assertCounts(0, 0)
+
+    def test_cast_upserts_by_voter_key(self):
+        cast = LikeDislike.objects.cast
+        self.assertEqual(cast(self.movie.pk, "ip:1.1.1.1", True, ip_address="1.1.1.1"),
+                         ("created", {"like_count": 1, "dislike_count": 0}))
+        self.assertEqual(cast(self.movie.pk, "ip:1.1.1.1", True)[0], "unchanged")
+        self.assertEqual(cast(self.movie.pk, "ip:1.1.1.1", False),
+                         ("updated", {"like_count": 0, "dislike_count": 1}))
+        self.assertEqual(LikeDislike.objects.get().voter_key, "ip:1.1.1.1")
+        with self.assertRaises(Add_movies.DoesNotExist):
+            cast(self.movie.pk + 1, "ip:1.1.1.1", True)
+        self.assertEqual(LikeDislike.objects.count(), 1)
+
+    def test_cast_is_one_upsert_and_one_counter_update(self):
+        cast = LikeDislike.objects.cast
+        for vote, state, counts in [
+            (True, "created", {"like_count": 1, "dislike_count": 0}),
+            (False, "updated", {"like_count": 0, "dislike_count": 1}),
+            (False, "unchanged", {"like_count": 0, "dislike_count": 1}),
+        ]:
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(cast(self.movie.pk, "ip:1.1.1.1", vote, ip_address="1.1.1.1"), (state, counts))
+            statements = [q["sql"] for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]
+            self.assertEqual(len(statements), 2)
+            self.assertIn("ON CONFLICT", statements[0])
+        # Hisoblagich signal orqali ikkinchi marta o'zgarmagan
+        self.assertCounts(0, 1)
+        self.assertEqual(LikeDislike.objects.get().revision, 1)
+
+    def test_reconcile_command_repairs_drift(self):
+        user = User.objects.create_user(username="voter", email="voter@example.com", password="x")
+        LikeDislike.objects.create(movie=self.movie, vote=False, user=user)
+        LikeDislike.objects.filter(movie=self.movie).update(vote=True)  # signalsiz o'zgarish
+        self.assertCounts(0, 1)
+
+        out = StringIO()
+        call_command("reconcile_vote_counts", stdout=out)
+        self.assertIn("1 ta film", out.getvalue())
+        self.assertCounts(1, 0)
+
+
+class SearchKeyTests(TestCase):
+    def test_normalize_unifies_scripts_and_apostrophes(self):
+        self.assertEqual(normalize("  НАРУТО   Шиппуден "), "naruto shippuden")
+        for spelling in ["O'zbek", "O‘zbek", "oʻzbek", "Ozbek", "Ўзбек"]:
+            self.assertEqual(normalize(spelling), "ozbek")
+        self.assertEqual(normalize("G`alaba qo’shig’i"), "galaba qoshigi")
+        self.assertEqual(normalize("Pokémon Ёрдам"), "pokemon yordam")
+        self.assertEqual(normalize(None), "")
+
+    def test_key_follows_every_write_path(self):
+        department = Add_departments.objects.create(department_name="Anime", description="")
+        movie = Add_movies.objects.create(
+            add_departments=department, movies_name="Наруто", movies_description="", country="Japan",
+        )
+        self.assertEqual(movie.search_key, "naruto")
+
+        movie.movies_name = "Ван Пис"
+        movie.save(update_fields=["movies_name"])
+        self.assertEqual(Add_movies.objects.get(pk=movie.pk).search_key, "van pis")
+
+        Add_movies.objects.filter(pk=movie.pk).update(movies_name="Qo‘shiq")
+        self.assertEqual(Add_movies.objects.get(pk=movie.pk).search_key, "qoshiq")
+
+        other, = Add_movies.objects.bulk_create([
+            Add_movies(add_departments=department, movies_name="Bleach", movies_description="", country="Japan"),
+        ])
+        other.movies_name = "Блич"
+        Add_movies.objects.bulk_update([other], ["movies_name"])
+        self.assertEqual(Add_movies.objects.get(movies_name="Блич").search_key, "blich")
+
+
+class GenreSyncTests(TestCase):
+    def setUp(self):
+        self.department = Add_departments.objects.create(department_name="Anime", description="")
+
+    def genres(self, movie):
+        return sorted(movie.genres.values_list("key", flat=True))
+
+    def test_split_genres(self):
+        self.assertEqual(split_genres(" Jangari,  sarguzasht ; jangari/Жангари,,"), ["Jangari", "sarguzasht"])
+        self.assertEqual(split_genres(""), [])
+
+    def test_genres_follow_genre_string(self):
+        movie = Add_movies.objects.create(
+            add_departments=self.department, movies_name="Naruto", movies_description="", country="Japan",
+            genre="Jangari, Sarguzasht",
+        )
+        self.assertEqual(self.genres(movie), ["jangari", "sarguzasht"])
+
+        movie = Add_movies.objects.get(pk=movie.pk)
+        movie.genre = "Drama"
+        movie.save()
+        self.assertEqual(self.genres(movie), ["drama"])
+
+        Add_movies.objects.filter(pk=movie.pk).update(genre="drama, Komediya")
+        self.assertEqual(self.genres(movie), ["drama", "komediya"])
+
+        other, = Add_movies.objects.bulk_create([
+            Add_movies(add_departments=self.department, movies_name="Bleach", movies_description="",
+                       country="Japan", genre="Jangari"),
+        ])
+        self.assertEqual(self.genres(other), ["jangari"])
+        # Bitta janr bitta qator, birinchi ko'rilgan yozilishi bilan
+        self.assertEqual(Genre.objects.get(key="jangari").name, "Jangari")
+        self.assertEqual(Genre.objects.count(), 4)
+
+    def test_unchanged_genre_skips_sync(self):
+        movie = Add_movies.objects.create(
+            add_departments=self.department, movies_name="Naruto", movies_description="", country="Japan",
+            genre="Jangari",
+        )
+        movie = Add_movies.objects.get(pk=movie.pk)
+        movie.movies_description = "yangi"
+        with self.assertNumQueries(4):
+            # UPDATE + katalog versiyasi (UPDATE + SELECT) + hujjat versiyasi;
+            # created_at o'zgarmagan - series statistikasi, janrlarga so'rov yo'q
+            movie.save()
+
+
+
+class DocumentVersionTests(TestCase):
+    def setUp(self):
+        self.department = Add_departments.objects.create(department_name="Anime", description="")
+        self.movie = Add_movies.objects.create(
+            add_departments=self.department, movies_name="Naruto", movies_description="", country="Japan",
+        )
+
+    def version(self):
+        return Add_movies.objects.values_list("document_version", flat=True).get(pk=self.movie.pk)
+
+    def test_catalog_changes_bump_version(self):
+        start = self.version()
+        MovieSeries.objects.create(movie=self.movie, title="1", video_url="x")
+        self.assertEqual(self.version(), start + 1)
+        self.department.department_name = "Anime (yangi)"
+        self.department.save()
+        self.assertEqual(self.version(), start + 2)
+        # Ko'rishlar hujjat versiyasini oshirmaydi
+        Add_movies.objects.filter(pk=self.movie.pk).update(count=5)
+        self.assertEqual(self.version(), start + 2)
+
+    def test_department_change_bumps_only_its_movies(self):
+        other = Add_movies.objects.create(
+            add_departments=Add_departments.objects.create(department_name="Kino", description=""),
+            movies_name="Gladiator", movies_description="", country="USA",
+        )
+        versions = dict(Add_movies.objects.values_list("pk", "document_version"))
+        self.department.department_name = "Anime (yangi)"
+        self.department.save()
+        self.assertEqual(
+            dict(Add_movies.objects.values_list("pk", "document_version")),
+            {self.movie.pk: versions[self.movie.pk] + 1, other.pk: versions[other.pk]},
+        )
+
+    def test_stale_instance_does_not_roll_version_back(self):
+        stale = Add_movies.objects.get(pk=self.movie.pk)
+        Add_movies.objects.filter(pk=self.movie.pk).update(movies_description="yangi")
+        current = self.version()
+        stale.movies_name = "Boruto"
+        stale.save()
+        self.assertEqual(self.version(), current + 1)
+
+    def test_stale_instance_keeps_counters(self):
+        stale = Add_movies.objects.get(pk=self.movie.pk)
+        LikeDislike.objects.cast(self.movie.pk, "ip:1.1.1.1", True, ip_address="1.1.1.1")
+        MovieSeries.objects.create(movie=self.movie, title="1", video_url="x")
+        Add_movies.objects.filter(pk=self.movie.pk).update(count=1, trending_score=2.5)
+        state = Add_movies.objects.values(*AddMoviesQuerySet.versionless_fields).get(pk=self.movie.pk)
+
+        stale.movies_description = "yangi"
+        stale.save()
+        fresh = Add_movies.objects.values("movies_description", *AddMoviesQuerySet.versionless_fields).get(
+            pk=self.movie.pk
+        )
+        self.assertEqual(fresh.pop("movies_description"), "yangi")
+        # Saqlashda faqat document_version oshadi
+        state["document_version"] += 1
+        self.assertEqual(fresh, state)
+        self.assertEqual((fresh["like_count"], fresh["count"], fresh["series_count"]), (1, 1, 1))
@@ -0,0 +1,49 @@
+"""
+Qidiruv kaliti: bir xil nom qanday yozilganidan qat'i nazar bir xil kalitga keladi.
+- kichik harf (casefold)
+- kirill (o'zbek va rus) -> o'zbek lotin: "Наруто" -> "naruto", "Ўзбек" -> "ozbek"
+- tutuq belgilar (', ʻ, ʼ, ’, `) olib tashlanadi: "O‘zbek", "o'zbek", "ozbek" -> "ozbek"
+- diakritikalar olib tashlanadi: "Pokémon" -> "pokemon"
+- ortiqcha bo'shliqlar
+"""
+import re
+import unicodedata
+
+CYRILLIC = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "yo", "ж": "j", "з": "z",
+    "и": "i", "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r",
+    "с": "s", "т": "t", "у": "u", "ф": "f", "х": "x", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sh",
+    "ъ": "", "ы": "i", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+    # O'zbek kirill harflari (o', g' tutuq belgisiz, lotin kalit bilan bir xil bo'lishi uchun)
+    "ў": "o", "қ": "q", "ғ": "g", "ҳ": "h",
+    # Qozoq / tojik yozuvlardagi yaqin harflar
+    "ә": "a", "ө": "o", "ү": "u", "ұ": "u", "ң": "ng", "һ": "h", "ӣ": "i", "ӯ": "u", "ҷ": "j",
+}
+APOSTROPHES = "'`´ʻʼʹ‘’′"
+
+# str.translate C darajasida ishlaydi - har bir belgi uchun Python sikli yo'q
+TRANSLATION = str.maketrans({**CYRILLIC, **{mark: "" for mark in APOSTROPHES}})
+
+
+def normalize(text):
+    """Qidiruv kaliti (Add_movies.search_key va qidiruv so'rovlari uchun)"""
+    text = str(text or "").casefold()
+    if text.isascii():
+        # Ko'p nomlar faqat lotin - unicodedata ga umuman kirmaymiz
+        return " ".join(text.translate(TRANSLATION).split())
+    # Ajratilgan holda yozilgan "й" (и + ̆) ham kirill jadvaliga tushishi uchun avval NFC
+    text = unicodedata.normalize("NFC", text).translate(TRANSLATION)
+    if not text.isascii():
+        text = "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+    return " ".join(text.split())
+
+
+def split_genres(text):
+    """ "Jangari, sarguzasht; Jangari" -> ["Jangari", "sarguzasht"] (kalit bo'yicha takrorlarsiz, tartib saqlanadi)"""
+    names = {}
+    for part in re.split(r"[,;/|]", text or ""):
+        name = " ".join(part.split())
+        key = normalize(name)
+        if key and key not in names:
+            names[key] = name
+    return list(names.values())
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        from . import checks, documents, search  # noqa: F401  (tizim tekshiruvlari, catalog_changed qabul qiluvchilari)
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.cache import cache
+from prometheus_client import Counter
+from rest_framework.response import Response
+
+from add_all.models import CatalogVersion
+
+catalog_cache_requests = Counter(
+    "catalog_response_cache_requests_total",
+    "Katalog javob keshiga murojaatlar (hit/miss)",
+    ["endpoint", "result"],
+)
+
+
+def request_cached(request, name, compute):
+    """Bir so'rov ichida bir marta hisoblanadi (masalan ETag tekshiruvi va view bir xil versiyani ishlatadi)"""
+    if not hasattr(request, name):
+        setattr(request, name, compute())
+    return getattr(request, name)
+
+
+def catalog_version(request):
+    return request_cached(request, "_catalog_version", CatalogVersion.current)
+
+
+def catalog_cache_key(name, version, request):
+    return f"catalog:{name}:v{version}:{request.GET.urlencode()}"
+
+
+class CatalogCacheMixin:
+    """
+    Barcha foydalanuvchilarga bir xil bo'lgan katalog javoblarini keshlaydi.
+    Kalit katalog versiyasiga bog'langan, shuning uchun film, qism yoki bo'lim
+    o'zgarganda eski javoblar o'z-o'zidan ishlatilmay qoladi.
+    """
+    cache_name = None
+
+    def list(self, request, *args, **kwargs):
+        version = catalog_version(request).version
+        name = self.cache_name or type(self).__name__
+        key = catalog_cache_key(name, version, request)
+
+        data = cache.get(key)
+        if data is not None:
+            catalog_cache_requests.labels(endpoint=name, result="hit").inc()
+            return Response(data)
+
+        catalog_cache_requests.labels(endpoint=name, result="miss").inc()
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+        return response
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+from .geo import get_ip_database
+
+
+@register("geoip", deploy=True)
+def geoip_database_check(app_configs, **kwargs):
+    """Lokal baza ham, HTTP fallback ham bo'lmasa IP bo'yicha cheklov jimgina o'chib qoladi"""
+    if settings.GEOIP_HTTP_FALLBACK or get_ip_database() is not None:
+        return []
+    return [
+        Error(
+            f"GeoIP bazasi ({settings.GEOIP_DB_PATH}) topilmadi yoki o'qib bo'lmadi, GEOIP_HTTP_FALLBACK "
+            "o'chirilgan - IP bo'yicha cheklov ishlamaydi",
+            hint="python manage.py refresh_geoip ni ishga tushiring yoki GEOIP_HTTP_FALLBACK=True qiling",
+            id="api.E001",
+        )
+    ]
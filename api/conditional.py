@@ -0,0 +1,56 @@
+"""
+Shartli GET (If-None-Match / If-Modified-Since -> 304) katalog endpointlari va film sahifasi uchun.
+Tekshiruv serializer va javob keshidan oldin ishlaydi:
+- katalog: kuchsiz ETag = yo'l + so'rov parametrlari + katalog versiyasi (bitta so'rov) + vaqt oynasi.
+  count (ko'rishlar) versiyani oshirmaydi, javob keshi kabi CATALOG_CACHE_TIMEOUT oynasida yangilanadi;
+- film: ETag hujjat mazmuni xeshi, ko'rishlar/ovozlar soni va foydalanuvchi qismidan (bitta so'rov,
+  hujjat keshdan).
+Ishonchli oxirgi yozuv vaqti yo'q (ko'rishlar vaqt yozmaydi), shuning uchun Last-Modified berilmaydi.
+"""
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from .cache import catalog_version, request_cached
+from .documents import LIVE_FIELDS, get_movie_document
+
+
+def catalog_window(now=None):
+    timeout = max(settings.CATALOG_CACHE_TIMEOUT, 1)
+    now = now or timezone.now()
+    return datetime.fromtimestamp(int(now.timestamp()) // timeout * timeout, tz=dt_timezone.utc)
+
+
+def make_etag(*parts):
+    return hashlib.md5(":".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def catalog_etag(request, *args, **kwargs):
+    # Kuchsiz: vaqt oynasi ichida ko'rishlar soni farq qilishi mumkin
+    version = catalog_version(request)
+    return 'W/"%s"' % make_etag(request.path, request.GET.urlencode(), version.version, catalog_window().timestamp())
+
+
+catalog_condition = condition(etag_func=catalog_etag)
+
+
+def movie_document(request, movie_id):
+    """(hujjat, mazmun xeshi, foydalanuvchi qismi); film topilmasa (None, None, None)"""
+    return request_cached(request, "_movie_document", lambda: get_movie_document(movie_id, request.user))
+
+
+def movie_etag(request, pk=None, *args, **kwargs):
+    document, digest, overlay = movie_document(request, pk)
+    # is_possible filmlar javobi foydalanuvchi joylashuviga bog'liq (403) - keshlanmaydi
+    if document is None or document["is_possible"]:
+        return None
+    return make_etag(
+        "movie", document["id"], digest, *(document[field] for field in LIVE_FIELDS),
+        overlay["is_saved"], overlay["user_vote"],
+    )
+
+
+movie_condition = condition(etag_func=movie_etag)
@@ -0,0 +1,100 @@
+"""
+Write-behind ko'rishlar hisoblagichi. Bufer - MovieViewDelta jadvali: har ko'rish issiq Add_movies
+qatoriga UPDATE o'rniga bitta INSERT, shuning uchun u barcha workerlar uchun umumiy va worker
+o'ldirilsa (SIGKILL, timeout) ham yo'qolmaydi. Yagona flusher (run_scheduler yoki flush_view_counts)
+drain_view_deltas() bilan ularni Add_movies.count ga va trending uchun soatlik MovieViewBucket
+larga bitta tranzaksiyada o'tkazadi. Film sahifasi (api/documents.py) buferdagi ko'rishlarni ham
+qo'shib ko'rsatadi; ro'yxatlar va tartiblash faqat Add_movies.count ni o'qiydi - ular
+VIEW_COUNT_FLUSH_INTERVAL gacha orqada qoladi.
+"""
+from collections import Counter
+from datetime import timezone as dt_timezone
+
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from add_all.models import Add_movies, MovieViewBucket, MovieViewDelta
+
+# Bitta CASE UPDATE dagi filmlar soni
+FLUSH_BATCH_SIZE = 500
+
+
+def hour_start(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def db_datetime(value):
+    """Xom kursor qaytargan vaqt (SQLite da satr) - UTC dagi aware datetime"""
+    value = models.DateTimeField().to_python(value)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return value.astimezone(dt_timezone.utc)
+
+
+def pending_views():
+    return Coalesce(
+        models.Subquery(
+            MovieViewDelta.objects.filter(movie=models.OuterRef("pk")).order_by().values("movie").annotate(
+                total=models.Sum("views")
+            ).values("total")
+        ),
+        0,
+    )
+
+
+def record_view(movie_id):
+    """Ko'rishni buferga yozadi va yangi ko'rishlar sonini qaytaradi; film topilmasa None"""
+    current = Add_movies.objects.filter(pk=movie_id).annotate(pending=pending_views()).values_list(
+        "count", "pending"
+    ).first()
+    if current is None:
+        return None
+    try:
+        MovieViewDelta.objects.create(movie_id=movie_id)
+    except IntegrityError:
+        # Film shu orada o'chirildi
+        return None
+    count, pending = current
+    return count + pending + 1
+
+
+def drain_view_deltas():
+    """
+    Buferdagi ko'rishlarni Add_movies.count va soatlik bucketlarga o'tkazadi. Faqat shu DELETE
+    o'chirgan qatorlar qo'shiladi - parallel ikkinchi flusher ularni qayta sanamaydi.
+    Yangilangan filmlar sonini qaytaradi.
+    """
+    table = connection.ops.quote_name(MovieViewDelta._meta.db_table)
+    buckets_table = connection.ops.quote_name(MovieViewBucket._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} RETURNING movie_id, created_at, views")
+        rows = cursor.fetchall()
+        if not rows:
+            return 0
+        counts = Counter()
+        hours = Counter()
+        for movie_id, created_at, views in rows:
+            counts[movie_id] += views
+            hours[movie_id, hour_start(db_datetime(created_at))] += views
+        movie_ids = list(counts)
+        for start in range(0, len(movie_ids), FLUSH_BATCH_SIZE):
+            batch = movie_ids[start:start + FLUSH_BATCH_SIZE]
+            delta = models.Case(
+                *[models.When(pk=movie_id, then=models.Value(counts[movie_id])) for movie_id in batch],
+                default=models.Value(0),
+                output_field=models.IntegerField(),
+            )
+            Add_movies.objects.filter(pk__in=batch).update(count=models.F("count") + delta)
+        # Deltalar film bilan birga (CASCADE) o'chadi - bu yerdagi filmlar mavjud
+        cursor.executemany(
+            f"""
+            INSERT INTO {buckets_table} (movie_id, bucket, span_hours, views) VALUES (%s, %s, 1, %s)
+            ON CONFLICT (movie_id, bucket) DO UPDATE SET views = {buckets_table}.views + excluded.views
+            """,
+            [
+                (movie_id, connection.ops.adapt_datetimefield_value(bucket), views)
+                for (movie_id, bucket), views in hours.items()
+            ],
+        )
+    return len(counts)
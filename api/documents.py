@@ -0,0 +1,112 @@
+"""
+Film sahifasi (detail) uch qismdan yig'iladi:
+- hujjat: film, bo'lim, qismlar va izohlarning birinchi sahifasi - hamma uchun bir xil, keshda
+  Add_movies.document_version bilan birga saqlanadi. Versiya katalog o'zgarishi (notify_catalog_changed)
+  yoki izoh bilan o'sha tranzaksiyada oshadi, shuning uchun har qanday worker va kesh backendida to'g'ri.
+  Hujjat so'rovsiz quriladi (fayl URL lari nisbiy), to'liq URL javob berishda qo'shiladi;
+- tez o'zgaradigan ustunlar (ko'rishlar buferdagilari bilan, ovozlar) versiya bilan bitta nuqtaviy
+  so'rovda o'qiladi;
+- foydalanuvchi qismi: is_saved va user_vote - o'sha so'rovga indeksli subquerylar sifatida qo'shiladi.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Subquery
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from add_all.models import Add_movies, Comment, LikeDislike, SavedFilm
+from .counters import pending_views
+from .pagination import CommentPagination
+from .serializers import MovieDetailSerializer
+
+# Hujjat versiyasini oshirmaydigan, har so'rovda bazadan o'qiladigan ustunlar
+LIVE_FIELDS = ("count", "like_count", "dislike_count")
+
+
+def document_key(movie_id, version):
+    return f"movie:document:{movie_id}:{version}"
+
+
+def movie_comments(movie_id):
+    """Film izohlari: foydalanuvchidan faqat serializer o'qiydigan ustunlar"""
+    return Comment.objects.filter(movie_id=movie_id).select_related('user').only(
+        'id', 'text', 'created_at', 'movie_id', 'user__id', 'user__username'
+    )
+
+
+def build_movie_document(movie_id):
+    instance = Add_movies.objects.select_related('add_departments').prefetch_related('series').filter(
+        pk=movie_id
+    ).first()
+    if instance is None:
+        return None
+    instance.comments_count = Comment.objects.filter(movie_id=movie_id).count()
+    instance.comments_page, instance.comments_next_cursor = CommentPagination().first_page(
+        movie_comments(movie_id)
+    )
+    return dict(MovieDetailSerializer(instance).data)
+
+
+def document_digest(document):
+    return hashlib.md5(json.dumps(document, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def user_overlay_fields(user):
+    """Foydalanuvchi qismi: jonli ustunlar so'roviga qo'shiladigan subquerylar (anonim uchun bo'sh)"""
+    if user is None or not user.is_authenticated:
+        return {}
+    voter_key = LikeDislike.make_voter_key(user_id=user.pk)
+    return {
+        # savedfilm_user_film_idx
+        'is_saved': Exists(SavedFilm.objects.filter(user=user, film_id=OuterRef('pk'))),
+        # likedislike_movie_voter_uniq
+        'user_vote': Subquery(
+            LikeDislike.objects.filter(movie_id=OuterRef('pk'), voter_key=voter_key).order_by().values('vote')[:1]
+        ),
+    }
+
+
+def get_movie_document(movie_id, user=None):
+    """
+    (hujjat, hujjat mazmunining xeshi, foydalanuvchi qismi); film topilmasa (None, None, None).
+    Versiya, jonli ustunlar va foydalanuvchi qismi - bitta nuqtaviy so'rov, hujjat keshdan.
+    """
+    overlay_fields = user_overlay_fields(user)
+    state = Add_movies.objects.filter(pk=movie_id).annotate(pending=pending_views(), **overlay_fields).values(
+        "document_version", "pending", *LIVE_FIELDS, *overlay_fields
+    ).first()
+    if state is None:
+        return None, None, None
+    overlay = {'is_saved': False, 'user_vote': None}
+    overlay.update((name, state.pop(name)) for name in overlay_fields)
+    # Hali yig'ilmagan ko'rishlar (api/counters.py) ham ko'rinadi
+    state["count"] += state.pop("pending")
+    key = document_key(movie_id, state.pop("document_version"))
+    cached = cache.get(key)
+    if cached is None:
+        document = build_movie_document(movie_id)
+        if document is None:
+            return None, None, None
+        cached = (document, document_digest(document))
+        cache.set(key, cached, settings.MOVIE_DOCUMENT_TIMEOUT)
+    document, digest = cached
+    return {**document, **state}, digest, overlay
+
+
+def absolute_file_urls(document, request):
+    """Qismlarning nisbiy fayl URL lari so'rov hostiga ko'ra to'liq qilinadi"""
+    series = [
+        {**item, 'video_file': request.build_absolute_uri(item['video_file'])} if item.get('video_file') else item
+        for item in document['series']
+    ]
+    return {**document, 'series': series}
+
+
+# Izohlar katalog versiyasini oshirmaydi, lekin birinchi sahifasi hujjatda bor
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    Add_movies.objects.filter(pk=instance.movie_id).bump_document_version()
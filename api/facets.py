@@ -0,0 +1,69 @@
+"""
+Feed filtrlari (?genre=, ?year=, ?country=) va ularning facet hisoblari (?facets=true).
+Har bir o'lcham hisobi qolgan filtrlar bo'yicha olinadi (o'z filtri hisobga olinmaydi), ya'ni
+foydalanuvchi tanlovini almashtirsa nechta film chiqishini ko'radi. Hisoblar katalog versiyasi bilan keshlanadi.
+"""
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from add_all.models import CatalogVersion, MovieGenre
+from add_all.text import normalize
+
+FACET_PARAMS = ("genre", "year", "country")
+
+
+def get_filters(request):
+    filters = {}
+    for name in FACET_PARAMS:
+        value = request.query_params.get(name, "").strip()
+        if value:
+            # Janr kalit bo'yicha: "Jangari", "jangari", "Жангари" bir xil
+            filters[name] = normalize(value) if name == "genre" else value
+    return filters
+
+
+def apply_filters(queryset, filters, skip=None):
+    for name, value in filters.items():
+        if name == skip:
+            continue
+        if name == "genre":
+            queryset = queryset.filter(movie_genres__genre__key=value)
+        else:
+            queryset = queryset.filter(**{name: value})
+    return queryset
+
+
+def count_facets(queryset, filters):
+    """Har o'lcham uchun bitta GROUP BY so'rovi"""
+    genres = (
+        MovieGenre.objects.filter(movie__in=apply_filters(queryset, filters, skip="genre").values("pk"))
+        .values("genre__key", "genre__name").annotate(count=Count("movie")).order_by("-count", "genre__name")
+    )
+    facets = {
+        "genre": [{"value": row["genre__key"], "name": row["genre__name"], "count": row["count"]} for row in genres],
+    }
+    for name in ("year", "country"):
+        rows = (
+            apply_filters(queryset, filters, skip=name).exclude(**{name: ""})
+            .values(name).annotate(count=Count("pk")).order_by("-count", name)
+        )
+        facets[name] = [{"value": row[name], "count": row["count"]} for row in rows]
+    return facets
+
+
+def get_facets(name, queryset, filters, version=None):
+    """
+    name - endpoint nomi (kesh kaliti uchun), queryset - filtrlanmagan (tartibsiz) filmlar,
+    version - so'rovda allaqachon o'qilgan katalog versiyasi (bo'lmasa o'qiladi)
+    """
+    if version is None:
+        version = CatalogVersion.current().version
+    key = f"catalog:facets:{name}:v{version}:{urlencode(sorted(filters.items()))}"
+    facets = cache.get(key)
+    if facets is None:
+        facets = count_facets(queryset.order_by(), filters)
+        cache.set(key, facets, settings.CATALOG_CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,481 @@
+import gzip
+import ipaddress
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from prometheus_client import Counter, Histogram
+
+geo_cache_requests = Counter(
+    "geo_cache_requests_total",
+    "IP bo'yicha geo keshga murojaatlar",
+    ["cache", "result"],  # result: local_hit, shared_hit, miss
+)
+geo_provider_latency = Histogram(
+    "geo_provider_latency_seconds",
+    "Geo ma'lumot manbalarining javob vaqti",
+    ["provider"],
+    buckets=(0.0001, 0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+# Fayl formati: sarlavha, IPv4 yozuvlari, IPv6 yozuvlari, ASN nomlari (NUL bilan tugaydigan utf-8).
+# Yozuvlar boshlang'ich manzil bo'yicha tartiblangan, shuning uchun qidiruv - binary search.
+MAGIC = b"AKGEO01\n"
+HEADER = struct.Struct(">8sIII")  # magic, ipv4 soni, ipv6 soni, nomlar hajmi
+V4_RECORD = struct.Struct(">II2sII")  # start, end, davlat kodi, ASN, nom offseti
+V6_RECORD = struct.Struct(">16s16s2sII")
+
+
+class IPRangeDatabase:
+    """
+    mmap qilingan IP diapazonlar bazasi. Fayl sahifalari OS keshida bo'ladi,
+    shuning uchun barcha gunicorn workerlar bitta nusxadan foydalanadi.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.v4_count, self.v6_count, names_size = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} geo bazasi emas")
+        self._v4_offset = HEADER.size
+        self._v6_offset = self._v4_offset + self.v4_count * V4_RECORD.size
+        self._names_offset = self._v6_offset + self.v6_count * V6_RECORD.size
+        self._names_end = self._names_offset + names_size
+
+    def close(self):
+        self._mm.close()
+
+    def lookup(self, ip):
+        """IP uchun {'countryCode', 'asn', 'as_name'} yoki None qaytaradi"""
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+
+        if address.version == 4:
+            record = self._search(int(address), self._v4_offset, self.v4_count, V4_RECORD)
+        else:
+            record = self._search(address.packed, self._v6_offset, self.v6_count, V6_RECORD)
+        if record is None:
+            return None
+
+        _, _, country, asn, name_offset = record
+        return {
+            "countryCode": country.decode("ascii").strip("\x00"),
+            "asn": asn,
+            "as_name": self._name(name_offset),
+        }
+
+    def _search(self, key, offset, count, record_struct):
+        # start <= key bo'lgan eng oxirgi yozuvni topamiz
+        low, high = 0, count
+        while low < high:
+            mid = (low + high) // 2
+            start = record_struct.unpack_from(self._mm, offset + mid * record_struct.size)[0]
+            if start <= key:
+                low = mid + 1
+            else:
+                high = mid
+        if not low:
+            return None
+        record = record_struct.unpack_from(self._mm, offset + (low - 1) * record_struct.size)
+        return record if key <= record[1] else None
+
+    def _name(self, name_offset):
+        start = self._names_offset + name_offset
+        end = self._mm.find(b"\x00", start, self._names_end)
+        return self._mm[start:end].decode("utf-8")
+
+    @staticmethod
+    def build(rows, path):
+        """
+        (start_ip, end_ip, country_code, asn, as_name) qatorlaridan bazani yozadi.
+        Fayl atomar almashtiriladi, ishlab turgan workerlar eski nusxani o'qishda davom etadi.
+        """
+        v4, v6, names, name_offsets, names_size = [], [], [], {}, 0
+        for start_ip, end_ip, country, asn, as_name in rows:
+            start, end = ipaddress.ip_address(start_ip), ipaddress.ip_address(end_ip)
+            if start.version != end.version:
+                continue
+            if as_name not in name_offsets:
+                encoded = as_name.encode("utf-8") + b"\x00"
+                name_offsets[as_name] = names_size
+                names.append(encoded)
+                names_size += len(encoded)
+            code = (country or "").upper().encode("ascii", "ignore")[:2].ljust(2, b"\x00")
+            if start.version == 4:
+                v4.append((int(start), int(end), code, int(asn), name_offsets[as_name]))
+            else:
+                v6.append((start.packed, end.packed, code, int(asn), name_offsets[as_name]))
+        v4.sort()
+        v6.sort()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(HEADER.pack(MAGIC, len(v4), len(v6), names_size))
+            fh.writelines(V4_RECORD.pack(*record) for record in v4)
+            fh.writelines(V6_RECORD.pack(*record) for record in v6)
+            fh.writelines(names)
+        os.replace(tmp_path, path)
+        return len(v4), len(v6)
+
+
+def read_ip2asn_rows(path):
+    """iptoasn.com formatidagi TSV (yoki .gz): range_start range_end AS_number country_code AS_description"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as fh:
+        for line in fh:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) < 5 or parts[2] == "0":
+                continue
+            country = "" if parts[3] in ("None", "Unknown") else parts[3]
+            yield parts[0], parts[1], country, parts[2], parts[4]
+
+
+_database = None
+_database_lock = threading.Lock()
+_database_checked_at = 0.0
+_database_mtime = None
+
+
+def get_ip_database():
+    """
+    Jarayon bo'yicha yagona baza nusxasi. Fayl yangilansa (refresh_geoip)
+    GEOIP_DB_RELOAD_INTERVAL soniya ichida qayta ochiladi.
+    """
+    global _database, _database_checked_at, _database_mtime
+    now = time.monotonic()
+    path = settings.GEOIP_DB_PATH
+    if (
+        _database is not None
+        and _database.path == path
+        and now - _database_checked_at < settings.GEOIP_DB_RELOAD_INTERVAL
+    ):
+        return _database
+
+    with _database_lock:
+        _database_checked_at = now
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            _database, _database_mtime = None, None
+            return None
+        if _database is None or _database.path != path or mtime != _database_mtime:
+            try:
+                _database = IPRangeDatabase(path)
+                _database_mtime = mtime
+            except (OSError, ValueError, struct.error):
+                _database, _database_mtime = None, None
+        return _database
+
+
+def lookup_ip(ip):
+    """
+    Lokal bazadan get_geolocation_data bilan bir xil ko'rinishdagi ma'lumot.
+    Baza yo'q yoki IP topilmasa None.
+    """
+    database = get_ip_database()
+    if database is None:
+        return None
+    with geo_provider_latency.labels(provider="local_db").time():
+        record = database.lookup(ip)
+    if record is None:
+        return None
+    as_name = record["as_name"]
+    return {
+        "country": "",
+        "countryCode": record["countryCode"],
+        "isp": as_name,
+        "org": as_name,
+        "as": f"AS{record['asn']} {as_name}",
+        "proxy": False,
+        "hosting": False,
+    }
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Jarayon ichidagi chegaralangan LRU kesh, har bir yozuvning o'z muddati bor"""
+
+    def __init__(self, maxsize, timer=time.monotonic):
+        self.maxsize = maxsize
+        self._timer = timer
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= self._timer():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (self._timer() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TieredGeoCache:
+    """
+    Ikki qavatli kesh: avval worker xotirasi (TTLCache), keyin Django cache orqali
+    barcha workerlar uchun umumiy qavat. None (topilmadi) natijalari qisqaroq
+    GEOIP_NEGATIVE_CACHE_TTL muddatga saqlanadi.
+    """
+
+    def __init__(self, name, maxsize):
+        self.name = name
+        self.local = TTLCache(maxsize)
+
+    def shared_key(self, key):
+        return f"geo:{self.name}:{key}"
+
+    def get_or_compute(self, key, compute):
+        value = self.local.get(key)
+        if value is not _MISSING:
+            geo_cache_requests.labels(cache=self.name, result="local_hit").inc()
+            return value
+
+        ttl = settings.GEOIP_CACHE_TTL
+        shared = cache.get(self.shared_key(key))
+        if shared is not None:
+            # Umumiy keshda qiymat {"value": ...} ichida saqlanadi, shunda None ham keshlanadi
+            geo_cache_requests.labels(cache=self.name, result="shared_hit").inc()
+            value = shared["value"]
+            self.local.set(key, value, ttl if value is not None else settings.GEOIP_NEGATIVE_CACHE_TTL)
+            return value
+
+        geo_cache_requests.labels(cache=self.name, result="miss").inc()
+        value = compute()
+        if value is None:
+            ttl = settings.GEOIP_NEGATIVE_CACHE_TTL
+        self.local.set(key, value, ttl)
+        cache.set(self.shared_key(key), {"value": value}, ttl)
+        return value
+
+    def clear(self):
+        self.local.clear()
+
+
+geolocation_cache = TieredGeoCache("geolocation", maxsize=10000)
+vpn_verdict_cache = TieredGeoCache("vpn_verdict", maxsize=10000)
+
+
+def parse_ip_api(data):
+    if data.get("status") == "fail":
+        return None
+    return {
+        "country": data.get("country", ""),
+        "countryCode": data.get("countryCode", ""),
+        "isp": data.get("isp", ""),
+        "org": data.get("org", ""),
+        "as": data.get("as", ""),
+        "proxy": data.get("proxy", False),
+        "hosting": data.get("hosting", False),
+    }
+
+
+def parse_ipapi_co(data):
+    if data.get("error"):
+        return None
+    return {
+        "country": data.get("country_name", ""),
+        "countryCode": data.get("country_code", ""),
+        "isp": data.get("org", ""),
+        "org": data.get("org", ""),
+        "as": str(data.get("asn", "")),
+        "proxy": data.get("proxy", False),
+        "hosting": data.get("hosting", False),
+    }
+
+
+def parse_ipwho_is(data):
+    if data.get("success") is False:
+        return None
+    connection = data.get("connection", {})
+    return {
+        "country": data.get("country", ""),
+        "countryCode": data.get("country_code", ""),
+        "isp": connection.get("isp", ""),
+        "org": connection.get("org", ""),
+        "as": str(connection.get("asn", "")),
+        "proxy": connection.get("proxy", False),
+        "hosting": connection.get("hosting", False),
+    }
+
+
+PROVIDER_PARSERS = {
+    "ip-api": parse_ip_api,
+    "ipapi.co": parse_ipapi_co,
+    "ipwho.is": parse_ipwho_is,
+}
+
+
+class CircuitBreaker:
+    """
+    Ketma-ket GEOIP_BREAKER_FAILURES marta xato bergan provayder GEOIP_BREAKER_RESET
+    soniya chaqirilmaydi, keyin bitta sinov so'rovi o'tkaziladi (half-open).
+    """
+
+    def __init__(self, timer=time.monotonic):
+        self._timer = timer
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    PROBE = "probe"
+
+    def allow(self):
+        """False, True yoki PROBE (half-open sinov so'rovi - natijasi yoki cancel_probe() kutiladi)"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._probing or self._timer() - self.opened_at < settings.GEOIP_BREAKER_RESET:
+                return False
+            self._probing = True
+            return self.PROBE
+
+    def cancel_probe(self):
+        # Sinov so'rovi navbatda turib bekor qilindi - natija bo'lmaydi, keyingi so'rov sinab ko'radi
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures, self.opened_at, self._probing = 0, None, False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.opened_at is not None or self.failures >= settings.GEOIP_BREAKER_FAILURES:
+                self.opened_at = self._timer()
+
+
+class GeoProvider:
+    def __init__(self, name, url, parser):
+        self.name = name
+        self.url = url
+        self.parser = parser
+        self.breaker = CircuitBreaker()
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def submit(self, ip, timeout):
+        """
+        So'rovni pool ga qo'yadi; breaker ochiq bo'lsa yoki deadline dan keyin ham davom etayotgan
+        so'rovlar GEOIP_PROVIDER_MAX_IN_FLIGHT ga yetgan bo'lsa None (sekin provayder pool ni to'ldirmaydi)
+        """
+        with self._lock:
+            if self.in_flight >= settings.GEOIP_PROVIDER_MAX_IN_FLIGHT:
+                return None
+            self.in_flight += 1
+        grant = self.breaker.allow()
+        if not grant:
+            self._release()
+            return None
+        future = _executor.submit(self._run, ip, timeout)
+        future.add_done_callback(lambda done: self._finished(done, grant))
+        return future
+
+    def _run(self, ip, timeout):
+        try:
+            return self.fetch(ip, timeout)
+        finally:
+            self._release()
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _finished(self, future, grant):
+        # Boshlanmasdan bekor qilingan so'rov: _run ishlamadi - joy va sinov huquqi shu yerda qaytariladi
+        if future.cancelled():
+            self._release()
+            if grant == CircuitBreaker.PROBE:
+                self.breaker.cancel_probe()
+
+    def fetch(self, ip, timeout):
+        try:
+            with geo_provider_latency.labels(provider=self.name).time():
+                response = requests.get(self.url.format(ip=ip), timeout=timeout)
+            response.raise_for_status()
+            result = self.parser(response.json())
+        except Exception:
+            # Kutilmagan javob shakli ham xato - aks holda half-open sinov natijasiz qolardi
+            self.breaker.record_failure()
+            return None
+        self.breaker.record_success()
+        return result
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="geo-provider")
+
+
+def get_providers():
+    """settings.GEOIP_PROVIDERS dan provayderlar; circuit breaker holati jarayon davomida saqlanadi"""
+    providers = []
+    with _providers_lock:
+        for config in settings.GEOIP_PROVIDERS:
+            key = (config["name"], config["url"], config["format"])
+            if key not in _providers:
+                _providers[key] = GeoProvider(config["name"], config["url"], PROVIDER_PARSERS[config["format"]])
+            providers.append(_providers[key])
+    return providers
+
+
+def fetch_geolocation(ip):
+    """
+    Barcha ochiq provayderlarga bir vaqtda so'rov yuboradi va birinchi yaroqli javobni
+    qaytaradi. Umumiy kutish GEOIP_PROVIDER_DEADLINE soniyadan oshmaydi.
+    """
+    deadline = settings.GEOIP_PROVIDER_DEADLINE
+    futures = [provider.submit(ip, deadline) for provider in get_providers()]
+    pending = {future for future in futures if future is not None}
+    ends_at = time.monotonic() + deadline
+    try:
+        while pending:
+            remaining = ends_at - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result is not None:
+                    return result
+    finally:
+        # Boshlanmaganlari bekor qilinadi, boshlanganlari o'z timeout i bilan tugaydi
+        for future in pending:
+            future.cancel()
+    return None
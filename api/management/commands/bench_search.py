@@ -0,0 +1,137 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from add_all.models import Add_departments, Add_movies
+from add_all.text import normalize
+from api.search import SuggestIndex, TrigramIndex, database_search
+
+CONSONANTS = ["", "b", "ch", "d", "f", "g", "h", "j", "k", "m", "n", "p", "r", "s", "sh", "t", "v", "y", "z"]
+VOWELS = ["a", "e", "i", "o", "u", "ai", "ou"]
+ENDINGS = ["", "", "", "n", "r", "x", "ng", "ki"]
+# Sintetik nomlarning bir qismi kirillcha yoziladi (normallashtirishni o'lchash uchun)
+TO_CYRILLIC = str.maketrans({
+    "a": "а", "b": "б", "d": "д", "e": "е", "f": "ф", "g": "г", "h": "ҳ", "i": "и", "j": "ж", "k": "к",
+    "m": "м", "n": "н", "o": "о", "p": "п", "r": "р", "s": "с", "t": "т", "u": "у", "v": "в", "x": "х",
+    "y": "й", "z": "з",
+})
+GENRES = ["Jangari", "Komediya", "Drama", "Fantastika", "Romantika", "Sport", "Detektiv", "Sarguzasht"]
+
+
+def make_word(rng):
+    syllables = [rng.choice(CONSONANTS) + rng.choice(VOWELS) for _ in range(rng.randint(2, 4))]
+    return "".join(syllables) + rng.choice(ENDINGS)
+
+
+def make_title(rng, vocabulary):
+    words = [rng.choice(vocabulary) for _ in range(rng.randint(1, 4))]
+    if rng.random() < 0.2:
+        words.append(f"{rng.randint(2, 5)}-fasl")
+    title = " ".join(words).title()
+    if rng.random() < 0.3:
+        title = title.lower().translate(TO_CYRILLIC).title()
+    return title
+
+
+class Command(BaseCommand):
+    help = (
+        "Qidiruvni sintetik katalogda o'lchaydi: eski icontains ORM so'rovi, trigram indeks va autocomplete. "
+        "Filmlar tranzaksiya ichida yaratiladi va oxirida bekor qilinadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--titles", type=int, default=50000)
+        parser.add_argument("--queries", type=int, default=200)
+
+    def handle(self, *args, **options):
+        rng = random.Random(7)
+        vocabulary = [make_word(rng) for _ in range(20000)]
+        titles = [make_title(rng, vocabulary) for _ in range(options["titles"])]
+        queries = []
+        for _ in range(options["queries"]):
+            title = rng.choice(titles).lower()
+            start = rng.randrange(len(title))
+            queries.append(title[start:start + rng.randint(3, 8)].strip() or title)
+
+        started = time.perf_counter()
+        for title in titles:
+            normalize(title)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"normalize: {len(titles) / elapsed:,.0f} nom/s ({elapsed / len(titles) * 1e6:.2f} µs/nom)"
+        )
+
+        with transaction.atomic():
+            department = Add_departments.objects.create(department_name="Benchmark", description="")
+            Add_movies.objects.bulk_create(
+                [
+                    Add_movies(
+                        add_departments=department, movies_name=title, movies_description="",
+                        country="Japan", genre=rng.choice(GENRES), count=rng.randint(0, 100000),
+                    )
+                    for title in titles
+                ],
+                batch_size=2000,
+            )
+
+            started = time.perf_counter()
+            index = TrigramIndex.build()
+            self.stdout.write(f"indeks qurish: {time.perf_counter() - started:.2f} s, {len(index.postings)} trigram")
+
+            def orm_search(query):
+                return list(
+                    Add_movies.objects.filter(Q(movies_name__icontains=query) | Q(movies_name__istartswith=query))
+                    .order_by("-latest_activity", "-id")
+                    .values_list("pk", flat=True)
+                )
+
+            def orm_key_search(query):
+                # Oldindan hisoblangan kalit: LOWER() va transliteratsiyasiz oddiy LIKE
+                return list(
+                    Add_movies.objects.filter(search_key__contains=normalize(query))
+                    .order_by("-latest_activity", "-id")
+                    .values_list("pk", flat=True)
+                )
+
+            backends = (
+                ("ORM icontains", orm_search),
+                ("ORM search_key", orm_key_search),
+                ("trigram indeks", index.search),
+                ("baza FTS", database_search.search),
+            )
+            for label, search in backends:
+                timings = []
+                for query in queries:
+                    started = time.perf_counter()
+                    search(query)
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                self.stdout.write(
+                    f"{label:15s} median {statistics.median(timings):7.3f} ms, "
+                    f"p99 {timings[int(len(timings) * 0.99) - 1]:7.3f} ms"
+                )
+
+            started = time.perf_counter()
+            suggest_index = SuggestIndex.build()
+            self.stdout.write(
+                f"suggest qurish: {time.perf_counter() - started:.2f} s, "
+                f"{len(suggest_index.keys)} kalit, {len(suggest_index.top)} tugun"
+            )
+            # Har bir tugma bosilishi: tasodifiy nomning 1..8 harfli prefikslari
+            for length in (1, 2, 3, 5, 8):
+                timings = []
+                for _ in range(options["queries"]):
+                    prefix = rng.choice(titles)[:length]
+                    started = time.perf_counter()
+                    suggest_index.suggest(prefix)
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                self.stdout.write(
+                    f"suggest {length} harf   median {statistics.median(timings):7.3f} ms, "
+                    f"p99 {timings[int(len(timings) * 0.99) - 1]:7.3f} ms"
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,100 @@
+import random
+import resource
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from add_all.models import Add_departments, Add_movies
+from api.similarity import FeatureMatrix, rebuild_similar_movies, update_similar_movies
+
+GENRES = [
+    "Jangari", "Komediya", "Drama", "Fantastika", "Romantika", "Sport", "Detektiv", "Sarguzasht",
+    "Triller", "Qo'rqinchli", "Tarixiy", "Musiqiy", "Maktab", "Mecha", "Isekai", "Psixologik",
+]
+COUNTRIES = ["Japan", "USA", "Korea", "China", "Uzbekistan", "Russia", "India", "France", "UK", "Turkey"]
+
+
+class Command(BaseCommand):
+    help = (
+        "O'xshash filmlar hisobini sintetik katalogda o'lchaydi: to'liq hisob, yozish, "
+        "bir nechta film o'zgargandagi yangilanish va so'rov vaqti. Hammasi oxirida bekor qilinadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--titles", type=int, default=100000)
+        parser.add_argument("--changed", type=int, default=20)
+        parser.add_argument("--skip-write", action="store_true", help="Faqat hisob (bazaga yozmasdan)")
+
+    def handle(self, *args, **options):
+        rng = random.Random(7)
+        with transaction.atomic():
+            departments = [
+                Add_departments.objects.create(department_name=f"Benchmark {i}", description="") for i in range(12)
+            ]
+            Add_movies.objects.bulk_create(
+                [
+                    Add_movies(
+                        add_departments=rng.choice(departments), movies_name=f"Film {i}", movies_description="",
+                        genre=", ".join(rng.sample(GENRES, rng.randint(1, 4))), country=rng.choice(COUNTRIES),
+                        year=str(rng.randint(1960, 2025)), count=rng.randint(0, 100000),
+                    )
+                    for i in range(options["titles"])
+                ],
+                batch_size=2000,
+            )
+
+            rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            started = time.perf_counter()
+            features = FeatureMatrix.load()
+            self.stdout.write(
+                f"matritsa: {len(features)} x {features.matrix.shape[1]}, "
+                f"{features.matrix.nbytes / 2**20:.1f} MiB, {time.perf_counter() - started:.2f} s"
+            )
+
+            started = time.perf_counter()
+            for _ in features.neighbours(range(len(features)), settings.SIMILAR_TOP_K):
+                pass
+            computed = time.perf_counter() - started
+            rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.stdout.write(
+                f"top-{settings.SIMILAR_TOP_K} hisob (chunk {settings.SIMILAR_CHUNK_SIZE}): {computed:.2f} s, "
+                f"{len(features) / computed:,.0f} film/s, max RSS +{(rss_after - rss_before) / 1024:.0f} MiB"
+            )
+            if options["skip_write"]:
+                transaction.set_rollback(True)
+                return
+
+            started = time.perf_counter()
+            rebuild_similar_movies(features)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"to'liq qayta qurish (hisob + yozish): {elapsed:.2f} s, yozish ~{elapsed - computed:.2f} s"
+            )
+
+            movies = list(Add_movies.objects.filter(add_departments__in=departments).order_by("?")[:options["changed"]])
+            for movie in movies:
+                movie.genre = ", ".join(rng.sample(GENRES, 2))
+                movie.save(update_fields=["genre"])
+            started = time.perf_counter()
+            updated = update_similar_movies()
+            self.stdout.write(
+                f"{len(movies)} film o'zgardi: {updated} film qayta hisoblandi, {time.perf_counter() - started:.2f} s"
+            )
+
+            sample = rng.sample(features.ids.tolist(), 200)
+            timings = []
+            for movie_id in sample:
+                started = time.perf_counter()
+                list(
+                    Add_movies.objects.filter(similar_to__movie_id=movie_id).select_related("add_departments")
+                    .order_by("similar_to__rank")[:settings.SIMILAR_TOP_K]
+                )
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"so'rov: median {statistics.median(timings):.3f} ms, p99 {timings[int(len(timings) * 0.99) - 1]:.3f} ms"
+            )
+            transaction.set_rollback(True)
@@ -0,0 +1,79 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.vpn import NetworkClassifier
+
+LEGACY_VPN_INDICATORS = [
+    'vpn', 'proxy', 'hosting', 'datacenter', 'server',
+    'expressvpn', 'nordvpn', 'surfshark', 'cyberghost',
+    'private internet access', 'windscribe', 'vyprvpn',
+    'ipvanish', 'hotspot shield', 'hide.me', 'purevpn',
+    'worldstream', 'digital ocean', 'amazon aws',
+    'google cloud', 'microsoft azure', 'linode', 'vultr',
+    'ovh', 'hetzner', 'alibaba cloud', 'tencent cloud',
+    'ibm cloud', 'oracle cloud'
+]
+LEGACY_TELECOM_INDICATORS = [
+    'uzbektelekom', 'uztelecom', 'ucell', 'beeline uz',
+    'mobiuz', 'ums', 'perfectum', 'uzmobile'
+]
+
+SAMPLE_NETWORKS = [
+    ("Uzbektelecom JSC", "AS8193 Uzbektelecom Joint-Stock Company"),
+    ("Unitel LLC", "AS41202 Unitel LLC"),
+    ("DigitalOcean, LLC", "AS14061 DigitalOcean, LLC"),
+    ("Hetzner Online GmbH", "AS24940 Hetzner Online GmbH"),
+    ("Comcast Cable Communications", "AS7922 Comcast Cable Communications, LLC"),
+    ("Deutsche Telekom AG", "AS3320 Deutsche Telekom AG"),
+    ("M247 Europe SRL", "AS9009 M247 Europe SRL"),
+]
+
+
+def legacy_check(geo_data, vpn_indicators=LEGACY_VPN_INDICATORS):
+    """Oldingi check_vpn_indicators: har bir nom uchta maydonda alohida 'in' bilan"""
+    isp = geo_data.get('isp', '').lower()
+    org = geo_data.get('org', '').lower()
+    as_info = geo_data.get('as', '').lower()
+    for indicator in vpn_indicators:
+        if indicator in isp or indicator in org or indicator in as_info:
+            return True
+    if geo_data.get('proxy') or geo_data.get('hosting'):
+        return True
+    for telecom in LEGACY_TELECOM_INDICATORS:
+        if telecom in isp or telecom in org or telecom in as_info:
+            return False
+    return False
+
+
+class Command(BaseCommand):
+    help = "VPN klassifikatorini oldingi substring tsikli bilan solishtiruvchi mikro-benchmark"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--samples", type=int, default=100000)
+        parser.add_argument(
+            "--extra-names", type=int, nargs="*", default=[0, 200, 1000],
+            help="Ro'yxatga qo'shiladigan sun'iy provayder nomlari soni (o'sishni ko'rish uchun)",
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        samples = []
+        for _ in range(options["samples"]):
+            isp, as_info = rng.choice(SAMPLE_NETWORKS)
+            samples.append({"isp": isp, "org": isp, "as": as_info, "proxy": False, "hosting": False})
+
+        for extra in options["extra_names"]:
+            names = LEGACY_VPN_INDICATORS + [f"hostco{i:04d} networks" for i in range(extra)]
+            classifier = NetworkClassifier(vpn=names, telecom=LEGACY_TELECOM_INDICATORS)
+            self.stdout.write(f"{len(names)} ta nom:")
+            for label, check in (
+                ("legacy loop", lambda g: legacy_check(g, names)),
+                ("compiled", lambda g: classifier.classify(g).is_vpn),
+            ):
+                started = time.perf_counter()
+                for geo_data in samples:
+                    check(geo_data)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"  {label:12s} {elapsed / len(samples) * 1e6:8.2f} us/call")
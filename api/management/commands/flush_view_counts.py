@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.counters import drain_view_deltas
+
+
+class Command(BaseCommand):
+    help = (
+        "Buferdagi ko'rishlarni (MovieViewDelta) Add_movies.count va soatlik trending bucketlariga "
+        "o'tkazadi. Odatda run_scheduler har VIEW_COUNT_FLUSH_INTERVAL soniyada chaqiradi."
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        updated = drain_view_deltas()
+        self.stdout.write(self.style.SUCCESS(
+            f"{updated} film ko'rishlari yozildi ({time.perf_counter() - started:.2f} s)"
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from add_all.fts import install_search_document, supports_search_document
+from api.search import reset_search_index
+
+
+class Command(BaseCommand):
+    help = "Full-text qidiruv hujjatini (FTS5 / tsvector) qayta yaratadi va triggerlarni tiklaydi"
+
+    def handle(self, *args, **options):
+        if not supports_search_document(connection):
+            self.stdout.write(self.style.WARNING(f"{connection.vendor} uchun full-text qidiruv yo'q"))
+        else:
+            install_search_document(connection, rebuild=True)
+            self.stdout.write(self.style.SUCCESS(f"{connection.vendor}: qidiruv hujjati qayta qurildi"))
+        # Xotiradagi indeks keyingi so'rovda qayta quriladi (shu process uchun)
+        reset_search_index()
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.similarity import FeatureMatrix, rebuild_similar_movies, update_similar_movies
+
+
+class Command(BaseCommand):
+    help = (
+        "O'xshash filmlar jadvalini (SimilarMovie) yangilaydi. Standart: faqat janr/davlat/yil/bo'lim "
+        "o'zgargan va yangi filmlar hamda ularga ta'sir qiladiganlar (run_scheduler har "
+        "SIMILAR_UPDATE_INTERVAL da chaqiradi). --full - hammasi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Barcha filmlar uchun qayta hisoblash")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        features = FeatureMatrix.load()
+        loaded = time.perf_counter() - started
+        if options["full"]:
+            updated = rebuild_similar_movies(features)
+        else:
+            updated = update_similar_movies(features)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(features)} film, matritsa {features.matrix.shape[1]} ustun ({loaded:.2f} s); "
+            f"{updated} film qo'shnilari yangilandi, jami {time.perf_counter() - started:.2f} s"
+        ))
@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import time
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.geo import IPRangeDatabase, read_ip2asn_rows
+
+
+class Command(BaseCommand):
+    help = "IP diapazonlar bazasini (iptoasn.com TSV) yuklab, GEOIP_DB_PATH ga kompilyatsiya qiladi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", default=None, help="URL yoki lokal TSV/.tsv.gz fayl")
+        parser.add_argument("--output", default=None)
+        parser.add_argument(
+            "--if-stale", action="store_true",
+            help="Baza GEOIP_REFRESH_INTERVAL ning yarmidan yangi bo'lsa yuklamaslik (entrypoint va run_scheduler)",
+        )
+
+    def handle(self, *args, **options):
+        source = options["source"] or settings.GEOIP_SOURCE_URL
+        output = options["output"] or settings.GEOIP_DB_PATH
+        if options["if_stale"]:
+            # Entrypoint hozirgina yuklagan bazani run_scheduler ning birinchi aylanishi qayta yuklamaydi
+            try:
+                age = time.time() - os.stat(output).st_mtime
+            except OSError:
+                age = None
+            if age is not None and age < settings.GEOIP_REFRESH_INTERVAL / 2:
+                self.stdout.write(f"{output} yangi ({age / 3600:.1f} soat), yuklanmadi")
+                return
+
+        if source.startswith(("http://", "https://")):
+            suffix = ".tsv.gz" if source.endswith(".gz") else ".tsv"
+            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+                try:
+                    with requests.get(source, stream=True, timeout=60) as response:
+                        response.raise_for_status()
+                        shutil.copyfileobj(response.raw, tmp)
+                except requests.RequestException as e:
+                    os.unlink(tmp.name)
+                    raise CommandError(f"Yuklab bo'lmadi: {e}")
+            path = tmp.name
+        else:
+            path = source
+
+        try:
+            v4, v6 = IPRangeDatabase.build(read_ip2asn_rows(path), output)
+        finally:
+            if path != source:
+                os.unlink(path)
+        self.stdout.write(self.style.SUCCESS(f"{output}: {v4} ta IPv4, {v6} ta IPv6 diapazon"))
@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+# (buyruq, oraliq sozlamasi soniyada - 0 yoki manfiy bo'lsa o'chirilgan, argumentlar)
+JOBS = [
+    ("flush_view_counts", "VIEW_COUNT_FLUSH_INTERVAL", ()),
+    ("update_trending", "TRENDING_UPDATE_INTERVAL", ()),
+    ("rebuild_similar_movies", "SIMILAR_UPDATE_INTERVAL", ()),
+    ("refresh_geoip", "GEOIP_REFRESH_INTERVAL", ("--if-stale",)),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Davriy ishlarni bitta processda bajaradi (docker-entrypoint.sh ishga tushiradi). "
+        "Deployment da faqat bitta nusxa ishlashi kerak - qolganlarida SCHEDULER_ENABLED=0."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Har bir ishni bir marta bajarib chiqish")
+
+    def handle(self, *args, **options):
+        next_run = {name: 0.0 for name, _, _ in JOBS}
+        while True:
+            for name, setting, args in JOBS:
+                interval = getattr(settings, setting)
+                if interval <= 0 or time.monotonic() < next_run[name]:
+                    continue
+                try:
+                    call_command(name, *args, stdout=self.stdout, stderr=self.stderr)
+                except Exception as e:
+                    # Bitta ishning xatosi qolganlarini to'xtatmasin - keyingi oraliqda qayta urinadi
+                    self.stderr.write(f"{name}: {e}")
+                finally:
+                    close_old_connections()
+                next_run[name] = time.monotonic() + interval
+            if options["once"]:
+                return
+            time.sleep(1)
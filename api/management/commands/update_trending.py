@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.trending import refresh_trending_scores, roll_up_buckets
+
+
+class Command(BaseCommand):
+    help = (
+        "Trending ballarini yangilaydi (run_scheduler har TRENDING_UPDATE_INTERVAL da chaqiradi): eski "
+        "soatlik ko'rish bucketlarini kunlikka yig'adi, muddati o'tganlarini o'chiradi va "
+        "Add_movies.trending_score ni qayta hisoblaydi."
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rolled, pruned = roll_up_buckets()
+        updated = refresh_trending_scores()
+        self.stdout.write(self.style.SUCCESS(
+            f"{rolled} soatlik bucket yig'ildi, {pruned} eski bucket o'chirildi, "
+            f"{updated} film balli yangilandi ({time.perf_counter() - started:.2f} s)"
+        ))
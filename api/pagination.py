@@ -0,0 +1,148 @@
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class FeedPagination(PageNumberPagination):
+    """
+    Ikki rejimli pagination:
+    - ?page=N      eski {'data', 'pagination'} javobi (COUNT bilan)
+    - ?cursor=...  keyset (cursor) rejimi, har bir sahifa narxi chuqurlikka bog'liq emas.
+      Bo'sh ?cursor= birinchi sahifani qaytaradi, COUNT faqat ?count=true bo'lsa hisoblanadi.
+    """
+    page_size = 16
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    cursor_ordering = ('-latest_activity', '-id')
+    # True bo'lsa ?page= rejimi yo'q, birinchi sahifa ham cursor rejimida
+    cursor_only = False
+    invalid_cursor_message = "Noto'g'ri cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.use_cursor = self.cursor_only or self.cursor_query_param in request.query_params
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request, queryset.model)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true'):
+            self.count = queryset.count()
+
+        ordering = self.cursor_ordering
+        if reverse:
+            ordering = tuple(f[1:] if f.startswith('-') else f'-{f}' for f in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(ordering, position))
+
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.page_items = results
+        return results
+
+    def keyset_filter(self, ordering, position):
+        """(a, b) > (x, y) shartini indeksdan foydalanadigan Q ko'rinishida quradi"""
+        condition = Q()
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            step = Q(**{f'{name}__{lookup}': position[index]})
+            for prev_field, prev_value in zip(ordering[:index], position[:index]):
+                step &= Q(**{prev_field.lstrip('-'): prev_value})
+            condition |= step
+        return condition
+
+    def get_position(self, obj):
+        return [getattr(obj, field.lstrip('-')) for field in self.cursor_ordering]
+
+    def encode_cursor(self, obj, reverse=False):
+        # DjangoJSONEncoder mikrosekundlarni kesadi, shuning uchun to'liq isoformat
+        payload = json.dumps(
+            {'p': self.get_position(obj), 'r': reverse},
+            default=lambda value: value.isoformat() if hasattr(value, 'isoformat') else str(value),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            position = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.cursor_ordering, payload['p'])
+            ]
+            if len(position) != len(self.cursor_ordering):
+                raise ValueError
+            return position, bool(payload.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return Response({
+                'data': data,
+                'pagination': {
+                    'count': self.page.paginator.count,
+                    'total_pages': self.page.paginator.count // self.page_size + 1,
+                    'current_page': self.page.number,
+                    'page_size': self.page_size,
+                    'next': self.get_next_link(),
+                    'previous': self.get_previous_link(),
+                },
+            })
+
+        next_cursor = previous_cursor = None
+        if self.page_items and self.has_next:
+            next_cursor = self.encode_cursor(self.page_items[-1])
+        if self.page_items and self.has_previous:
+            previous_cursor = self.encode_cursor(self.page_items[0], reverse=True)
+
+        pagination = {
+            'page_size': self.get_page_size(self.request),
+            'next_cursor': next_cursor,
+            'previous_cursor': previous_cursor,
+            'next': self.get_cursor_link(next_cursor),
+            'previous': self.get_cursor_link(previous_cursor),
+        }
+        if self.count is not None:
+            pagination['count'] = self.count
+        return Response({'data': data, 'pagination': pagination})
+
+
+class CommentPagination(FeedPagination):
+    page_size = 20
+    max_page_size = 50
+    # comment_movie_created_idx bo'yicha
+    cursor_ordering = ('-created_at', '-id')
+    cursor_only = True
+
+    def first_page(self, queryset):
+        """Detail javobi uchun birinchi sahifa va keyingi sahifa cursori (request siz)"""
+        items = list(queryset.order_by(*self.cursor_ordering)[:self.page_size + 1])
+        if len(items) > self.page_size:
+            return items[:self.page_size], self.encode_cursor(items[self.page_size - 1])
+        return items, None
@@ -0,0 +1,461 @@
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.dispatch import receiver
+
+from add_all.fts import FTS_TABLE, MOVIES_TABLE, supports_search_document
+from add_all.models import Add_departments, Add_movies, CatalogVersion, catalog_changed
+from add_all.text import normalize
+
+# Natija guruhlari: nom to'liq mos > nom shu bilan boshlanadi > so'z boshi > nom ichida > janrda > taxminiy
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING, GENRE, FUZZY = range(6)
+
+
+def word_trigrams(text):
+    """So'z chegaralari bilan trigramlar (pg_trgm kabi): "  n", " na", "nar", ..., "to " """
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def query_trigrams(query):
+    """
+    Substring qidiruv uchun: so'zning ichki trigramlari (so'z o'rtasidan ham topiladi).
+    3 harfdan qisqa so'zlar nomzodlarni cheklamaydi - ular oxirgi substring tekshiruvida
+    (so'z o'rtasida ham) solishtiriladi.
+    """
+    grams = set()
+    for word in query.split():
+        if len(word) >= 3:
+            grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    Film nomlari va janrlari bo'yicha xotiradagi trigram inverted index.
+    Nomzodlar eng kichik posting ro'yxatlaridan kesishma bilan olinadi, so'ng substring tekshiriladi.
+    """
+
+    def __init__(self, version=None):
+        self.version = version
+        self.postings = defaultdict(set)
+        self.docs = {}
+        self.lock = threading.RLock()
+        # Tez-tez takrorlanadigan (odatda qisqa, keng) so'rovlar natijasi; har qanday o'zgarishda tozalanadi
+        self.results = OrderedDict()
+
+    @classmethod
+    def build(cls, version=None):
+        index = cls(version)
+        rows = Add_movies.objects.order_by().values_list("pk", "search_key", "genre", "latest_activity")
+        for pk, name, genre, latest_activity in rows.iterator(chunk_size=5000):
+            index.add(pk, name, genre, latest_activity)
+        return index
+
+    def add(self, pk, name, genre, latest_activity):
+        """name - filmning search_key i (allaqachon normallashtirilgan)"""
+        with self.lock:
+            self.remove(pk)
+            genre = normalize(genre)
+            grams = word_trigrams(f"{name} {genre}")
+            activity = -latest_activity.timestamp() if latest_activity else 0.0
+            self.docs[pk] = (name, f" {name}", genre, activity, grams)
+            for gram in grams:
+                self.postings[gram].add(pk)
+
+    def remove(self, pk):
+        with self.lock:
+            self.results.clear()
+            doc = self.docs.pop(pk, None)
+            if doc is None:
+                return
+            for gram in doc[4]:
+                ids = self.postings.get(gram)
+                if ids is not None:
+                    ids.discard(pk)
+                    if not ids:
+                        del self.postings[gram]
+
+    def update_movies(self, movie_ids):
+        rows = Add_movies.objects.filter(pk__in=movie_ids).values_list(
+            "pk", "search_key", "genre", "latest_activity"
+        )
+        found = set()
+        with self.lock:
+            for pk, name, genre, latest_activity in rows:
+                found.add(pk)
+                self.add(pk, name, genre, latest_activity)
+            for pk in set(movie_ids) - found:
+                self.remove(pk)
+
+    def search(self, query, limit=None):
+        """Mos filmlar id lari, eng moslari birinchi (bir guruh ichida - oxirgi faollik bo'yicha)"""
+        query = normalize(query)
+        if not query:
+            return []
+        limit = limit or settings.SEARCH_MAX_RESULTS
+        with self.lock:
+            ids = self.results.get((query, limit))
+            if ids is not None:
+                self.results.move_to_end((query, limit))
+                return ids
+            ranked = self._substring_matches(query)
+            if not ranked and len(query) >= settings.SEARCH_FUZZY_MIN_LENGTH:
+                # Aniq moslik yo'q - ehtimol xato yozilgan
+                ranked = self._fuzzy_matches(query)
+            ids = [pk for _, _, pk in heapq.nsmallest(limit, ranked)]
+            self.results[(query, limit)] = ids
+            if len(self.results) > settings.SEARCH_RESULT_CACHE_SIZE:
+                self.results.popitem(last=False)
+        return ids
+
+    def _substring_matches(self, query):
+        grams = sorted(query_trigrams(query), key=lambda gram: len(self.postings.get(gram, ())))
+        if not grams:
+            # Faqat 1-2 harfli so'zlar: trigram yo'q, barcha nomlar tekshiriladi (natija keshlanadi)
+            candidates = self.docs.keys()
+        elif grams[0] not in self.postings:
+            return []
+        else:
+            candidates = set(self.postings[grams[0]])
+            for gram in grams[1:]:
+                candidates &= self.postings.get(gram, set())
+                if not candidates:
+                    return []
+
+        docs = self.docs
+        spaced_query = f" {query}"
+        ranked = []
+        for pk in candidates:
+            name, spaced_name, genre, activity, _ = docs[pk]
+            if query in name:
+                if name.startswith(query):
+                    group = EXACT if name == query else PREFIX
+                else:
+                    group = WORD_PREFIX if spaced_query in spaced_name else SUBSTRING
+            elif query in genre:
+                group = GENRE
+            else:
+                continue
+            ranked.append((group, activity, pk))
+        return ranked
+
+    def _fuzzy_matches(self, query):
+        """Xato yozilgan so'rovlar: so'rov trigramlarining kamida SEARCH_FUZZY_THRESHOLD qismi mos"""
+        grams = word_trigrams(query)
+        # Juda ko'p uchraydigan trigramlar (masalan "  t") ma'lumot bermaydi va sekin
+        common = max(500, len(self.docs) // 50)
+        scores = Counter()
+        for gram in grams:
+            ids = self.postings.get(gram, ())
+            if len(ids) <= common:
+                scores.update(ids)
+        needed = settings.SEARCH_FUZZY_THRESHOLD * len(grams)
+        return [
+            (FUZZY, -score / len(grams), pk)
+            for pk, score in scores.items()
+            if score >= needed
+        ]
+
+
+class DatabaseSearch:
+    """
+    Bazaning full-text qidiruvi (add_all/fts.py): SQLite FTS5 bm25 yoki PostgreSQL ts_rank,
+    ko'rishlar soni (count) bilan og'irlashtirilgan. Interfeysi TrigramIndex.search bilan bir xil.
+    """
+
+    # FTS5 ustunlari tartibida: nom (search_key), tavsif, janr, davlat
+    SQLITE_WEIGHTS = (10.0, 1.0, 4.0, 2.0)
+
+    def search(self, query, limit=None):
+        tokens = re.findall(r"\w+", normalize(query))
+        if not tokens or not supports_search_document(connection):
+            return []
+        limit = limit or settings.SEARCH_MAX_RESULTS
+        popularity = settings.SEARCH_POPULARITY_WEIGHT
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                # bm25 manfiy (kichigi yaxshiroq), mashhurlik uni yanada kichraytiradi
+                weights = ", ".join(str(weight) for weight in self.SQLITE_WEIGHTS)
+                cursor.execute(
+                    f"""
+                    SELECT m.id FROM {FTS_TABLE} f JOIN {MOVIES_TABLE} m ON m.id = f.rowid
+                    WHERE {FTS_TABLE} MATCH %s
+                    ORDER BY bm25({FTS_TABLE}, {weights}) * (1.0 + %s * LN(1 + m.count)), m.id DESC
+                    LIMIT %s
+                    """,
+                    [" ".join(f'"{token}"*' for token in tokens), popularity, limit],
+                )
+            else:
+                cursor.execute(
+                    f"""
+                    SELECT id FROM {MOVIES_TABLE}, to_tsquery('simple', %s) query
+                    WHERE search_document @@ query
+                    ORDER BY ts_rank(search_document, query) * (1.0 + %s * LN(1 + count)) DESC, id DESC
+                    LIMIT %s
+                    """,
+                    [" & ".join(f"{token}:*" for token in tokens), popularity, limit],
+                )
+            return [row[0] for row in cursor.fetchall()]
+
+
+database_search = DatabaseSearch()
+
+
+def get_search_backend():
+    """SEARCH_BACKEND: "memory" (trigram indeks, standart) yoki "database" (FTS5 / tsvector)"""
+    if settings.SEARCH_BACKEND == "database":
+        return database_search
+    return get_search_index()
+
+
+# Tartiblangan kalitlar ichida "shu prefiks bilan boshlanadiganlar" oralig'ining yuqori chegarasi
+MAX_CHAR = "\U0010ffff"
+
+
+def suggest_keys(search_key):
+    """Nomning o'zi va har bir so'zdan boshlanuvchi qismi: "naruto shippuden" -> + "shippuden" """
+    words = search_key.split()[:6]
+    return sorted({" ".join(words[start:]) for start in range(len(words))})
+
+
+class SuggestIndex:
+    """
+    Autocomplete uchun ixcham trie: tartiblangan kalitlar massivi (bisect) va katta
+    oraliqli prefikslar (tugunlar) uchun oldindan hisoblangan eng mashhur top-k filmlar.
+    """
+
+    def __init__(self, version=None):
+        self.version = version
+        self.keys = []
+        self.ids = []
+        self.names = {}
+        self.popularity = {}
+        self.movie_keys = {}
+        self.top = {}
+        self.lock = threading.RLock()
+
+    @classmethod
+    def build(cls, version=None):
+        index = cls(version)
+        entries = []
+        rows = Add_movies.objects.order_by().values_list("pk", "movies_name", "search_key", "count")
+        for pk, name, search_key, count in rows.iterator(chunk_size=5000):
+            index.names[pk] = name
+            index.popularity[pk] = count
+            index.movie_keys[pk] = suggest_keys(search_key)
+            entries.extend((key, pk) for key in index.movie_keys[pk])
+        entries.sort()
+        index.keys = [key for key, _ in entries]
+        index.ids = [pk for _, pk in entries]
+        index.precompute()
+        return index
+
+    def _range(self, prefix, lo=0, hi=None):
+        hi = len(self.keys) if hi is None else hi
+        lo = bisect.bisect_left(self.keys, prefix, lo, hi)
+        return lo, bisect.bisect_left(self.keys, prefix + MAX_CHAR, lo, hi)
+
+    def _top(self, lo, hi):
+        popularity = self.popularity
+        return heapq.nlargest(
+            settings.SUGGEST_TOP_K, set(self.ids[lo:hi]), key=lambda pk: (popularity[pk], pk)
+        )
+
+    def precompute(self):
+        """SUGGEST_SCAN_LIMIT dan katta har bir prefiks oralig'i uchun top-k ni saqlaydi"""
+        self.top = {}
+        stack = [("", 0, len(self.keys))]
+        while stack:
+            prefix, lo, hi = stack.pop()
+            if hi - lo <= settings.SUGGEST_SCAN_LIMIT:
+                continue
+            self.top[prefix] = self._top(lo, hi)
+            depth = len(prefix)
+            while lo < hi and len(self.keys[lo]) == depth:
+                lo += 1
+            while lo < hi:
+                child = prefix + self.keys[lo][depth]
+                child_lo, child_hi = self._range(child, lo, hi)
+                stack.append((child, child_lo, child_hi))
+                lo = child_hi
+
+    def suggest(self, query, limit=None):
+        """[(id, nomi), ...] - prefiks bilan boshlanadigan eng mashhur filmlar"""
+        query = normalize(query)
+        if not query:
+            return []
+        limit = min(limit or settings.SUGGEST_TOP_K, settings.SUGGEST_TOP_K)
+        with self.lock:
+            top = self.top.get(query)
+            if top is None:
+                lo, hi = self._range(query)
+                top = self._top(lo, hi)
+                if hi - lo > settings.SUGGEST_SCAN_LIMIT:
+                    # O'zgarishdan keyin bekor qilingan tugun - qayta saqlaymiz
+                    self.top[query] = top
+            return [(pk, self.names[pk]) for pk in top[:limit]]
+
+    def update_movies(self, movie_ids):
+        rows = {
+            pk: (name, search_key, count)
+            for pk, name, search_key, count in Add_movies.objects.filter(pk__in=movie_ids).values_list(
+                "pk", "movies_name", "search_key", "count"
+            )
+        }
+        with self.lock:
+            for pk in movie_ids:
+                self._remove(pk)
+                if pk in rows:
+                    self._add(pk, *rows[pk])
+
+    def _add(self, pk, name, search_key, count):
+        self.names[pk] = name
+        self.popularity[pk] = count
+        self.movie_keys[pk] = suggest_keys(search_key)
+        for key in self.movie_keys[pk]:
+            position = bisect.bisect_left(self.keys, key)
+            while position < len(self.keys) and self.keys[position] == key and self.ids[position] < pk:
+                position += 1
+            self.keys.insert(position, key)
+            self.ids.insert(position, pk)
+            self._invalidate(key)
+
+    def _remove(self, pk):
+        for key in self.movie_keys.pop(pk, ()):
+            position = bisect.bisect_left(self.keys, key)
+            while position < len(self.keys) and self.keys[position] == key:
+                if self.ids[position] == pk:
+                    del self.keys[position]
+                    del self.ids[position]
+                    break
+                position += 1
+            self._invalidate(key)
+        self.names.pop(pk, None)
+        self.popularity.pop(pk, None)
+
+    def _invalidate(self, key):
+        for length in range(len(key) + 1):
+            self.top.pop(key[:length], None)
+
+
+class CatalogIndexHolder:
+    """
+    Process uchun yagona indeks: worker so'rov qabul qilishidan oldin quriladi (gunicorn.conf.py,
+    warm_search_indexes), shu process'dagi o'zgarishlar catalog_changed orqali qo'shiladi.
+    Boshqa worker o'zgartirgan bo'lsa (versiya farqi) yoki max_age o'tsa SEARCH_INDEX_CHECK_INTERVAL
+    da bir tekshiriladi va fon oqimida qayta quriladi - shu vaqtgacha so'rovlar eski indeksdan javob
+    oladi. Indeks umuman bo'lmasagina (reset yoki warm ishlamagan) so'rov uni o'zi quradi.
+    """
+
+    def __init__(self, index_class, max_age_setting=None):
+        self.index_class = index_class
+        # Versiyasiz o'zgarishlar (masalan count) uchun davriy qayta qurish
+        self.max_age_setting = max_age_setting
+        self.index = None
+        self.lock = threading.Lock()
+        self.checked_at = 0.0
+        self.built_at = 0.0
+        self.rebuilding = None
+
+    def get(self):
+        now = time.monotonic()
+        index = self.index
+        if index is not None and now - self.checked_at < settings.SEARCH_INDEX_CHECK_INTERVAL:
+            return index
+        with self.lock:
+            if self.index is None:
+                self.index = self.index_class.build(CatalogVersion.current().version)
+                self.built_at = self.checked_at = time.monotonic()
+                return self.index
+            if now - self.checked_at < settings.SEARCH_INDEX_CHECK_INTERVAL:
+                return self.index
+            self.checked_at = now
+            version = CatalogVersion.current().version
+            max_age = getattr(settings, self.max_age_setting) if self.max_age_setting else None
+            expired = max_age is not None and now - self.built_at > max_age
+            if (self.index.version != version or expired) and self.rebuilding is None:
+                self.rebuilding = threading.Thread(
+                    target=self._rebuild_in_background, args=(version,),
+                    name=f"{self.index_class.__name__}-rebuild", daemon=True,
+                )
+                self.rebuilding.start()
+            return self.index
+
+    def rebuild(self, version):
+        # Versiya qurishdan oldin o'qilgan: qurish paytidagi o'zgarishlar keyingi tekshiruvda ko'rinadi
+        index = self.index_class.build(version)
+        with self.lock:
+            self.index = index
+            self.built_at = time.monotonic()
+
+    def _rebuild_in_background(self, version):
+        try:
+            self.rebuild(version)
+        except Exception:
+            # Eski indeks xizmat qilishda davom etadi, keyingi tekshiruvda qayta urinadi
+            pass
+        finally:
+            with self.lock:
+                self.rebuilding = None
+            connection.close()
+
+    def reset(self):
+        with self.lock:
+            self.index = None
+
+    def apply(self, sender, movie_ids, version):
+        index = self.index
+        if index is None:
+            return
+        if sender is Add_departments:
+            # Bo'lim nomi indekslarda yo'q
+            movie_ids = ()
+        elif movie_ids is None:
+            # Qaysi filmlar o'zgargani noma'lum - keyingi so'rovda fonda qayta quriladi
+            index.version = None
+            self.checked_at = 0.0
+            return
+        index.update_movies(movie_ids)
+        # Faqat ketma-ket versiya: oradagi boshqa worker o'zgarishi bo'lsa tekshiruvda qayta quriladi
+        if version is not None and index.version is not None and version == index.version + 1:
+            index.version = version
+
+
+search_index = CatalogIndexHolder(TrigramIndex)
+suggest_index = CatalogIndexHolder(SuggestIndex, max_age_setting="SUGGEST_REBUILD_INTERVAL")
+
+
+def get_search_index():
+    return search_index.get()
+
+
+def get_suggest_index():
+    return suggest_index.get()
+
+
+def warm_search_indexes():
+    """Worker ishga tushganda (gunicorn.conf.py): birinchi so'rov indeks qurilishini kutmasin"""
+    if settings.SEARCH_BACKEND != "database":
+        search_index.get()
+    suggest_index.get()
+
+
+def reset_search_index():
+    search_index.reset()
+    suggest_index.reset()
+
+
+@receiver(catalog_changed)
+def update_search_index(sender, movie_ids=None, version=None, **kwargs):
+    search_index.apply(sender, movie_ids, version)
+    suggest_index.apply(sender, movie_ids, version)
@@ -3,7 +3,7 @@ from django.core.validators import EmailValidator
 from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
-from add_all.models import Add_departments, Add_movies, Comment, MovieSeries, Notification, SavedFilm
+from add_all.models import Add_departments, Add_movies, Comment, MovieSeries, Notification, SavedFilm, get_reader_key
 from users.models import PasswordResetToken, User
 
 class LoginSerializer(serializers.Serializer):
@@ -100,7 +100,7 @@ class OptimizedMovieSeriesSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 class MovieListSerializer(serializers.ModelSerializer):
-    series_count = serializers.SerializerMethodField()
+    series_count = serializers.IntegerField(read_only=True)
     department_name = serializers.SerializerMethodField()
     
     class Meta:
@@ -112,9 +112,6 @@ class MovieListSerializer(serializers.ModelSerializer):
             'is_possible', 'movies_url'
         ]
     
-    def get_series_count(self, obj):
-        return obj.series.count()
-    
     def get_department_name(self, obj):
         return obj.add_departments.department_name if obj.add_departments else None
 
@@ -122,7 +119,10 @@ class MovieDetailSerializer(serializers.ModelSerializer):
     series = OptimizedMovieSeriesSerializer(many=True, read_only=True)
     like_count = serializers.IntegerField(read_only=True)
     dislike_count = serializers.IntegerField(read_only=True)
-    comments = OptimizedCommentSerializer(many=True, read_only=True, source='movie_comments')
+    # Faqat birinchi sahifa, qolgani /movies/<id>/comments/?cursor=comments_next_cursor orqali
+    comments = OptimizedCommentSerializer(many=True, read_only=True, source='comments_page')
+    comments_count = serializers.IntegerField(read_only=True)
+    comments_next_cursor = serializers.CharField(read_only=True, allow_null=True)
     department_name = serializers.SerializerMethodField()
     department_id = serializers.IntegerField(source='add_departments.id', read_only=True)
     is_possible = serializers.BooleanField(default=False)
@@ -133,7 +133,8 @@ class MovieDetailSerializer(serializers.ModelSerializer):
             'id', 'department_id', 'department_name', 'movies_preview_url',
             'movies_name', 'movies_description', 'movies_url', 'country', 
             'count', 'year', 'genre', 'all_series', 'created_at', 'series', 
-            'like_count', 'dislike_count', 'comments', 'is_possible', 'add_departments'
+            'like_count', 'dislike_count', 'comments', 'comments_count', 'comments_next_cursor',
+            'is_possible', 'add_departments'
         ]
         extra_kwargs = {
             'add_departments': {'write_only': True}  # Faqat yozish uchun
@@ -173,7 +174,7 @@ class OptimizedSavedFilmSerializer(serializers.ModelSerializer):
     country = serializers.CharField(source='film.country')
     all_series = serializers.CharField(source='film.all_series')
     count = serializers.IntegerField(source='film.count')
-    series_count = serializers.SerializerMethodField()
+    series_count = serializers.IntegerField(source='film.series_count')
     department_name = serializers.SerializerMethodField()
     
     class Meta:
@@ -183,9 +184,6 @@ class OptimizedSavedFilmSerializer(serializers.ModelSerializer):
             'movies_name', 'country', 'all_series', 'count', 'series_count', 'saved_at'
         ]
     
-    def get_series_count(self, obj):
-        return obj.film.series.count()
-    
     def get_department_name(self, obj):
         return obj.film.add_departments.department_name if obj.film.add_departments else None
 
@@ -200,11 +198,10 @@ class NotificationSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         if not request:
             return False
-        if request.user.is_authenticated:
-            return obj.read_by.filter(id=request.user.id).exists()
-        else:
-            ip = obj.get_client_ip(request)
-            return ip and ip in obj.read_by_ips
+        if "read_ids" in self.context:
+            # Ro'yxatda bitta so'rov bilan aniqlangan (NotificationListView)
+            return obj.pk <= self.context["watermark"] or obj.pk in self.context["read_ids"]
+        return obj.is_read_by(get_reader_key(request))
 
 class PasswordResetRequestSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -264,7 +261,7 @@ class DepartmentMoviesSerializer(serializers.ModelSerializer):
     dmdnme = serializers.SerializerMethodField()
     dmnme = serializers.CharField(source='movies_name')
     dmimage = serializers.SerializerMethodField()
-    dmscnt = serializers.SerializerMethodField()
+    dmscnt = serializers.IntegerField(source="series_count")
     dmcnt = serializers.IntegerField(source="count")
     dmcont = serializers.CharField(source="country")
     dmllsrs = serializers.CharField(source="all_series")
@@ -293,9 +290,6 @@ class DepartmentMoviesSerializer(serializers.ModelSerializer):
     def get_dmimage(self, obj):
         return obj.movies_preview_url
     
-    def get_dmscnt(self, obj):
-        return obj.series.count() if hasattr(obj, 'series') else 0
-    
     def get_department_id(self, obj):  # Yangi metod
         return obj.add_departments.id if obj.add_departments else None
     
@@ -327,7 +321,7 @@ class HomeMoviesSerializer(serializers.ModelSerializer):
     hfsdindx = serializers.SerializerMethodField()
     hfsnme = serializers.CharField(source='movies_name')
     hfsimage = serializers.SerializerMethodField()
-    hfsscnt = serializers.SerializerMethodField()
+    hfsscnt = serializers.IntegerField(source="series_count")
     hfscnt = serializers.IntegerField(source="count")
     hfscont = serializers.CharField(source="country")
     hfsllsrs = serializers.CharField(source="all_series")
@@ -355,9 +349,6 @@ class HomeMoviesSerializer(serializers.ModelSerializer):
     
     def get_hfsimage(self, obj):
         return obj.movies_preview_url
-    
-    def get_hfsscnt(self, obj):
-        return obj.series.count() if hasattr(obj, 'series') else 0
 
 class DepartmentsSerializer(ModelSerializer):
     movies = serializers.SerializerMethodField()
@@ -386,7 +377,7 @@ class TrailersSerializer(serializers.ModelSerializer):
     tdindx = serializers.SerializerMethodField()
     tnme = serializers.CharField(source='movies_name')
     timage = serializers.SerializerMethodField()
-    tscnt = serializers.SerializerMethodField()
+    tscnt = serializers.IntegerField(source="series_count")
     tcnt = serializers.IntegerField(source="count")
     tcont = serializers.CharField(source="country")
     tllsrs = serializers.CharField(source="all_series")
@@ -413,14 +404,11 @@ class TrailersSerializer(serializers.ModelSerializer):
     
     def get_timage(self, obj):
         return obj.movies_preview_url
-    
-    def get_tscnt(self, obj):
-        return obj.series.count() if hasattr(obj, 'series') else 0
 
 class MovieSearchSerializer(serializers.ModelSerializer):
     department_name = serializers.SerializerMethodField()
     department_id = serializers.IntegerField(source='add_departments.id')
-    series_count = serializers.SerializerMethodField()  # ✅ series_count qo'shildi
+    series_count = serializers.IntegerField(read_only=True)  # ✅ series_count qo'shildi
     
     class Meta:
         model = Add_movies
@@ -441,15 +429,12 @@ class MovieSearchSerializer(serializers.ModelSerializer):
     def get_department_name(self, obj):
         return obj.add_departments.department_name if obj.add_departments else None
     
-    def get_series_count(self, obj):
-        return obj.series.count() if hasattr(obj, 'series') else 0
-    
 class AllMoviesSerializer(serializers.ModelSerializer):
     aldnme = serializers.SerializerMethodField()
     aldindx = serializers.SerializerMethodField()
     alnme = serializers.CharField(source='movies_name')
     alimage = serializers.SerializerMethodField()
-    alscnt = serializers.SerializerMethodField()
+    alscnt = serializers.IntegerField(source="series_count")
     alcnt = serializers.IntegerField(source="count")
     alcont = serializers.CharField(source="country")
     alllsrs = serializers.CharField(source="all_series")
@@ -476,6 +461,3 @@ class AllMoviesSerializer(serializers.ModelSerializer):
     
     def get_alimage(self, obj):
         return obj.movies_preview_url
-    
-    def get_alscnt(self, obj):
-        return obj.series.count() if hasattr(obj, 'series') else 0
\ No newline at end of file
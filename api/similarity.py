@@ -0,0 +1,232 @@
+"""
+O'xshash filmlar: har bir film janr, bo'lim, davlat va yil bo'yicha vektorga aylantiriladi,
+kosinus o'xshashlik bo'yicha top-k qo'shnilar bo'laklab (xotira chegaralangan) hisoblanib
+SimilarMovie jadvaliga yoziladi. So'rov vaqtida faqat shu jadvaldan o'qiladi.
+"""
+import hashlib
+import re
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+
+from add_all.models import Add_movies, SimilarityState, SimilarMovie
+from add_all.text import normalize, split_genres
+
+# Har bir belgi blokining og'irligi (blok normasi sqrt(og'irlik) bo'ladi)
+FEATURE_WEIGHTS = {"genre": 3.0, "department": 2.0, "country": 1.0, "year": 1.0}
+YEAR_BUCKET = 5
+# Bir xil o'xshashlikdagi filmlar orasida mashhurrog'i oldinda (ballga deyarli ta'sir qilmaydi)
+POPULARITY_TIEBREAK = 1e-4
+
+
+def genre_tokens(genre):
+    return sorted(normalize(name) for name in split_genres(genre))
+
+
+def parse_year(year):
+    match = re.search(r"\d{4}", year or "")
+    return int(match.group()) if match else None
+
+
+def feature_key(genre, country, year, department_id):
+    return genre_tokens(genre), normalize(country), parse_year(year), department_id
+
+
+def fingerprint(key):
+    return hashlib.md5(repr(key).encode()).hexdigest()
+
+
+class FeatureMatrix:
+    """Barcha filmlarning L2-normallangan belgi matritsasi (float32, n x d)"""
+
+    def __init__(self, rows):
+        # rows: (pk, genre, country, year, department_id, count)
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        keys = [feature_key(*row[1:5]) for row in rows]
+        self.fingerprints = [fingerprint(key) for key in keys]
+        self.position = {pk: i for i, pk in enumerate(self.ids.tolist())}
+
+        genres, countries, departments, buckets = {}, {}, {}, {}
+        for tokens, country, year, department_id in keys:
+            for token in tokens:
+                genres.setdefault(token, len(genres))
+            if country:
+                countries.setdefault(country, len(countries))
+            if year is not None:
+                buckets.setdefault(year // YEAR_BUCKET, None)
+            departments.setdefault(department_id, len(departments))
+        low = min(buckets, default=0)
+        offsets = {"genre": 0}
+        offsets["country"] = offsets["genre"] + len(genres)
+        offsets["department"] = offsets["country"] + len(countries)
+        offsets["year"] = offsets["department"] + len(departments)
+        # Qo'shni yil oraliqlari ham yarim og'irlik bilan: 2019 va 2021 o'xshash
+        width = max(buckets, default=0) - low + 3
+        self.matrix = np.zeros((len(rows), offsets["year"] + width), dtype=np.float32)
+
+        weight = {name: np.sqrt(value) for name, value in FEATURE_WEIGHTS.items()}
+        year_spread = ((-1, 0.5), (0, 1.0), (1, 0.5))
+        year_norm = np.sqrt(sum(share * share for _, share in year_spread))
+        cells, values = ([], []), []
+        for i, (tokens, country, year, department_id) in enumerate(keys):
+            for token in tokens:
+                cells[0].append(i)
+                cells[1].append(offsets["genre"] + genres[token])
+                values.append(weight["genre"] / np.sqrt(len(tokens)))
+            if country:
+                cells[0].append(i)
+                cells[1].append(offsets["country"] + countries[country])
+                values.append(weight["country"])
+            cells[0].append(i)
+            cells[1].append(offsets["department"] + departments[department_id])
+            values.append(weight["department"])
+            if year is not None:
+                for shift, share in year_spread:
+                    cells[0].append(i)
+                    cells[1].append(offsets["year"] + year // YEAR_BUCKET - low + 1 + shift)
+                    values.append(weight["year"] * share / year_norm)
+        self.matrix[cells] = values
+        norms = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        self.matrix /= np.maximum(norms, 1e-12)
+
+        counts = np.array([row[5] for row in rows], dtype=np.float64)
+        order = counts.argsort(kind="stable")
+        tiebreak = np.empty(len(rows), dtype=np.float32)
+        tiebreak[order] = np.arange(len(rows), dtype=np.float32) / max(len(rows), 1)
+        self.tiebreak = tiebreak * POPULARITY_TIEBREAK
+
+    @classmethod
+    def load(cls):
+        rows = Add_movies.objects.order_by("pk").values_list(
+            "pk", "genre", "country", "year", "add_departments_id", "count"
+        )
+        return cls(list(rows.iterator(chunk_size=5000)))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def neighbours(self, positions, k):
+        """
+        [(pozitsiya, [(qo'shni pozitsiyasi, ball), ...]), ...] SIMILAR_CHUNK_SIZE lik bo'laklarda:
+        bir vaqtda faqat chunk x n o'lchamli ballar matritsasi xotirada
+        """
+        k = min(k, len(self) - 1)
+        if k <= 0:
+            for position in positions:
+                yield position, []
+            return
+        chunk_size = settings.SIMILAR_CHUNK_SIZE
+        for start in range(0, len(positions), chunk_size):
+            chunk = np.asarray(positions[start:start + chunk_size])
+            scores = self.matrix[chunk] @ self.matrix.T
+            scores += self.tiebreak
+            scores[np.arange(len(chunk)), chunk] = -np.inf
+            # Joyida manfiy qilamiz: argpartition uchun yana bir chunk x n nusxa kerak bo'lmaydi
+            np.negative(scores, out=scores)
+            top = np.argpartition(scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(top_scores, axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = -np.take_along_axis(top_scores, order, axis=1) - self.tiebreak[top]
+            for row, position in enumerate(chunk.tolist()):
+                yield position, [
+                    (column, score)
+                    for column, score in zip(top[row].tolist(), top_scores[row].tolist())
+                    if score > 1e-6
+                ]
+
+    def best_score_against(self, positions):
+        """Har bir film uchun berilgan filmlarga eng yuqori o'xshashligi (o'zi bilan emas)"""
+        best = np.zeros(len(self), dtype=np.float32)
+        chunk_size = settings.SIMILAR_CHUNK_SIZE
+        for start in range(0, len(positions), chunk_size):
+            chunk = np.asarray(positions[start:start + chunk_size])
+            scores = self.matrix @ self.matrix[chunk].T
+            scores[chunk, np.arange(len(chunk))] = 0
+            np.maximum(best, scores.max(axis=1), out=best)
+        return best
+
+
+INSERT_NEIGHBOUR = "INSERT INTO {} ({}) VALUES (%s, %s, %s, %s)".format(
+    connection.ops.quote_name(SimilarMovie._meta.db_table),
+    ", ".join(connection.ops.quote_name(column) for column in ("movie_id", "similar_id", "rank", "score")),
+)
+
+
+def store_neighbours(features, results):
+    """Natijalarni bo'lak-bo'lak yozadi: har bo'lak o'z tranzaksiyasida, eski qatorlar almashtiriladi"""
+    written = 0
+    batch = []
+    k = settings.SIMILAR_TOP_K
+
+    def flush():
+        movie_ids = [int(features.ids[position]) for position, _ in batch]
+        rows, states = [], []
+        for position, neighbours in batch:
+            movie_id = int(features.ids[position])
+            rows.extend(
+                (movie_id, int(features.ids[column]), rank, score)
+                for rank, (column, score) in enumerate(neighbours)
+            )
+            states.append(SimilarityState(
+                movie_id=movie_id,
+                fingerprint=features.fingerprints[position],
+                min_score=neighbours[-1][1] if len(neighbours) >= k else 0.0,
+            ))
+        with transaction.atomic():
+            SimilarMovie.objects.filter(movie_id__in=movie_ids).delete()
+            # Har filmga SIMILAR_TOP_K qator - model obyektlarisiz to'g'ridan-to'g'ri INSERT ancha tez
+            with connection.cursor() as cursor:
+                cursor.executemany(INSERT_NEIGHBOUR, rows)
+            SimilarityState.objects.bulk_create(
+                states, batch_size=2000, update_conflicts=True,
+                unique_fields=["movie"], update_fields=["fingerprint", "min_score"],
+            )
+        batch.clear()
+
+    for item in results:
+        batch.append(item)
+        written += 1
+        if len(batch) >= settings.SIMILAR_WRITE_BATCH:
+            flush()
+    if batch:
+        flush()
+    return written
+
+
+def rebuild_similar_movies(features=None):
+    features = features or FeatureMatrix.load()
+    return store_neighbours(features, features.neighbours(range(len(features)), settings.SIMILAR_TOP_K))
+
+
+def update_similar_movies(features=None):
+    """
+    Faqat belgilari o'zgargan (yoki yangi) filmlar va ularga ta'sir qiladigan filmlar qayta hisoblanadi:
+    o'zgargan filmni ro'yxatida saqlaganlar va o'zgargan film endi ro'yxatiga kirishi mumkin bo'lganlar.
+    """
+    features = features or FeatureMatrix.load()
+    stored = dict(SimilarityState.objects.values_list("movie_id", "fingerprint"))
+    changed, stale = [], []
+    for position, pk in enumerate(features.ids.tolist()):
+        if stored.get(pk) == "":
+            # Qo'shnisi o'chirilgan (add_all/signals.py) - faqat o'z ro'yxati to'ldiriladi
+            stale.append(position)
+        elif stored.get(pk) != features.fingerprints[position]:
+            changed.append(position)
+    if len(changed) > len(features) // 10:
+        return rebuild_similar_movies(features)
+    affected = set(changed) | set(stale)
+    if not changed:
+        return store_neighbours(features, features.neighbours(sorted(affected), settings.SIMILAR_TOP_K))
+
+    changed_ids = features.ids[changed].tolist()
+    listing = SimilarMovie.objects.filter(similar_id__in=changed_ids).values_list("movie_id", flat=True)
+    affected.update(features.position[pk] for pk in listing.distinct() if pk in features.position)
+    min_scores = np.zeros(len(features), dtype=np.float32)
+    for pk, min_score in SimilarityState.objects.values_list("movie_id", "min_score"):
+        if pk in features.position:
+            min_scores[features.position[pk]] = min_score
+    best = features.best_score_against(changed)
+    affected.update(np.flatnonzero(best > min_scores).tolist())
+    return store_neighbours(features, features.neighbours(sorted(affected), settings.SIMILAR_TOP_K))
@@ -1,11 +1,51 @@
-from datetime import timedelta
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from datetime import timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import SystemCheckError
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import OperationalError, connection, models
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
 
-from add_all.models import Notification
+from add_all.fts import FTS_TABLE
+from add_all.models import (
+    Add_departments, Add_movies, CatalogVersion, Comment, LikeDislike, MovieSeries, MovieViewBucket, MovieViewDelta,
+    Notification, NotificationRead, NotificationVersion, NotificationWatermark, SavedFilm, SimilarityState,
+    SimilarMovie, catalog_changed,
+)
+from api.counters import drain_view_deltas, hour_start
+from api.geo import (
+    CircuitBreaker,
+    GeoProvider,
+    IPRangeDatabase,
+    TTLCache,
+    fetch_geolocation,
+    geolocation_cache,
+    vpn_verdict_cache,
+)
+from api.similarity import rebuild_similar_movies, update_similar_movies
+from api.trending import refresh_trending_scores, roll_up_buckets
+from api.search import (
+    CatalogIndexHolder, get_search_backend, get_search_index, get_suggest_index, reset_search_index, search_index,
+)
+from api.views import (
+    CreateVote, GetVotes, NotificationListView, NotificationViewUpdate, UnreadNotificationCount,
+)
+from api.vpn import NetworkClassifier, get_classifier
 from users.models import PasswordResetToken, User
 
 
@@ -108,3 +148,1245 @@ class NotificationTests(TestCase):
     def test_unread_count(self):
         response = self.client.get(reverse("unread-notification-count"))
         self.assertEqual(response.status_code, 200)
+
+
+class FeedOrderingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        department = Add_departments.objects.create(department_name="Anime", description="")
+        now = timezone.now()
+        self.old = Add_movies.objects.create(
+            add_departments=department, movies_name="Old", movies_description="",
+            country="Japan", created_at=now - timedelta(days=30),
+        )
+        self.new = Add_movies.objects.create(
+            add_departments=department, movies_name="New", movies_description="",
+            country="Japan", created_at=now - timedelta(days=1),
+        )
+
+    def test_new_series_moves_movie_to_top(self):
+        response = self.client.get(reverse("home-movies"))
+        self.assertEqual([m["id"] for m in response.json()["data"]], [self.new.id, self.old.id])
+
+        MovieSeries.objects.create(movie=self.old, title="2", video_url="x")
+        response = self.client.get(reverse("home-movies"))
+        self.assertEqual([m["id"] for m in response.json()["data"]], [self.old.id, self.new.id])
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        department = Add_departments.objects.create(department_name="Anime", description="")
+        now = timezone.now()
+        self.movies = [
+            Add_movies.objects.create(
+                add_departments=department, movies_name=f"Movie {i}", movies_description="",
+                country="Japan", created_at=now - timedelta(hours=i // 2),
+            )
+            for i in range(7)
+        ]
+        self.expected = [
+            m.id for m in sorted(self.movies, key=lambda m: (m.latest_activity, m.id), reverse=True)
+        ]
+
+    def test_page_number_envelope_is_kept(self):
+        response = self.client.get(reverse("all-movies"), {"page": 1})
+        body = response.json()
+        self.assertEqual(body["pagination"]["count"], 7)
+        self.assertEqual([m["id"] for m in body["data"]], self.expected)
+
+    def test_cursor_walks_forward_and_back(self):
+        seen, pages = [], []
+        params = {"cursor": "", "page_size": 3}
+        while True:
+            with CaptureQueriesContext(connection) as ctx:
+                body = self.client.get(reverse("all-movies"), params).json()
+            movie_queries = [q["sql"] for q in ctx.captured_queries if 'FROM "add_all_add_movies"' in q["sql"]]
+            self.assertEqual(len(movie_queries), 1)
+            self.assertNotIn("OFFSET", movie_queries[0])
+            self.assertNotIn("count", body["pagination"])
+            pages.append(body)
+            seen += [m["id"] for m in body["data"]]
+            if not body["pagination"]["next_cursor"]:
+                break
+            params["cursor"] = body["pagination"]["next_cursor"]
+        self.assertEqual(seen, self.expected)
+
+        previous = pages[-1]["pagination"]["previous_cursor"]
+        body = self.client.get(reverse("all-movies"), {"cursor": previous, "page_size": 3}).json()
+        self.assertEqual([m["id"] for m in body["data"]], [m["id"] for m in pages[-2]["data"]])
+
+    def test_cursor_count_is_optional(self):
+        body = self.client.get(reverse("all-movies"), {"cursor": "", "count": "true"}).json()
+        self.assertEqual(body["pagination"]["count"], 7)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("all-movies"), {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 404)
+
+
+class SeriesCountQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.department = Add_departments.objects.create(department_name="Anime", description="")
+
+    def add_movies(self, total):
+        for i in range(total):
+            movie = Add_movies.objects.create(
+                add_departments=self.department, movies_name=f"Movie {i}",
+                movies_description="", country="Japan",
+            )
+            MovieSeries.objects.create(movie=movie, title="1", video_url="x")
+
+    def feed_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            body = self.client.get(reverse("home-movies")).json()
+        self.assertTrue(all(m["hfsscnt"] == 1 for m in body["data"]))
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        self.add_movies(2)
+        small = self.feed_queries()
+        self.add_movies(10)
+        self.assertEqual(self.feed_queries(), small)
+
+
+class FeedQueryCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_search_index()
+        self.department = Add_departments.objects.create(department_name="Anime", description="")
+        trailers = Add_departments.objects.create(department_name="Treylerlar", description="")
+        for i in range(5):
+            for department in (self.department, trailers):
+                Add_movies.objects.create(
+                    add_departments=department, movies_name=f"Naruto {i}",
+                    movies_description="long text", movies_url="x" * 1000, country="Japan",
+                )
+
+    def assertFeedQueries(self, url, expected, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), expected, [q["sql"] for q in ctx.captured_queries])
+        for query in ctx.captured_queries:
+            self.assertNotIn("movies_url", query["sql"])
+            self.assertNotIn("movies_description", query["sql"])
+
+    def test_list_feeds_run_one_select(self):
+        # katalog versiyasi + bitta SELECT
+        self.assertFeedQueries(reverse("swiper-movies"), 2)
+        self.assertFeedQueries(reverse("home-movies"), 2)
+        self.assertFeedQueries(reverse("trailers"), 2)
+        # qidiruv: indeks qurilgandan keyin faqat id__in SELECT
+        self.client.get(reverse("movie-search"), {"q": "x"})
+        self.assertFeedQueries(reverse("movie-search"), 1, {"q": "naruto"})
+
+    def test_paginated_feeds(self):
+        department_url = f"/watch-anime/api/departments/{self.department.id}/movies/"
+        # page rejimi: COUNT + SELECT, cursor rejimi: faqat SELECT
+        # (all-movies da yana katalog versiyasi - ETag uchun)
+        self.assertFeedQueries(reverse("all-movies"), 3)
+        self.assertFeedQueries(reverse("all-movies"), 2, {"cursor": ""})
+        self.assertFeedQueries(department_url, 2)
+        self.assertFeedQueries(department_url, 1, {"cursor": ""})
+
+
+class FacetFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        anime = Add_departments.objects.create(department_name="Anime", description="")
+        trailers = Add_departments.objects.create(department_name="Treylerlar", description="")
+        for department, name, genre, year, country in [
+            (anime, "Naruto", "Jangari, Sarguzasht", "2002", "Japan"),
+            (anime, "Bleach", "jangari", "2004", "Japan"),
+            (anime, "Clannad", "Drama", "2007", "Japan"),
+            (anime, "Arcane", "Jangari, Drama", "2021", "USA"),
+            (trailers, "Naruto treyler", "Jangari", "2002", "Japan"),
+        ]:
+            Add_movies.objects.create(
+                add_departments=department, movies_name=name, movies_description="",
+                genre=genre, year=year, country=country,
+            )
+
+    def get(self, **params):
+        response = self.client.get(reverse("all-movies"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_filters(self):
+        names = lambda data: sorted(movie["alnme"] for movie in data["data"])
+        self.assertEqual(names(self.get(genre="JANGARI")), ["Arcane", "Bleach", "Naruto"])
+        self.assertEqual(names(self.get(genre="Жангари", country="Japan")), ["Bleach", "Naruto"])
+        self.assertEqual(names(self.get(year="2007", cursor="")), ["Clannad"])
+        self.assertNotIn("facets", self.get(genre="drama"))
+
+    def test_facets_exclude_own_dimension_and_are_cached(self):
+        facets = self.get(country="Japan", facets="true")["facets"]
+        self.assertEqual(facets["genre"], [
+            {"value": "jangari", "name": "Jangari", "count": 2},
+            {"value": "drama", "name": "Drama", "count": 1},
+            {"value": "sarguzasht", "name": "Sarguzasht", "count": 1},
+        ])
+        # davlat bo'yicha hisob davlat filtrisiz (treylerlar hisobga olinmaydi)
+        self.assertEqual(facets["country"], [{"value": "Japan", "count": 3}, {"value": "USA", "count": 1}])
+        self.assertEqual([row["value"] for row in facets["year"]], ["2002", "2004", "2007"])
+
+        # keshdan: COUNT + SELECT + katalog versiyasi
+        with self.assertNumQueries(3):
+            self.get(country="Japan", facets="true")
+
+        Add_movies.objects.filter(movies_name="Clannad").update(genre="Jangari")
+        facets = self.get(country="Japan", facets="true")["facets"]
+        self.assertEqual(facets["genre"][0], {"value": "jangari", "name": "Jangari", "count": 3})
+
+
+class TrendingTests(TestCase):
+    def setUp(self):
+        department = Add_departments.objects.create(department_name="Anime", description="")
+        self.old_hit, self.new_hit = [
+            Add_movies.objects.create(
+                add_departments=department, movies_name=name, movies_description="", country="Japan", count=count,
+            )
+            for name, count in [("Naruto", 100000), ("Frieren", 10)]
+        ]
+        self.now = timezone.now()
+
+    def add_views(self, movie, hours_ago, views, span_hours=1):
+        MovieViewBucket.objects.create(
+            movie=movie, bucket=hour_start(self.now - timedelta(hours=hours_ago)), views=views, span_hours=span_hours,
+        )
+
+    def test_views_are_buffered_into_hourly_buckets(self):
+        for _ in range(3):
+            self.client.post(f"/watch-anime/api/movies/{self.new_hit.id}/increment-count/")
+        self.assertFalse(MovieViewBucket.objects.exists())
+        drain_view_deltas()
+        bucket = MovieViewBucket.objects.get()
+        self.assertEqual((bucket.movie_id, bucket.views), (self.new_hit.id, 3))
+        self.assertEqual(bucket.bucket.minute, 0)
+
+        # Oldingi soatdan kechikib yig'ilgan ko'rish o'z soatiga tushadi
+        MovieViewDelta.objects.create(movie=self.new_hit, views=2, created_at=self.now - timedelta(hours=1))
+        self.client.post(f"/watch-anime/api/movies/{self.new_hit.id}/increment-count/")
+        drain_view_deltas()
+        self.assertEqual(
+            list(MovieViewBucket.objects.order_by("bucket").values_list("bucket", "views")),
+            [(hour_start(self.now - timedelta(hours=1)), 2), (bucket.bucket, 4)],
+        )
+
+    @override_settings(GEOIP_REFRESH_INTERVAL=0)
+    def test_scheduler_runs_periodic_jobs(self):
+        self.client.post(f"/watch-anime/api/movies/{self.new_hit.id}/increment-count/")
+        call_command("run_scheduler", "--once", stdout=StringIO(), stderr=StringIO())
+        self.new_hit.refresh_from_db()
+        self.assertEqual(self.new_hit.count, 11)
+        self.assertGreater(self.new_hit.trending_score, 0)
+        self.assertTrue(SimilarityState.objects.filter(movie=self.new_hit).exists())
+
+    def test_roll_up_and_prune(self):
+        for hours_ago in (50, 51, 52, 75):
+            self.add_views(self.new_hit, hours_ago, 1)
+        self.add_views(self.new_hit, 1, 7)
+        self.add_views(self.old_hit, 24 * 20, 500)
+        rolled, pruned = roll_up_buckets(self.now)
+        self.assertEqual((rolled, pruned), (4, 1))
+        buckets = list(MovieViewBucket.objects.order_by("bucket").values_list("span_hours", "views"))
+        self.assertEqual(sum(views for _, views in buckets), 11)
+        self.assertEqual(buckets[-1], (1, 7))
+        self.assertTrue(all(span == 24 for span, _ in buckets[:-1]))
+        self.assertEqual(roll_up_buckets(self.now), (0, 0))
+
+        # Kechikib qayta yozilgan eski soat keyingi roll-up da bir marta qo'shiladi
+        # (00:00 UTC soati kunlik qator kaliti bilan bir xil bo'lardi)
+        hours_ago = 53 if (self.now - timedelta(hours=53)).astimezone(dt_timezone.utc).hour else 54
+        self.add_views(self.new_hit, hours_ago, 2)
+        self.assertEqual(roll_up_buckets(self.now), (1, 0))
+        self.assertEqual(sum(MovieViewBucket.objects.values_list("views", flat=True)), 13)
+
+    def test_recent_views_outrank_old_hits(self):
+        self.add_views(self.old_hit, 24 * 5, 200, span_hours=24)
+        self.add_views(self.new_hit, 1, 30)
+        self.assertEqual(refresh_trending_scores(self.now), 2)
+        self.old_hit.refresh_from_db()
+        self.assertAlmostEqual(self.old_hit.trending_score, 200 * 0.5 ** ((24 * 5 - 12) / 36), delta=1)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("trending-movies"))
+        self.assertEqual([movie["hfsnme"] for movie in response.json()["data"]], ["Frieren", "Naruto"])
+
+        # Bucketlar o'chgach ball nolga tushadi va film ro'yxatdan chiqadi
+        MovieViewBucket.objects.filter(movie=self.old_hit).delete()
+        refresh_trending_scores(self.now)
+        response = self.client.get(reverse("trending-movies"), {"limit": 5})
+        self.assertEqual([movie["hfsnme"] for movie in response.json()["data"]], ["Frieren"])
+        response = self.client.get(reverse("trending-movies"), {"limit": -3})
+        self.assertEqual([movie["hfsnme"] for movie in response.json()["data"]], ["Frieren"])
+
+
+class MovieCommentsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        department = Add_departments.objects.create(department_name="Anime", description="")
+        self.movie = Add_movies.objects.create(
+            add_departments=department, movies_name="Naruto", movies_description="", country="Japan",
+        )
+        self.user = User.objects.create_user(username="izoh", email="izoh@example.com", password="x")
+        self.comments = [Comment.objects.create(user=self.user, movie=self.movie, text=str(i)) for i in range(25)]
+
+    def test_detail_embeds_count_and_first_page(self):
+        body = self.client.get(reverse("movies-detail", args=[self.movie.id])).json()
+        self.assertEqual(body["comments_count"], 25)
+        self.assertEqual([c["text"] for c in body["comments"]], [str(i) for i in range(24, 4, -1)])
+        self.assertEqual(body["comments"][0]["username"], "izoh")
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(
+                reverse("movie-comments", args=[self.movie.id]), {"cursor": body["comments_next_cursor"]}
+            )
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn("email", ctx.captured_queries[0]["sql"])
+        self.assertEqual([c["text"] for c in response.json()["data"]], ["4", "3", "2", "1", "0"])
+        self.assertIsNone(response.json()["pagination"]["next_cursor"])
+
+    def test_comments_of_missing_movie(self):
+        response = self.client.get(reverse("movie-comments", args=[999999]))
+        self.assertEqual(response.status_code, 404)
+        other = Add_movies.objects.create(add_departments=self.movie.add_departments, movies_name="Bleach")
+        response = self.client.get(reverse("movie-comments", args=[other.id]))
+        self.assertEqual(response.json()["data"], [])
+
+
+class MovieDocumentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.department = Add_departments.objects.create(department_name="Anime", description="")
+        self.movie = Add_movies.objects.create(
+            add_departments=self.department, movies_name="Naruto", movies_description="", country="Japan",
+        )
+        self.user = User.objects.create_user(username="saver", email="saver@example.com", password="x")
+        self.url = reverse("movies-detail", args=[self.movie.id])
+
+    def get(self, client=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return (client or self.client).get(self.url).json()
+
+    def test_shared_document_is_cached(self):
+        self.get()
+        # Faqat hujjat versiyasi va ko'rishlar/ovozlar soni (bitta nuqtaviy so'rov)
+        with self.assertNumQueries(1):
+            body = self.get()
+        self.assertEqual((body["movies_name"], body["is_saved"], body["user_vote"]), ("Naruto", False, None))
+
+        SavedFilm.objects.create(user=self.user, film=self.movie)
+        with self.captureOnCommitCallbacks(execute=True):
+            LikeDislike.objects.create(user=self.user, movie=self.movie, vote=True)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.get(client)
+        # Foydalanuvchi qismi o'sha so'rovda (subquerylar)
+        with self.assertNumQueries(1):
+            body = self.get(client)
+        self.assertEqual((body["is_saved"], body["user_vote"], body["like_count"]), (True, True, 1))
+
+    def test_document_version_changes_with_the_write(self):
+        self.get()
+        # on_commit chaqiruvlarisiz: versiya yozuv bilan bir tranzaksiyada oshadi
+        Add_movies.objects.filter(pk=self.movie.pk).update(movies_name="Boruto")
+        Comment.objects.create(user=self.user, movie=self.movie, text="zo'r")
+        MovieViewDelta.objects.create(movie=self.movie)
+        drain_view_deltas()
+        body = self.get()
+        self.assertEqual((body["movies_name"], body["comments_count"], body["count"]), ("Boruto", 1, 1))
+
+    @override_settings(ALLOWED_HOSTS=["a.example.com", "b.example.com"])
+    def test_file_urls_follow_the_request_host(self):
+        MovieSeries.objects.create(movie=self.movie, title="1", video_url="x", video_file="series/1.mp4")
+        body = self.client.get(self.url, HTTP_HOST="a.example.com").json()
+        self.assertEqual(body["series"][0]["video_file"], "http://a.example.com/media/series/1.mp4")
+        body = self.client.get(self.url, HTTP_HOST="b.example.com").json()
+        self.assertEqual(body["series"][0]["video_file"], "http://b.example.com/media/series/1.mp4")
+
+    def test_document_follows_movie_changes(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            MovieSeries.objects.create(movie=self.movie, title="1", video_url="x")
+            Comment.objects.create(user=self.user, movie=self.movie, text="zo'r")
+        body = self.get()
+        self.assertEqual((len(body["series"]), body["comments_count"]), (1, 1))
+
+        request = APIRequestFactory().post("/", {"vote": False}, format="json")
+        force_authenticate(request, user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            CreateVote.as_view()(request, movie_id=self.movie.id)
+        self.assertEqual(self.get()["dislike_count"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.department.department_name = "Anime (yangi)"
+            self.department.save()
+        self.assertEqual(self.get()["department_name"], "Anime (yangi)")
+
+    def test_missing_movie(self):
+        response = self.client.get(reverse("movies-detail", args=[999999]))
+        self.assertEqual(response.status_code, 404)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.department = Add_departments.objects.create(department_name="Anime", description="")
+        self.movie = Add_movies.objects.create(
+            add_departments=self.department, movies_name="Naruto", movies_description="", country="Japan",
+        )
+
+    def test_catalog_endpoints_answer_304(self):
+        for url in (reverse("home-movies"), reverse("all-movies"), "/watch-anime/api/departments/"):
+            response = self.client.get(url)
+            etag = response["ETag"]
+            # Vaqt oynasi ETag da - kuchsiz; oxirgi yozuv vaqti noma'lum
+            self.assertTrue(etag.startswith('W/"'))
+            self.assertFalse(response.has_header("Last-Modified"))
+            # faqat katalog versiyasi o'qiladi
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+
+        etag = self.client.get(reverse("all-movies"))["ETag"]
+        self.assertNotEqual(self.client.get(reverse("all-movies"), {"country": "Japan"})["ETag"], etag)
+        Add_movies.objects.create(add_departments=self.department, movies_name="Bleach", country="Japan")
+        response = self.client.get(reverse("all-movies"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["data"]), 2)
+
+    def test_movie_detail_answers_304(self):
+        url = reverse("movies-detail", args=[self.movie.id])
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertFalse(response.has_header("Last-Modified"))
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # Hujjat qayta qurilsa (boshqa worker, kesh tozalangan) mazmun o'zgarmagani uchun ETag ham o'sha
+        cache.clear()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Ko'rishlar soni javobda - ETag ham o'zgaradi
+        MovieViewDelta.objects.create(movie=self.movie)
+        drain_view_deltas()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.json()["count"]), (200, 1))
+        etag = response["ETag"]
+
+        user = User.objects.create_user(username="izoh", email="izoh@example.com", password="x")
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(user=user, movie=self.movie, text="zo'r")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.json()["comments_count"]), (200, 1))
+
+        # Foydalanuvchi qismi ham ETag da
+        client = APIClient()
+        client.force_authenticate(user)
+        self.assertEqual(client.get(url)["ETag"], response["ETag"])
+        # Versiya, jonli ustunlar va foydalanuvchi qismi - bitta so'rov
+        with self.assertNumQueries(1):
+            self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        SavedFilm.objects.create(user=user, film=self.movie)
+        response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual((response.status_code, response.json()["is_saved"]), (200, True))
+
+    def test_region_locked_movie_is_not_conditional(self):
+        self.movie.is_possible = True
+        self.movie.save()
+        response = self.client.get(reverse("movies-detail", args=[self.movie.id]))
+        self.assertFalse(response.has_header("ETag"))
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.department = Add_departments.objects.create(department_name="Anime", description="")
+        self.movie = Add_movies.objects.create(
+            add_departments=self.department, movies_name="Naruto", movies_description="", country="Japan",
+        )
+
+    def names(self):
+        return [m["hfsnme"] for m in self.client.get(reverse("home-movies")).json()["data"]]
+
+    def test_cached_response_costs_one_query(self):
+        self.names()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.names(), ["Naruto"])
+
+    def test_movie_save_invalidates(self):
+        self.names()
+        self.movie.movies_name = "Bleach"
+        self.movie.save()
+        self.assertEqual(self.names(), ["Bleach"])
+
+    def test_bulk_update_invalidates(self):
+        self.names()
+        Add_movies.objects.filter(pk=self.movie.pk).update(movies_name="One Piece")
+        self.assertEqual(self.names(), ["One Piece"])
+
+    def test_series_and_department_changes_invalidate(self):
+        self.names()
+        MovieSeries.objects.create(movie=self.movie, title="1", video_url="x")
+        self.assertEqual(self.client.get(reverse("home-movies")).json()["data"][0]["hfsscnt"], 1)
+
+        self.department.department_name = "Serial"
+        self.department.save()
+        self.assertEqual(self.client.get(reverse("home-movies")).json()["data"][0]["hfsdnme"], "Serial")
+
+    def test_view_count_does_not_invalidate(self):
+        version = CatalogVersion.current().version
+        Add_movies.objects.filter(pk=self.movie.pk).update(count=models.F("count") + 1)
+        self.assertEqual(CatalogVersion.current().version, version)
+
+    def test_catalog_changed_signal(self):
+        received = []
+
+        def receiver(sender, movie_ids, **kwargs):
+            received.append(movie_ids)
+
+        catalog_changed.connect(receiver)
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                Add_movies.objects.filter(pk=self.movie.pk).update(movies_name="Bleach")
+        finally:
+            catalog_changed.disconnect(receiver)
+        self.assertEqual(received, [{self.movie.pk}])
+
+
+class OfflineGeoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        geolocation_cache.clear()
+        vpn_verdict_cache.clear()
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "ip2asn.bin")
+        IPRangeDatabase.build([
+            ("84.54.64.0", "84.54.127.255", "UZ", 8193, "UZBEKTELEKOM"),
+            ("5.0.0.0", "5.0.0.255", "DE", 24940, "HETZNER"),
+            ("2a03:4000::", "2a03:4000:ffff:ffff:ffff:ffff:ffff:ffff", "UZ", 8193, "UZBEKTELEKOM"),
+        ], self.db_path)
+        self.settings_override = override_settings(GEOIP_DB_PATH=self.db_path, GEOIP_HTTP_FALLBACK=False)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.tmpdir)
+
+    def test_lookup_ipv4_and_ipv6(self):
+        database = IPRangeDatabase(self.db_path)
+        self.assertEqual(database.lookup("84.54.100.1")["countryCode"], "UZ")
+        self.assertEqual(database.lookup("5.0.0.1")["as_name"], "HETZNER")
+        self.assertEqual(database.lookup("2a03:4000::1")["asn"], 8193)
+        self.assertEqual(database.lookup("::ffff:84.54.64.1")["countryCode"], "UZ")
+        self.assertIsNone(database.lookup("8.8.8.8"))
+        self.assertIsNone(database.lookup("not-an-ip"))
+        database.close()
+
+    @patch("api.geo.requests.get")
+    def test_detail_blocks_uzbek_ip_without_http(self, mock_get):
+        department = Add_departments.objects.create(department_name="Anime", description="")
+        movie = Add_movies.objects.create(
+            add_departments=department, movies_name="Naruto", movies_description="",
+            country="Japan", is_possible=True,
+        )
+        url = f"/watch-anime/api/movies/{movie.id}/"
+        self.assertEqual(self.client.get(url, REMOTE_ADDR="84.54.70.10").status_code, 403)
+        self.assertEqual(self.client.get(url, REMOTE_ADDR="5.0.0.10").status_code, 200)
+        mock_get.assert_not_called()
+
+    def test_refresh_command_compiles_tsv(self):
+        source = os.path.join(self.tmpdir, "ip2asn.tsv")
+        with open(source, "w") as fh:
+            fh.write("1.0.0.0\t1.0.0.255\t13335\tUS\tCLOUDFLARENET\n")
+            fh.write("1.0.1.0\t1.0.1.255\t0\tNone\tNot routed\n")
+        output = os.path.join(self.tmpdir, "out.bin")
+        call_command("refresh_geoip", source=source, output=output, stdout=StringIO())
+        database = IPRangeDatabase(output)
+        self.assertEqual(database.lookup("1.0.0.7")["as_name"], "CLOUDFLARENET")
+        self.assertIsNone(database.lookup("1.0.1.7"))
+        database.close()
+
+    def test_refresh_if_stale_skips_fresh_database(self):
+        stdout = StringIO()
+        call_command("refresh_geoip", "--if-stale", source="/nonexistent.tsv", stdout=stdout)
+        self.assertIn("yuklanmadi", stdout.getvalue())
+
+    def test_deploy_check_requires_database_or_fallback(self):
+        call_command("check", "--deploy", "--tag", "geoip", stdout=StringIO())
+        missing = os.path.join(self.tmpdir, "missing.bin")
+        with override_settings(GEOIP_DB_PATH=missing):
+            with self.assertRaisesMessage(SystemCheckError, "api.E001"):
+                call_command("check", "--deploy", "--tag", "geoip", stdout=StringIO())
+            with override_settings(GEOIP_HTTP_FALLBACK=True):
+                call_command("check", "--deploy", "--tag", "geoip", stdout=StringIO())
+
+
+class GeoCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        geolocation_cache.clear()
+        vpn_verdict_cache.clear()
+        self.now = 0.0
+        self.cache = TTLCache(maxsize=2, timer=lambda: self.now)
+
+    def test_ttl_expiry_and_lru_eviction(self):
+        self.cache.set("a", 1, ttl=10)
+        self.cache.set("b", 2, ttl=10)
+        self.cache.get("a")
+        self.cache.set("c", 3, ttl=10)  # "b" eng eski
+        self.assertIsNone(self.cache.get("b", None))
+        self.assertEqual(self.cache.get("a"), 1)
+        self.now = 11
+        self.assertIsNone(self.cache.get("a", None))
+
+    def test_tiers_and_negative_ttl(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return None
+
+        with override_settings(GEOIP_NEGATIVE_CACHE_TTL=60):
+            self.assertIsNone(geolocation_cache.get_or_compute("10.0.0.1", compute))
+            self.assertIsNone(geolocation_cache.get_or_compute("10.0.0.1", compute))
+            # boshqa worker: lokal kesh bo'sh, umumiy kesh to'la
+            geolocation_cache.clear()
+            self.assertIsNone(geolocation_cache.get_or_compute("10.0.0.1", compute))
+        self.assertEqual(len(calls), 1)
+
+    @patch("api.views.lookup_ip", return_value={"country": "Germany", "countryCode": "DE"})
+    def test_repeated_detail_requests_resolve_ip_once(self, mock_lookup):
+        department = Add_departments.objects.create(department_name="Anime", description="")
+        movie = Add_movies.objects.create(
+            add_departments=department, movies_name="Naruto", movies_description="",
+            country="Japan", is_possible=True,
+        )
+        for _ in range(3):
+            response = self.client.get(f"/watch-anime/api/movies/{movie.id}/", REMOTE_ADDR="5.0.0.9")
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_lookup.call_count, 1)
+
+
+class NetworkClassifierTests(TestCase):
+    def setUp(self):
+        self.classifier = NetworkClassifier(
+            vpn=["nordvpn", "hetzner", "digital ocean"], vpn_asns=[14061],
+            telecom=["uztelecom"], telecom_asns=[8193],
+        )
+
+    def test_verdict_reasons(self):
+        classify = self.classifier.classify
+        self.assertEqual(classify({"as": "AS14061 DigitalOcean, LLC"}), (True, "asn:AS14061"))
+        self.assertEqual(classify({"isp": "Hetzner Online GmbH"}), (True, "provider:hetzner"))
+        self.assertEqual(classify({"isp": "Uztelecom", "proxy": True}), (True, "proxy_flag"))
+        self.assertEqual(classify({"as": "AS8193 Uzbektelecom"}), (False, "telecom_asn:AS8193"))
+        self.assertEqual(classify({"org": "UZTELECOM JSC"}), (False, "telecom:uztelecom"))
+        self.assertEqual(classify({"isp": "Comcast", "as": ""}), (False, "no_indicator"))
+
+    def test_reloads_list_when_file_changes(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, "providers.json")
+        with open(path, "w") as fh:
+            json.dump({"vpn": ["hetzner"]}, fh)
+
+        with override_settings(VPN_PROVIDERS_PATH=path, VPN_PROVIDERS_RELOAD_INTERVAL=0):
+            self.assertFalse(get_classifier().classify({"isp": "Contabo GmbH"}).is_vpn)
+            with open(path, "w") as fh:
+                json.dump({"vpn": ["hetzner", "contabo"]}, fh)
+            os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+            self.assertEqual(get_classifier().classify({"isp": "Contabo GmbH"}).reason, "provider:contabo")
+
+
+class BufferedViewCountTests(TestCase):
+    def setUp(self):
+        department = Add_departments.objects.create(department_name="Anime", description="")
+        self.movies = [
+            Add_movies.objects.create(
+                add_departments=department, movies_name=f"Film {i}", movies_description="",
+                country="Japan", count=10,
+            )
+            for i in range(2)
+        ]
+
+    def increment(self, movie):
+        return self.client.post(f"/watch-anime/api/movies/{movie.id}/increment-count/")
+
+    def pending(self, movie):
+        return MovieViewDelta.objects.filter(movie=movie).count()
+
+    def detail_count(self, movie):
+        return self.client.get(f"/watch-anime/api/movies/{movie.id}/").json()["count"]
+
+    def test_increments_are_buffered_and_drained_together(self):
+        first, second = self.movies
+        for _ in range(3):
+            response = self.increment(first)
+        self.increment(second)
+        # Bufer bazada - boshqa worker ham shu qiymatni ko'radi
+        self.assertEqual(response.json()["new_count"], 13)
+        self.assertEqual(self.pending(first), 3)
+        first.refresh_from_db()
+        self.assertEqual(first.count, 10)
+        # Film sahifasi yig'ilmagan ko'rishlarni ham ko'rsatadi
+        self.assertEqual(self.detail_count(first), 13)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(drain_view_deltas(), 2)
+        # DELETE ... RETURNING + bitta CASE UPDATE + bucketlar upserti (savepointlardan tashqari)
+        statements = [q["sql"] for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]
+        self.assertEqual(len(statements), 3)
+        self.assertEqual(
+            list(Add_movies.objects.order_by("id").values_list("count", flat=True)), [13, 11]
+        )
+        self.assertEqual(self.pending(first), 0)
+        self.assertEqual(self.detail_count(first), 13)
+        self.assertEqual(self.increment(first).json()["new_count"], 14)
+        self.assertEqual(drain_view_deltas(), 1)
+
+    def test_failed_drain_keeps_pending_views(self):
+        self.increment(self.movies[0])
+        with patch("add_all.models.AddMoviesQuerySet.update", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                drain_view_deltas()
+        self.assertEqual(self.pending(self.movies[0]), 1)
+        call_command("flush_view_counts", stdout=StringIO())
+        self.movies[0].refresh_from_db()
+        self.assertEqual(self.movies[0].count, 11)
+
+    def test_deleted_movie_drops_pending_views(self):
+        self.increment(self.movies[1])
+        self.movies[1].delete()
+        self.assertEqual(drain_view_deltas(), 0)
+        self.assertFalse(MovieViewBucket.objects.exists())
+
+    def test_unknown_movie(self):
+        response = self.client.post("/watch-anime/api/movies/999/increment-count/")
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(MovieViewDelta.objects.exists())
+
+
+class VoteCountQueryTests(TestCase):
+    def test_vote_views_read_stored_counts(self):
+        department = Add_departments.objects.create(department_name="Anime", description="")
+        movie = Add_movies.objects.create(
+            add_departments=department, movies_name="Naruto", movies_description="", country="Japan",
+        )
+        for i in range(5):
+            LikeDislike.objects.create(movie=movie, vote=i % 2 == 0, ip_address=f"10.0.0.{i}")
+        user = User.objects.create_user(username="voter", email="voter@example.com", password="x")
+
+        # vote marshrutlari hozircha urls.py da o'chirilgan, view'larni to'g'ridan-to'g'ri chaqiramiz
+        factory = APIRequestFactory()
+        request = factory.post("/", {"vote": False}, format="json")
+        force_authenticate(request, user=user)
+        response = CreateVote.as_view()(request, movie_id=movie.id)
+        self.assertEqual((response.data["like_count"], response.data["dislike_count"]), (3, 3))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = GetVotes.as_view()(factory.get("/"), movie_id=movie.id)
+        self.assertEqual(response.data, {"like_count": 3, "dislike_count": 3})
+        self.assertFalse(any("likedislike" in q["sql"].lower() for q in ctx.captured_queries))
+
+
+class ConcurrentVoteTests(TransactionTestCase):
+    def test_parallel_votes_keep_one_row_per_voter(self):
+        department = Add_departments.objects.create(department_name="Anime", description="")
+        movie = Add_movies.objects.create(
+            add_departments=department, movies_name="Naruto", movies_description="", country="Japan",
+        )
+        # 4 ta ovoz beruvchi, har biri bir vaqtda 3 marta bosadi (like va dislike aralash)
+        plan = [(f"10.0.1.{voter}", attempt != 0) for voter in range(4) for attempt in range(3)]
+        barrier = threading.Barrier(len(plan))
+        errors = []
+
+        def cast(ip, vote):
+            factory = APIRequestFactory()
+            try:
+                barrier.wait()
+                for _ in range(20):
+                    try:
+                        request = factory.post("/", {"vote": vote}, format="json", REMOTE_ADDR=ip)
+                        request.session = SessionStore()
+                        response = CreateVote.as_view()(request, movie_id=movie.id)
+                        break
+                    except OperationalError:
+                        # SQLite test bazasi parallel yozuvlarni qulflaydi - qayta urinamiz
+                        time.sleep(0.01)
+                if response.status_code != 200:
+                    errors.append(response.data)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=cast, args=args) for args in plan]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        votes = LikeDislike.objects.filter(movie=movie)
+        self.assertEqual(votes.count(), 4)
+        movie.refresh_from_db()
+        self.assertEqual(
+            (movie.like_count, movie.dislike_count),
+            (votes.filter(vote=True).count(), votes.filter(vote=False).count()),
+        )
+
+
+class NotificationReadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.notification = Notification.objects.create(title="Hello", text="World")
+
+    def view(self, ip):
+        # notifications marshrutlari urls.py da o'chirilgan
+        request = self.factory.post("/", REMOTE_ADDR=ip)
+        return NotificationViewUpdate.as_view()(request, pk=self.notification.pk)
+
+    def unread(self, ip):
+        return UnreadNotificationCount.as_view()(self.factory.get("/", REMOTE_ADDR=ip)).data["unread_count"]
+
+    def test_repeated_view_counts_once_without_rewriting_row(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.view("10.0.0.1").data, {"views_count": 1})
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "add_all_notification"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"title"', updates[0])
+
+        self.view("10.0.0.1")
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.views_count, 1)
+        self.assertEqual(self.notification.reads.get().reader_key, "ip:10.0.0.1")
+
+    def test_unread_count_has_no_ip_prefix_matches(self):
+        self.view("10.0.0.15")
+        self.assertEqual(self.unread("10.0.0.15"), 0)
+        self.assertEqual(self.unread("10.0.0.1"), 1)
+
+    def test_unread_count_uses_watermark_and_cache(self):
+        Notification.objects.create(title="Second", text="")
+        self.view("10.0.0.1")
+        self.assertEqual(self.unread("10.0.0.1"), 1)
+        # Keshdan: faqat versiyalar va watermark (bitta so'rov)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.unread("10.0.0.1"), 1)
+
+        response = self.client.post(reverse("notifications-read-all"), REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.json()["unread_count"], 0)
+        self.assertEqual(self.unread("10.0.0.1"), 0)
+        self.assertFalse(NotificationRead.objects.filter(reader_key="ip:10.0.0.1").exists())
+        self.assertTrue(self.notification.is_read_by("ip:10.0.0.1"))
+        self.assertEqual(self.view("10.0.0.1").data, {"views_count": 1})  # watermark ostida - qayta sanalmaydi
+
+        # on_commit chaqiruvlarisiz: versiya yozuv bilan bir tranzaksiyada oshadi
+        newest = Notification.objects.create(title="Third", text="")
+        self.assertEqual(self.unread("10.0.0.1"), 1)
+        newest.delete()
+        self.assertEqual(self.unread("10.0.0.1"), 0)
+        newest = Notification.objects.create(title="Third", text="")
+        self.assertFalse(newest.is_read_by("ip:10.0.0.1"))
+
+    def test_concurrent_first_bump_is_not_lost(self):
+        update = models.QuerySet.update
+        skipped = []
+
+        def racing_update(queryset, **kwargs):
+            # Birinchi UPDATE parallel so'rov qatorni yaratishidan oldin ishlagandek
+            if queryset.model in (NotificationWatermark, NotificationVersion) and not skipped:
+                skipped.append(queryset.model)
+                return 0
+            return update(queryset, **kwargs)
+
+        for model, bump in [
+            (NotificationWatermark, lambda: NotificationWatermark.bump("ip:10.0.0.1", last_seen_id=5)),
+            (NotificationVersion, NotificationVersion.bump),
+        ]:
+            model.objects.all().delete()
+            bump()
+            with patch.object(models.QuerySet, "update", racing_update):
+                bump()
+            self.assertEqual(model.objects.get().version, 2)
+            skipped.clear()
+        self.assertEqual(NotificationWatermark.last_seen("ip:10.0.0.1"), 5)
+
+    def list_notifications(self, ip, **params):
+        return NotificationListView.as_view()(self.factory.get("/", params, REMOTE_ADDR=ip))
+
+    def test_list_resolves_read_state_with_constant_queries(self):
+        for i in range(30):
+            Notification.objects.create(title=f"N{i}", text="")
+        Notification.objects.mark_all_read("ip:10.0.0.1")
+        newer = [Notification.objects.create(title=f"New {i}", text="") for i in range(3)]
+        self.view("10.0.0.1")  # watermark ostida - hisobga olinmaydi
+        NotificationRead.objects.create(notification=newer[1], reader_key="ip:10.0.0.1")
+
+        with self.assertNumQueries(3):
+            first = self.list_notifications("10.0.0.1")
+        with self.assertNumQueries(2):  # sahifa butunlay watermark ostida - o'qishlar so'ralmaydi
+            second = self.list_notifications("10.0.0.1", cursor=first.data["pagination"]["next_cursor"])
+
+        read = {item["title"]: item["is_read"] for item in first.data["data"] + second.data["data"]}
+        self.assertEqual(len(first.data["data"]), 20)
+        self.assertEqual(len(read), 34)
+        self.assertEqual([read["New 0"], read["New 1"], read["New 2"], read["N0"]], [False, True, False, True])
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        reset_search_index()
+        self.department = Add_departments.objects.create(department_name="Anime", description="")
+        now = timezone.now()
+        for offset, (name, genre) in enumerate([
+            ("Boruto: Naruto Next Generations", "Jangari"),
+            ("Naruto Shippuden", "Jangari"),
+            ("Naruto", "Sarguzasht"),
+            ("Dragon Ball", "Naruto-style"),
+            ("Supernarutos", "Drama"),
+        ]):
+            Add_movies.objects.create(
+                add_departments=self.department, movies_name=name, movies_description="",
+                country="Japan", genre=genre, created_at=now - timedelta(days=offset),
+            )
+
+    def names(self, ids):
+        names = dict(Add_movies.objects.values_list("id", "movies_name"))
+        return [names[pk] for pk in ids]
+
+    def test_ranking_groups(self):
+        index = get_search_index()
+        self.assertEqual(self.names(index.search("NARUTO")), [
+            "Naruto", "Naruto Shippuden", "Boruto: Naruto Next Generations", "Supernarutos", "Dragon Ball",
+        ])
+        self.assertEqual(self.names(index.search("narutto shipuden")), ["Naruto Shippuden"])
+        # 1-2 harfli so'zlar ham so'z o'rtasidan topiladi
+        self.assertEqual(self.names(index.search("ut")), [
+            "Boruto: Naruto Next Generations", "Naruto Shippuden", "Naruto", "Supernarutos", "Dragon Ball",
+        ])
+        self.assertEqual(self.names(index.search("to sh")), ["Naruto Shippuden"])
+
+    def test_transliterated_queries(self):
+        index = get_search_index()
+        self.assertEqual(self.names(index.search("Наруто Ш")), ["Naruto Shippuden"])
+        with self.captureOnCommitCallbacks(execute=True):
+            movie = Add_movies.objects.create(
+                add_departments=self.department, movies_name="Oʻzbek qoʻshiqlari", movies_description="",
+                country="Uzbekistan",
+            )
+        self.assertEqual(index.search("o'zbek qo'sh"), [movie.id])
+        self.assertEqual(index.search("Ўзбек"), [movie.id])
+
+    def test_incremental_update_on_catalog_change(self):
+        index = get_search_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            movie = Add_movies.objects.create(
+                add_departments=self.department, movies_name="One Piece", movies_description="", country="Japan",
+            )
+        self.assertEqual(index.search("piece"), [movie.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            movie.movies_name = "One Punch"
+            movie.save()
+        self.assertEqual(index.search("piece"), [])
+        self.assertIs(get_search_index(), index)
+
+    def test_stale_index_is_rebuilt_in_background(self):
+        index = get_search_index()
+        # Boshqa worker qo'shgan film: versiya bazada oshgan, bu process'ga signal kelmagan
+        movie = Add_movies.objects.create(
+            add_departments=self.department, movies_name="One Piece", movies_description="", country="Japan",
+        )
+        search_index.checked_at = 0.0
+        with patch.object(CatalogIndexHolder, "_rebuild_in_background") as rebuild:
+            with self.assertNumQueries(1):  # faqat versiya, qurish so'rov oqimida emas
+                self.assertIs(get_search_index(), index)
+            search_index.rebuilding.join()
+        self.assertEqual(index.search("piece"), [])
+        (version,), _ = rebuild.call_args
+        self.assertEqual(version, CatalogVersion.current().version)
+
+        # Fon oqimi bajaradigan ish - tayyor bo'lgach indeks almashadi
+        search_index.rebuilding = None
+        search_index.rebuild(version)
+        self.assertEqual(get_search_index().search("piece"), [movie.id])
+
+    def test_endpoint_keeps_index_order(self):
+        response = self.client.get(reverse("movie-search"), {"q": "naruto s"})
+        self.assertEqual([item["movies_name"] for item in response.json()["data"]], ["Naruto Shippuden"])
+
+
+class SuggestIndexTests(TestCase):
+    def setUp(self):
+        reset_search_index()
+        self.department = Add_departments.objects.create(department_name="Anime", description="")
+        for name, count in [
+            ("Naruto", 50), ("Naruto Shippuden", 300), ("Boruto: Naruto Next Generations", 100),
+            ("Nana", 10), ("Shingeki no Kyojin", 200),
+        ]:
+            self.create(name, count)
+
+    def create(self, name, count=0):
+        return Add_movies.objects.create(
+            add_departments=self.department, movies_name=name, movies_description="", country="Japan", count=count,
+        )
+
+    def names(self, query, limit=None):
+        return [name for _, name in get_suggest_index().suggest(query, limit)]
+
+    @override_settings(SUGGEST_SCAN_LIMIT=1)
+    def test_top_k_by_popularity(self):
+        self.assertEqual(self.names("na"), ["Naruto Shippuden", "Boruto: Naruto Next Generations", "Naruto", "Nana"])
+        self.assertEqual(self.names("NARUTO", limit=2), ["Naruto Shippuden", "Boruto: Naruto Next Generations"])
+        self.assertEqual(self.names("shi"), ["Naruto Shippuden", "Shingeki no Kyojin"])
+        self.assertEqual(self.names("shipp"), ["Naruto Shippuden"])
+        self.assertEqual(self.names("x"), [])
+
+    @override_settings(SUGGEST_SCAN_LIMIT=1)
+    def test_incremental_update_invalidates_nodes(self):
+        index = get_suggest_index()
+        self.assertEqual(self.names("n", limit=1), ["Naruto Shippuden"])
+        with self.captureOnCommitCallbacks(execute=True):
+            movie = self.create("Nichijou", count=1000)
+        self.assertEqual(self.names("n", limit=1), ["Nichijou"])
+        with self.captureOnCommitCallbacks(execute=True):
+            movie.movies_name = "Mushishi"
+            movie.save()
+        self.assertEqual(self.names("n", limit=1), ["Naruto Shippuden"])
+        self.assertEqual(self.names("mu"), ["Mushishi"])
+        self.assertIs(get_suggest_index(), index)
+
+    def test_endpoint_without_queries(self):
+        get_suggest_index()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("movie-search-suggest"), {"q": "naruto", "limit": "1"})
+        self.assertEqual(response.json()["data"][0]["movies_name"], "Naruto Shippuden")
+
+
+@override_settings(SEARCH_BACKEND="database")
+class DatabaseSearchTests(TestCase):
+    def setUp(self):
+        self.department = Add_departments.objects.create(department_name="Anime", description="")
+
+    def create(self, name, description="", genre="", count=0):
+        return Add_movies.objects.create(
+            add_departments=self.department, movies_name=name, movies_description=description,
+            country="Japan", genre=genre, count=count,
+        )
+
+    def test_ranks_by_field_weight_and_popularity(self):
+        in_description = self.create("Boruto", description="Naruto ning o'g'li haqida", count=1000)
+        quiet = self.create("Naruto", count=0)
+        popular = self.create("Naruto", count=5000)
+        self.create("Bleach")
+        self.assertEqual(get_search_backend().search("naru"), [popular.id, quiet.id, in_description.id])
+
+    def test_matches_title_search_key(self):
+        cyrillic = self.create("Атака титанов")
+        apostrophe = self.create("Oʻtgan kunlar")
+        self.assertEqual(get_search_backend().search("ataka"), [cyrillic.id])
+        self.assertEqual(get_search_backend().search("о'тган"), [apostrophe.id])
+        self.assertEqual(get_search_backend().search("o‘tgan kun"), [apostrophe.id])
+
+    def test_document_follows_writes_and_rebuild(self):
+        movie = self.create("One Piece", genre="Sarguzasht")
+        self.assertEqual(get_search_backend().search("sarguzasht"), [movie.id])
+        Add_movies.objects.filter(pk=movie.pk).update(movies_name="One Punch Man")
+        self.assertEqual(get_search_backend().search("piece"), [])
+        self.assertEqual(get_search_backend().search("punch man"), [movie.id])
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')")
+        self.assertEqual(get_search_backend().search("punch"), [])
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(get_search_backend().search("punch"), [movie.id])
+
+        movie.delete()
+        self.assertEqual(get_search_backend().search("punch"), [])
+
+
+class SimilarMoviesTests(TestCase):
+    def setUp(self):
+        anime = Add_departments.objects.create(department_name="Anime", description="")
+        kino = Add_departments.objects.create(department_name="Kino", description="")
+        self.movies = {}
+        for department, name, genre, country, year in [
+            (anime, "Naruto", "Jangari, Sarguzasht", "Japan", "2002"),
+            (anime, "Bleach", "sarguzasht,jangari", "Japan", "2004"),
+            (anime, "One Piece", "Sarguzasht, Komediya", "Japan", "1999"),
+            (anime, "Clannad", "Drama, Romantika", "Japan", "2007"),
+            (kino, "Gladiator", "Jangari, Drama", "USA", "2000"),
+        ]:
+            self.movies[name] = Add_movies.objects.create(
+                add_departments=department, movies_name=name, movies_description="",
+                genre=genre, country=country, year=year,
+            )
+
+    def neighbours(self, name):
+        return list(
+            SimilarMovie.objects.filter(movie=self.movies[name]).order_by("rank")
+            .values_list("similar__movies_name", flat=True)
+        )
+
+    def test_ranked_by_genre_department_country_year(self):
+        self.assertEqual(rebuild_similar_movies(), 5)
+        self.assertEqual(self.neighbours("Naruto"), ["Bleach", "One Piece", "Clannad", "Gladiator"])
+        self.assertEqual(set(self.neighbours("Gladiator")[:2]), {"Naruto", "Bleach"})
+
+    def test_endpoint_reads_neighbour_table(self):
+        rebuild_similar_movies()
+        url = reverse("similar-movies")
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"movie_id": self.movies["Naruto"].id, "limit": 3})
+        self.assertEqual([item["movies_name"] for item in response.json()], ["Bleach", "One Piece", "Clannad"])
+        self.assertEqual(response.json()[0]["department_name"], "Anime")
+        for limit in ("-1", "x"):
+            self.assertEqual(self.client.get(url, {"movie_id": self.movies["Naruto"].id, "limit": limit}).status_code, 200)
+
+        # Hali hisoblanmagan film - shu bo'limdan
+        new = Add_movies.objects.create(
+            add_departments=self.movies["Gladiator"].add_departments, movies_name="Troy", movies_description="",
+            country="USA",
+        )
+        response = self.client.get(url, {"movie_id": new.id})
+        self.assertEqual([item["movies_name"] for item in response.json()], ["Gladiator"])
+        self.assertEqual(self.client.get(url, {"movie_id": 999999}).status_code, 404)
+
+    def test_incremental_update(self):
+        rebuild_similar_movies()
+        self.assertEqual(update_similar_movies(), 0)
+
+        gladiator = self.movies["Gladiator"]
+        gladiator.add_departments = self.movies["Naruto"].add_departments
+        gladiator.genre, gladiator.country, gladiator.year = "Jangari, Sarguzasht", "Japan", "2003"
+        gladiator.save()
+        Add_movies.objects.filter(pk=gladiator.pk).update(count=100)
+        self.assertGreater(update_similar_movies(), 0)
+        # Belgilar bir xil - mashhurrog'i oldinda
+        self.assertEqual(self.neighbours("Naruto")[:2], ["Gladiator", "Bleach"])
+
+        gladiator.delete()
+        stale = set(SimilarityState.objects.filter(fingerprint="").values_list("movie__movies_name", flat=True))
+        self.assertEqual(stale, {"Naruto", "Bleach", "One Piece", "Clannad"})
+        self.assertEqual(update_similar_movies(), 4)
+        self.assertEqual(self.neighbours("Naruto"), ["Bleach", "One Piece", "Clannad"])
+
+
+class StubGeoHandler(BaseHTTPRequestHandler):
+    hits = {}
+
+    def do_GET(self):
+        route = self.path.split("/")[1]
+        StubGeoHandler.hits[route] = StubGeoHandler.hits.get(route, 0) + 1
+        if route == "slow":
+            time.sleep(1)
+        if route == "fail":
+            self.send_response(500)
+            self.end_headers()
+            return
+        body = json.dumps({"status": "success", "country": "Uzbekistan", "countryCode": "UZ", "as": route})
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(body.encode())
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # mijoz deadline tufayli ulanishni yopgan
+
+    def log_message(self, *args):
+        pass
+
+
+class GeoProviderFanOutTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubGeoHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        StubGeoHandler.hits = {}
+
+    def providers(self, *routes):
+        # har bir test uchun yangi URL - yangi circuit breaker
+        suffix = self._testMethodName
+        return [
+            {"name": route, "url": f"{self.base_url}/{route}/{suffix}/{{ip}}", "format": "ip-api"}
+            for route in routes
+        ]
+
+    def test_first_valid_answer_wins(self):
+        with override_settings(GEOIP_PROVIDERS=self.providers("slow", "fail", "fast"), GEOIP_PROVIDER_DEADLINE=2):
+            started = time.monotonic()
+            result = fetch_geolocation("84.54.70.10")
+            elapsed = time.monotonic() - started
+        self.assertEqual(result["as"], "fast")
+        self.assertLess(elapsed, 0.9)
+
+    def test_deadline_is_respected(self):
+        with override_settings(GEOIP_PROVIDERS=self.providers("slow"), GEOIP_PROVIDER_DEADLINE=0.2):
+            started = time.monotonic()
+            self.assertIsNone(fetch_geolocation("84.54.70.10"))
+            self.assertLess(time.monotonic() - started, 0.6)
+
+    def test_circuit_breaker_stops_calling_failing_provider(self):
+        with override_settings(
+            GEOIP_PROVIDERS=self.providers("fail"), GEOIP_BREAKER_FAILURES=2, GEOIP_BREAKER_RESET=60,
+        ):
+            for _ in range(5):
+                self.assertIsNone(fetch_geolocation("84.54.70.10"))
+        self.assertEqual(StubGeoHandler.hits["fail"], 2)
+
+    def test_breaker_half_open_probe(self):
+        now = [0.0]
+        breaker = CircuitBreaker(timer=lambda: now[0])
+        with override_settings(GEOIP_BREAKER_FAILURES=1, GEOIP_BREAKER_RESET=10):
+            breaker.record_failure()
+            self.assertFalse(breaker.allow())
+            now[0] = 11
+            self.assertTrue(breaker.allow())
+            self.assertFalse(breaker.allow())  # faqat bitta sinov so'rovi
+            breaker.record_success()
+            self.assertTrue(breaker.allow())
+
+    def test_cancelled_probe_releases_half_open_state(self):
+        provider = GeoProvider("stub", f"{self.base_url}/fast/{{ip}}", lambda data: data)
+        now = [0.0]
+        provider.breaker = CircuitBreaker(timer=lambda: now[0])
+        with override_settings(GEOIP_BREAKER_FAILURES=1, GEOIP_BREAKER_RESET=10):
+            provider.breaker.record_failure()
+            now[0] = 11
+            grant = provider.breaker.allow()
+            self.assertEqual(grant, CircuitBreaker.PROBE)
+            # navbatda turgan sinov so'rovi deadline da bekor qilindi
+            provider.in_flight = 1
+            future = Future()
+            future.cancel()
+            provider._finished(future, grant)
+            self.assertEqual(provider.in_flight, 0)
+            self.assertEqual(provider.breaker.allow(), CircuitBreaker.PROBE)
+
+    def test_in_flight_requests_are_capped_per_provider(self):
+        provider = GeoProvider("stub", f"{self.base_url}/fast/{{ip}}", lambda data: data)
+        release = threading.Event()
+        provider.fetch = lambda ip, timeout: release.wait(5)
+        with override_settings(GEOIP_PROVIDER_MAX_IN_FLIGHT=1):
+            future = provider.submit("84.54.70.10", 1)
+            self.assertIsNotNone(future)
+            self.assertIsNone(provider.submit("84.54.70.10", 1))
+            release.set()
+            future.result(timeout=5)
+            self.assertEqual(provider.in_flight, 0)
+            self.assertIsNotNone(provider.submit("84.54.70.10", 1))
@@ -0,0 +1,82 @@
+"""
+Trending: ko'rishlar soatlik bucketlarga yoziladi (api/counters.py drain_view_deltas), davriy
+update_trending buyrug'i (run_scheduler) ularni yig'adi/tozalaydi va Add_movies.trending_score ni hisoblaydi:
+
+    score = sum(views * 0.5 ** (bucket yoshi soatda / TRENDING_HALF_LIFE_HOURS))
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, Exists, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from add_all.models import Add_movies, MovieViewBucket
+from .counters import db_datetime
+
+
+def roll_up_buckets(now=None):
+    """
+    TRENDING_HOURLY_HOURS dan eski soatlik bucketlar kunlik (UTC 00:00) bucketga qo'shiladi,
+    TRENDING_RETENTION_DAYS dan eskilari o'chiriladi. Jadval hajmi ~ filmlar x (soatlar + kunlar).
+    (yig'ilgan, o'chirilgan) qatorlar sonini qaytaradi.
+    """
+    now = now or timezone.now()
+    pruned, _ = MovieViewBucket.objects.filter(
+        bucket__lt=now - timedelta(days=settings.TRENDING_RETENTION_DAYS)
+    ).delete()
+
+    cutoff = now - timedelta(hours=settings.TRENDING_HOURLY_HOURS)
+    table = connection.ops.quote_name(MovieViewBucket._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Faqat shu DELETE o'chirgan qatorlar yig'iladi: parallel ishga tushgan ikkinchi roll-up
+        # yoki kechikib qayta yozilgan eski soat ikki marta sanalmaydi
+        cursor.execute(
+            f"DELETE FROM {table} WHERE span_hours = 1 AND bucket < %s RETURNING movie_id, bucket, views",
+            [connection.ops.adapt_datetimefield_value(cutoff)],
+        )
+        rows = cursor.fetchall()
+        days = Counter()
+        for movie_id, bucket, views in rows:
+            day = db_datetime(bucket).replace(hour=0, minute=0, second=0, microsecond=0)
+            days[movie_id, day] += views
+        cursor.executemany(
+            f"""
+            INSERT INTO {table} (movie_id, bucket, span_hours, views) VALUES (%s, %s, 24, %s)
+            ON CONFLICT (movie_id, bucket) DO UPDATE SET views = {table}.views + excluded.views, span_hours = 24
+            """,
+            [
+                (movie_id, connection.ops.adapt_datetimefield_value(day), views)
+                for (movie_id, day), views in days.items()
+            ],
+        )
+    return len(rows), pruned
+
+
+def decay_weights(now=None):
+    """Har bir (bucket, span) uchun so'nish koeffitsienti - oraliq o'rtasining yoshi bo'yicha"""
+    now = now or timezone.now()
+    half_life = settings.TRENDING_HALF_LIFE_HOURS
+    weights = {}
+    for bucket, span_hours in MovieViewBucket.objects.values_list("bucket", "span_hours").distinct():
+        age = (now - bucket).total_seconds() / 3600 - span_hours / 2
+        weights[bucket] = 0.5 ** (max(age, 0) / half_life)
+    return weights
+
+
+def refresh_trending_scores(now=None):
+    """Bucketi bor yoki avval balli bo'lgan filmlar uchun bitta UPDATE; yangilangan qatorlar soni"""
+    weights = decay_weights(now)
+    buckets = MovieViewBucket.objects.filter(movie=OuterRef("pk")).order_by().values("movie")
+    if weights:
+        weight = Case(
+            *[When(bucket=bucket, then=Value(value)) for bucket, value in weights.items()],
+            default=Value(0.0), output_field=FloatField(),
+        )
+        total = buckets.annotate(score=Sum(F("views") * weight, output_field=FloatField())).values("score")
+        score = Coalesce(Subquery(total), Value(0.0))
+    else:
+        score = Value(0.0)
+    return Add_movies.objects.filter(Q(trending_score__gt=0) | Exists(buckets)).update(trending_score=score)
@@ -37,6 +37,7 @@ urlpatterns = [
     # path("notifications/<int:pk>/read/", NotificationReadView.as_view()),
     # path("notifications/<int:pk>/view/", NotificationViewUpdate.as_view()),
     # path("notifications/unread_count/", UnreadNotificationCount.as_view()),
+    path("notifications/read_all/", NotificationMarkAllReadView.as_view(), name="notifications-read-all"),
     
     # Password reset
     # path("password-reset/request/", PasswordResetRequestView.as_view()),
@@ -51,8 +52,9 @@ urlpatterns = [
     # path("totalComments/", TotalCommentsCount.as_view()),
     
     # Additional features
-    path('similar-movies/', SimilarMoviesAPIView.as_view()),
+    path('similar-movies/', SimilarMoviesAPIView.as_view(), name='similar-movies'),
     path('movies/<int:movie_id>/increment-count/', IncrementMovieCountAPIView.as_view()),
+    path('movies/<int:movie_id>/comments/', MovieCommentsAPIView.as_view(), name='movie-comments'),
 
     # Swiper movies (count 8)
     path('sprmvs/', SwiperMoviesAPIView.as_view(), name='swiper-movies'),
@@ -65,7 +67,9 @@ urlpatterns = [
 
     # All movies
     path('all-movies/', AllMoviesAPIView.as_view(), name='all-movies'),
+    path('trending/', TrendingMoviesAPIView.as_view(), name='trending-movies'),
 
     # Search 
     path('search/', MovieSearchAPIView.as_view(), name='movie-search'),
+    path('search/suggest/', SearchSuggestAPIView.as_view(), name='movie-search-suggest'),
 ]
\ No newline at end of file
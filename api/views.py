@@ -1,9 +1,11 @@
 from datetime import timedelta
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.mail import EmailMultiAlternatives
 from django.db import models
 from django.shortcuts import get_object_or_404
 from django.template.loader import render_to_string
+from django.utils.decorators import method_decorator
 from django.utils import timezone
 from rest_framework import permissions, status, viewsets
 from rest_framework.authentication import BasicAuthentication
@@ -13,15 +15,21 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from django.db.models import Count, Q, Case, When, Value, BooleanField
-from add_all.models import Add_departments, Add_movies, Comment, LikeDislike, MovieSeries, Notification, SavedFilm
+from add_all.models import (
+    Add_departments, Add_movies, Comment, LikeDislike, MovieSeries, Notification, SavedFilm, get_reader_key,
+)
 from users.models import PasswordResetToken, User
 from .serializers import *
-from django.db.models import Max, Case, When, Value, BooleanField, Count, Q
-from django.db.models.functions import Coalesce
 from rest_framework import generics
-from rest_framework.pagination import PageNumberPagination
-import requests
+from .cache import CatalogCacheMixin, catalog_version
+from .counters import record_view
+from .conditional import catalog_condition, movie_condition, movie_document
+from .documents import absolute_file_urls, movie_comments
+from .facets import apply_filters, get_facets, get_filters
+from .geo import fetch_geolocation, geolocation_cache, lookup_ip, vpn_verdict_cache
+from .pagination import CommentPagination, FeedPagination
+from .search import get_search_backend, get_suggest_index
+from .vpn import get_classifier
 
 class LoginView(APIView):
     authentication_classes = [BasicAuthentication]
@@ -67,6 +75,8 @@ class TotalMoviesCount(APIView):
         total = Add_movies.objects.count()
         return Response({"totalMovies": total})
 
+# 304 hujjat keshidan: versiya, jonli ustunlar va foydalanuvchi qismi bitta so'rovda (api/conditional.py)
+@method_decorator(movie_condition, name='retrieve')
 class OptimizedAddMoviesViewSet(ModelViewSet):
     authentication_classes = [JWTAuthentication]
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -87,17 +97,14 @@ class OptimizedAddMoviesViewSet(ModelViewSet):
         return super().update(request, *args, **kwargs)
 
     def get_queryset(self):
-        # 🔥 Bir xil tartiblash mantig'ini qo'llaymiz
-        queryset = Add_movies.objects.annotate(
-            latest_series_date=Max('series__created_at'),
-            latest_activity=Coalesce('latest_series_date', 'created_at')
-        ).order_by('-latest_activity')
+        # 🔥 Bir xil tartiblash mantig'ini qo'llaymiz (indekslangan latest_activity)
+        queryset = Add_movies.objects.select_related('add_departments').order_by('-latest_activity', '-id')
         
         movie_id = self.request.query_params.get('movie_id')
         if movie_id:
             queryset = queryset.filter(id=movie_id)
         
-        return queryset.distinct()
+        return queryset
 
     def get_client_ip(self, request):
         """Client IP manzilini olish"""
@@ -146,98 +153,25 @@ class OptimizedAddMoviesViewSet(ModelViewSet):
             return self.check_headers_for_uzbekistan(request)
 
     def get_geolocation_data(self, ip):
-        """Bir nechta API lar orqali geolocation ma'lumotlarini olish"""
-        apis = [
-            f'http://ip-api.com/json/{ip}?fields=status,country,countryCode,isp,org,as,proxy,hosting',
-            f'https://ipapi.co/{ip}/json/',
-            f'http://ipwho.is/{ip}'
-        ]
-        
-        for api_url in apis:
-            try:
-                response = requests.get(api_url, timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    # Har xil API lardan ma'lumotlarni standartlashtirish
-                    if 'ip-api.com' in api_url:
-                        return {
-                            'country': data.get('country', ''),
-                            'countryCode': data.get('countryCode', ''),
-                            'isp': data.get('isp', ''),
-                            'org': data.get('org', ''),
-                            'as': data.get('as', ''),
-                            'proxy': data.get('proxy', False),
-                            'hosting': data.get('hosting', False)
-                        }
-                    elif 'ipapi.co' in api_url:
-                        return {
-                            'country': data.get('country_name', ''),
-                            'countryCode': data.get('country_code', ''),
-                            'isp': data.get('org', ''),
-                            'org': data.get('org', ''),
-                            'as': data.get('asn', ''),
-                            'proxy': data.get('proxy', False),
-                            'hosting': data.get('hosting', False)
-                        }
-                    elif 'ipwho.is' in api_url:
-                        return {
-                            'country': data.get('country', ''),
-                            'countryCode': data.get('country_code', ''),
-                            'isp': data.get('connection', {}).get('isp', ''),
-                            'org': data.get('connection', {}).get('org', ''),
-                            'as': data.get('connection', {}).get('asn', ''),
-                            'proxy': data.get('connection', {}).get('proxy', False),
-                            'hosting': data.get('connection', {}).get('hosting', False)
-                        }
-            except Exception as e:
-                continue
-                
-        return None
+        """IP bo'yicha keshlangan geolocation (worker xotirasi + umumiy Django cache)"""
+        return geolocation_cache.get_or_compute(ip, lambda: self.resolve_geolocation(ip))
+
+    def resolve_geolocation(self, ip):
+        """
+        Avval lokal IP diapazonlar bazasi (mikrosekundlar), topilmasa va
+        GEOIP_HTTP_FALLBACK yoqilgan bo'lsa tashqi API lar
+        """
+        geo_data = lookup_ip(ip)
+        if geo_data is None and settings.GEOIP_HTTP_FALLBACK:
+            geo_data = fetch_geolocation(ip)
+        return geo_data
 
     def check_vpn_indicators(self, geo_data, ip):
-        """VPN bor-yo'qligini aniqlash"""
-        isp = geo_data.get('isp', '').lower()
-        org = geo_data.get('org', '').lower()
-        as_info = geo_data.get('as', '').lower()
-        
-        # 🔥 VPN PROVIDERLAR RO'YXATI
-        vpn_indicators = [
-            # Taniqli VPN kompaniyalari
-            'vpn', 'proxy', 'hosting', 'datacenter', 'server',
-            'expressvpn', 'nordvpn', 'surfshark', 'cyberghost',
-            'private internet access', 'windscribe', 'vyprvpn',
-            'ipvanish', 'hotspot shield', 'hide.me', 'purevpn',
-            'worldstream', 'digital ocean', 'amazon aws',
-            'google cloud', 'microsoft azure', 'linode', 'vultr',
-            'ovh', 'hetzner', 'alibaba cloud', 'tencent cloud',
-            'ibm cloud', 'oracle cloud'
-        ]
-        
-        # ISP, Org yoki AS da VPN belgilari borligini tekshirish
-        for indicator in vpn_indicators:
-            if (indicator in isp or 
-                indicator in org or 
-                indicator in as_info):
-                return True
-        
-        # Proxy yoki hosting maydonlari
-        if geo_data.get('proxy') or geo_data.get('hosting'):
-            return True
-            
-        # 🔥 YANGI: O'zbekiston ISP larini aniqlash
-        uzbek_telecom_indicators = [
-            'uzbektelekom', 'uztelecom', 'ucell', 'beeline uz', 
-            'mobiuz', 'ums', 'perfectum', 'uzmobile'
-        ]
-        
-        for telecom in uzbek_telecom_indicators:
-            if (telecom in isp or 
-                telecom in org or 
-                telecom in as_info):
-                return False  # O'zbekiston ISP - VPN emas
-        
-        return False
+        """VPN tekshiruvi natijasi IP va ro'yxat versiyasi bo'yicha keshlanadi"""
+        classifier = get_classifier()
+        return vpn_verdict_cache.get_or_compute(
+            f"{classifier.version}:{ip}", lambda: classifier.classify(geo_data).is_vpn
+        )
 
     def check_headers_for_uzbekistan(self, request):
         """Browser headers orqali O'zbekistonni tekshirish"""
@@ -258,70 +192,34 @@ class OptimizedAddMoviesViewSet(ModelViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         try:
-            # 🔥 Yangi tartiblash bilan filter qilish
-            instance = Add_movies.objects.annotate(
-                latest_series_date=Max('series__created_at'),
-                latest_activity=Coalesce(
-                    Max('series__created_at'), 
-                    'created_at'
-                )
-            ).filter(pk=kwargs['pk']).first()
+            # Hamma uchun bir xil qism keshdan (api/documents.py), ETag tekshiruvida olingan bo'lsa qayta olinmaydi
+            document, _, overlay = movie_document(request, kwargs['pk'])
             
-            if not instance:
+            if document is None:
                 return Response({"error": "Film topilmadi"}, status=status.HTTP_404_NOT_FOUND)
             
             # 🔥 DEBUG MA'LUMOTLARI
             client_ip = self.get_client_ip(request)
             
             # 🔥 YANGI TEKSHIRUV
-            if instance.is_possible:
+            if document['is_possible']:
                 is_uzbek = self.is_uzbekistan_user(request)
                 
                 if is_uzbek:
                     return Response({
                         "error": "Ushbu film O'zbekiston hududida ko'rsatilmaydi. Iltimos, VPN orqali kirib ko'ring.",
                         "is_blocked": True,
-                        "movie_name": instance.movies_name,
+                        "movie_name": document['movies_name'],
                         "requires_vpn": True,
                         "debug_info": {
                             "client_ip": client_ip,
-                            "is_possible": instance.is_possible
+                            "is_possible": document['is_possible']
                         }
                     }, status=status.HTTP_403_FORBIDDEN)
             
             # 🔥 MUHIM: Agar film bloklanmagan bo'lsa, NORMAL KODNI DAVOM ETTIRISH
-            # User-specific annotatsiyalar
-            queryset = Add_movies.objects.filter(pk=instance.pk)
-            
-            if request.user.is_authenticated:
-                queryset = queryset.annotate(
-                    is_saved=Case(
-                        When(Q(savedfilm__user=request.user), then=Value(True)),
-                        default=Value(False),
-                        output_field=BooleanField()
-                    ),
-                    like_count=Count('likedislike', filter=Q(likedislike__vote=True)),
-                    dislike_count=Count('likedislike', filter=Q(likedislike__vote=False)),
-                    user_vote=Case(
-                        When(Q(likedislike__user=request.user), then=Value('likedislike__vote')),
-                        default=Value(None),
-                        output_field=BooleanField()
-                    )
-                )
-            else:
-                queryset = queryset.annotate(
-                    is_saved=Value(False, output_field=BooleanField()),
-                    like_count=Count('likedislike', filter=Q(likedislike__vote=True)),
-                    dislike_count=Count('likedislike', filter=Q(likedislike__vote=False)),
-                    user_vote=Value(None, output_field=BooleanField())
-                )
-            
-            instance = queryset.select_related('add_departments').prefetch_related(
-                'series', 'movie_comments', 'movie_comments__user'
-            ).first()
-            
-            serializer = self.get_serializer(instance)
-            return Response(serializer.data)
+            # User-specific qism: is_saved va user_vote (hujjat bilan bitta so'rovda olingan)
+            return Response({**absolute_file_urls(document, request), **overlay})
             
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -372,7 +270,7 @@ class OptimizedSavedFilmsView(APIView):
     def get(self, request):
         saved_films = SavedFilm.objects.filter(user=request.user).select_related(
             'film', 'film__add_departments'
-        ).prefetch_related('film__series').order_by('-saved_at')
+        ).order_by('-saved_at')
         serializer = OptimizedSavedFilmSerializer(saved_films, many=True)
         return Response(serializer.data)
 
@@ -388,7 +286,7 @@ class OptimizedSavedFilmsView(APIView):
         saved_film, created = SavedFilm.objects.get_or_create(user=request.user, film=film)
         saved_films = SavedFilm.objects.filter(user=request.user).select_related(
             'film', 'film__add_departments'
-        ).prefetch_related('film__series').order_by('-saved_at')
+        ).order_by('-saved_at')
         serializer = OptimizedSavedFilmSerializer(saved_films, many=True)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -400,12 +298,27 @@ class OptimizedSavedFilmsView(APIView):
             saved_film.delete()
             saved_films = SavedFilm.objects.filter(user=request.user).select_related(
                 'film', 'film__add_departments'
-            ).prefetch_related('film__series').order_by('-saved_at')
+            ).order_by('-saved_at')
             serializer = OptimizedSavedFilmSerializer(saved_films, many=True)
             return Response(serializer.data)
         except SavedFilm.DoesNotExist:
             return Response({"detail": "Film saqlanganlar ro'yxatida topilmadi."}, status=status.HTTP_404_NOT_FOUND)
 
+class MovieCommentsAPIView(generics.ListAPIView):
+    permission_classes = [permissions.AllowAny]
+    serializer_class = OptimizedCommentSerializer
+    pagination_class = CommentPagination
+
+    def get_queryset(self):
+        return movie_comments(self.kwargs['movie_id'])
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        # Bo'sh sahifada film umuman bormi - faqat shu holatda qo'shimcha so'rov
+        if not response.data['data'] and not Add_movies.objects.filter(pk=self.kwargs['movie_id']).exists():
+            return Response({"error": "Film topilmadi"}, status=status.HTTP_404_NOT_FOUND)
+        return response
+
 class CommentViewSet(viewsets.ModelViewSet):
     queryset = Comment.objects.all().order_by("-created_at")
     serializer_class = OptimizedCommentSerializer
@@ -438,10 +351,8 @@ class VoteMovie(APIView):
 class GetVotes(APIView):
     def get(self, request, movie_id):
         try:
-            movie = Add_movies.objects.get(id=movie_id)
-            like_count = LikeDislike.objects.filter(movie=movie, vote=True).count()
-            dislike_count = LikeDislike.objects.filter(movie=movie, vote=False).count()
-            return Response({"like_count": like_count, "dislike_count": dislike_count})
+            counts = Add_movies.objects.values("like_count", "dislike_count").get(id=movie_id)
+            return Response(counts)
         except Add_movies.DoesNotExist:
             return Response({"error": "Movie not found"}, status=404)
 
@@ -457,13 +368,10 @@ class CheckVote(APIView):
     def get(self, request, movie_id):
         movie = get_object_or_404(Add_movies, id=movie_id)
         if request.user.is_authenticated:
-            vote = LikeDislike.objects.filter(user=request.user, movie=movie).first()
+            voter_key = LikeDislike.make_voter_key(user_id=request.user.pk)
         else:
-            ip = self.get_client_ip(request)
-            session_key = request.session.session_key
-            vote = LikeDislike.objects.filter(
-                models.Q(ip_address=ip) | models.Q(session_key=session_key), movie=movie
-            ).first()
+            voter_key = LikeDislike.make_voter_key(ip_address=self.get_client_ip(request))
+        vote = LikeDislike.objects.filter(movie=movie, voter_key=voter_key).first()
         if vote:
             return Response({"vote": vote.vote, "can_change": True})
         return Response({"vote": None, "can_change": True})
@@ -478,48 +386,50 @@ class CreateVote(APIView):
         return ip
 
     def post(self, request, movie_id):
-        movie = get_object_or_404(Add_movies, id=movie_id)
         vote = request.data.get("vote")
         if vote is None:
             return Response({"error": "Vote not provided"}, status=400)
+        try:
+            vote = LikeDislike._meta.get_field("vote").to_python(vote)
+        except ValidationError:
+            return Response({"error": "Vote must be true or false"}, status=400)
 
         if request.user.is_authenticated:
-            existing_vote = LikeDislike.objects.filter(user=request.user, movie=movie).first()
-            if existing_vote:
-                existing_vote.vote = vote
-                existing_vote.save()
-                message = "Vote updated successfully"
-            else:
-                LikeDislike.objects.create(user=request.user, movie=movie, vote=vote)
-                message = "Vote created successfully"
+            fields = {"user": request.user}
+            voter_key = LikeDislike.make_voter_key(user_id=request.user.pk)
         else:
+            # Anonim ovoz IP bo'yicha bitta (sessiya yaratish uchun alohida yozuv shart emas)
             ip = self.get_client_ip(request)
-            session_key = request.session.session_key
-            if not session_key:
-                request.session.create()
-                session_key = request.session.session_key
-            existing_vote = LikeDislike.objects.filter(
-                models.Q(ip_address=ip) | models.Q(session_key=session_key), movie=movie
-            ).first()
-            if existing_vote:
-                existing_vote.vote = vote
-                existing_vote.save()
-                message = "Vote updated successfully"
-            else:
-                LikeDislike.objects.create(movie=movie, vote=vote, ip_address=ip, session_key=session_key)
-                message = "Vote created successfully"
+            fields = {"ip_address": ip, "session_key": request.session.session_key}
+            voter_key = LikeDislike.make_voter_key(ip_address=ip)
+
+        try:
+            state, counts = LikeDislike.objects.cast(movie_id, voter_key, vote, **fields)
+        except Add_movies.DoesNotExist:
+            return Response({"error": "Movie not found"}, status=404)
 
-        like_count = LikeDislike.objects.filter(movie=movie, vote=True).count()
-        dislike_count = LikeDislike.objects.filter(movie=movie, vote=False).count()
-        return Response({"like_count": like_count, "dislike_count": dislike_count, "message": message})
+        message = "Vote created successfully" if state == "created" else "Vote updated successfully"
+        return Response({**counts, "message": message})
+
+class NotificationPagination(FeedPagination):
+    page_size = 20
+    cursor_ordering = ('-id',)
+    cursor_only = True
 
 class NotificationListView(APIView):
     permission_classes = [permissions.AllowAny]
+    pagination_class = NotificationPagination
 
     def get(self, request):
-        notifications = Notification.objects.all().order_by("-created_at")
-        serializer = NotificationSerializer(notifications, many=True, context={"request": request})
-        return Response(serializer.data)
+        paginator = self.pagination_class()
+        notifications = paginator.paginate_queryset(Notification.objects.all(), request, view=self)
+        watermark, read_ids = Notification.objects.read_state(
+            get_reader_key(request), [notification.pk for notification in notifications]
+        )
+        serializer = NotificationSerializer(notifications, many=True, context={
+            "request": request, "watermark": watermark, "read_ids": read_ids,
+        })
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         serializer = NotificationSerializer(data=request.data)
@@ -541,16 +451,10 @@ class UnreadNotificationCount(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
-        if request.user.is_authenticated:
-            unread_count = Notification.objects.exclude(read_by=request.user).count()
-        else:
-            ip = self.get_client_ip(request)
-            if not ip:
-                return Response({"unread_count": Notification.objects.count()})
-            unread_count = Notification.objects.extra(
-                where=["NOT read_by_ips LIKE %s"], params=[f"%{ip}%"]
-            ).count()
-        return Response({"unread_count": unread_count})
+        reader_key = get_reader_key(request)
+        if not reader_key:
+            return Response({"unread_count": Notification.objects.count()})
+        return Response({"unread_count": Notification.objects.unread_count(reader_key)})
 
     def get_client_ip(self, request):
         x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
@@ -560,6 +464,16 @@ class UnreadNotificationCount(APIView):
             ip = request.META.get("REMOTE_ADDR")
         return ip
 
+class NotificationMarkAllReadView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        reader_key = get_reader_key(request)
+        if not reader_key:
+            return Response({"error": "O'quvchini aniqlab bo'lmadi"}, status=status.HTTP_400_BAD_REQUEST)
+        last_seen_id = Notification.objects.mark_all_read(reader_key)
+        return Response({"last_seen_id": last_seen_id, "unread_count": 0})
+
 class NotificationDetailView(APIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -586,10 +500,8 @@ class NotificationReadView(APIView):
 
     def patch(self, request, pk):
         notification = get_object_or_404(Notification, pk=pk)
-        if notification.read_by.filter(id=request.user.id).exists():
+        if not notification.mark_as_read(request, count_view=False):
             return Response({"message": "Already read"}, status=status.HTTP_200_OK)
-        notification.read_by.add(request.user)
-        notification.save()
         return Response({"message": "Notification marked as read"})
 
 class PasswordResetRequestView(APIView):
@@ -631,41 +543,50 @@ class SimilarMoviesAPIView(APIView):
     
     def get(self, request):
         movie_id = request.query_params.get('movie_id')
-        limit = int(request.query_params.get('limit', 30))
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', settings.SIMILAR_TOP_K)), settings.SIMILAR_TOP_K))
+        except ValueError:
+            limit = settings.SIMILAR_TOP_K
         
         if not movie_id:
             return Response({"error": "movie_id parametri kerak"}, status=400)
         
-        try:
-            current_movie = Add_movies.objects.only('add_departments_id').get(id=movie_id)
+        fields = (
+            'id', 'add_departments_id', 'add_departments__department_name', 'movies_preview_url',
+            'movies_name', 'movies_description', 'country',
+        )
+        # Oldindan hisoblangan qo'shnilar (api/similarity.py): bitta indeksli so'rov
+        similar_movies = list(
+            Add_movies.objects.filter(similar_to__movie_id=movie_id)
+            .select_related('add_departments').only(*fields)
+            .order_by('similar_to__rank')[:limit]
+        )
+        if not similar_movies:
+            # Hali hisoblanmagan yangi film - shu bo'limdagi filmlar
+            try:
+                current_movie = Add_movies.objects.only('add_departments_id').get(id=movie_id)
+            except Add_movies.DoesNotExist:
+                return Response({"error": "Film topilmadi"}, status=404)
             similar_movies = Add_movies.objects.filter(
                 add_departments_id=current_movie.add_departments_id
-            ).exclude(id=movie_id).only(
-                'id', 'add_departments_id', 'movies_preview_url', 
-                'movies_name', 'movies_description', 'country'
-            )[:limit]
-            
-            serializer = SimilarMoviesSerializer(similar_movies, many=True)
-            return Response(serializer.data)
-            
-        except Add_movies.DoesNotExist:
-            return Response({"error": "Film topilmadi"}, status=404)
+            ).exclude(id=movie_id).select_related('add_departments').only(*fields)[:limit]
+
+        serializer = SimilarMoviesSerializer(similar_movies, many=True)
+        return Response(serializer.data)
 
 class IncrementMovieCountAPIView(APIView):
     permission_classes = [permissions.AllowAny]
     
     def post(self, request, movie_id):
         try:
-            updated = Add_movies.objects.filter(id=movie_id).update(
-                count=models.F('count') + 1
-            )
-            
-            if updated:
-                movie = Add_movies.objects.get(id=movie_id)
+            # Issiq qatorga UPDATE o'rniga umumiy buferga INSERT (api/counters.py)
+            new_count = record_view(movie_id)
+
+            if new_count is not None:
                 return Response({
                     "success": True, 
                     "message": "Count muvaffaqiyatli oshirildi",
-                    "new_count": movie.count
+                    "new_count": new_count
                 })
             else:
                 return Response({
@@ -673,54 +594,48 @@ class IncrementMovieCountAPIView(APIView):
                     "error": "Film topilmadi"
                 }, status=404)
                 
-        except Add_movies.DoesNotExist:
-            return Response({
-                "success": False,
-                "error": "Film topilmadi"
-            }, status=404)
         except Exception as e:
             return Response({
                 "success": False,
                 "error": f"Server xatosi: {str(e)}"
             }, status=500)
 
-class DepartmentPagination(PageNumberPagination):
+class FeedQuerysetMixin:
+    """
+    Feed endpointlari uchun umumiy queryset qatlami.
+    Har bir endpoint feed_fields da serializer o'qiydigan ustunlarni e'lon qiladi,
+    department esa select_related orqali o'sha SELECT ning o'zida olinadi.
+    """
+    feed_fields = ()
+    # Tartiblash va cursor pagination uchun har doim kerak bo'ladigan ustunlar
+    base_feed_fields = ('id', 'add_departments', 'latest_activity')
+    department_fields = ('add_departments__id', 'add_departments__department_name')
+
+    def get_feed_queryset(self):
+        return Add_movies.objects.select_related('add_departments').only(
+            *self.base_feed_fields, *self.feed_fields, *self.department_fields
+        ).order_by('-latest_activity', '-id')
+
+class DepartmentPagination(FeedPagination):
     page_size = 16
     page_size_query_param = 'page_size'
     max_page_size = 100
 
-class DepartmentMoviesAPIView(generics.ListAPIView):
+class DepartmentMoviesAPIView(FeedQuerysetMixin, generics.ListAPIView):
     permission_classes = [permissions.AllowAny]
     serializer_class = DepartmentMoviesSerializer
     pagination_class = DepartmentPagination
+    feed_fields = ('movies_name', 'movies_preview_url', 'country', 'count', 'series_count', 'all_series')
     
     def get_queryset(self):
         department_id = self.kwargs['department_id']
         
         # 🔥 Yangi tartiblash
-        queryset = Add_movies.objects.filter(
+        queryset = self.get_feed_queryset().filter(
             add_departments_id=department_id
-        ).annotate(
-            latest_series_date=Max('series__created_at'),
-            latest_activity=Coalesce('latest_series_date', 'created_at')
-        ).order_by('-latest_activity')
+        )
         
         return queryset
-    
-    def list(self, request, *args, **kwargs):
-        response = super().list(request, *args, **kwargs)
-        response.data = {
-            'data': response.data['results'],
-            'pagination': {
-                'count': response.data['count'],
-                'total_pages': response.data['count'] // self.pagination_class.page_size + 1,
-                'current_page': int(request.GET.get('page', 1)),
-                'page_size': self.pagination_class.page_size,
-                'next': response.data['next'],
-                'previous': response.data['previous'],
-            }
-        }
-        return response
 
 class PasswordResetVerifyView(APIView):
     def post(self, request):
@@ -774,15 +689,14 @@ class PasswordResetConfirmView(APIView):
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-class SwiperMoviesAPIView(generics.ListAPIView):
+class SwiperMoviesAPIView(CatalogCacheMixin, FeedQuerysetMixin, generics.ListAPIView):
     serializer_class = SwiperMoviesSerializer
+    cache_name = 'swiper'
+    feed_fields = ('movies_name', 'movies_preview_url')
     
     def get_queryset(self):
         # 🔥 Yangi tartiblash
-        queryset = Add_movies.objects.annotate(
-            latest_series_date=Max('series__created_at'),
-            latest_activity=Coalesce('latest_series_date', 'created_at')
-        ).order_by('-latest_activity')[:8]
+        queryset = self.get_feed_queryset()[:8]
         
         return queryset
     
@@ -793,15 +707,17 @@ class SwiperMoviesAPIView(generics.ListAPIView):
         }
         return response
 
-class HomeMoviesAPIView(generics.ListAPIView):
+@method_decorator(catalog_condition, name='list')
+class HomeMoviesAPIView(CatalogCacheMixin, FeedQuerysetMixin, generics.ListAPIView):
     serializer_class = HomeMoviesSerializer
+    cache_name = 'home'
+    feed_fields = (
+        'movies_name', 'movies_preview_url', 'country', 'count', 'series_count', 'all_series', 'created_at'
+    )
     
     def get_queryset(self):
         # 🔥 Yangi tartiblash - eng oxirgi faoliyat bo'yicha
-        queryset = Add_movies.objects.annotate(
-            latest_series_date=Max('series__created_at'),
-            latest_activity=Coalesce('latest_series_date', 'created_at')
-        ).order_by('-latest_activity')
+        queryset = self.get_feed_queryset()
         
         queryset = queryset.exclude(
             add_departments__department_name__icontains="Treylerlar"
@@ -815,9 +731,37 @@ class HomeMoviesAPIView(generics.ListAPIView):
         }
         return response
 
-class DepartmentsViewSet(ModelViewSet):
+class TrendingMoviesAPIView(FeedQuerysetMixin, generics.ListAPIView):
+    """Yaqinda eng ko'p ko'rilganlar: trending_score indeksidan top-N (api/trending.py)"""
+    serializer_class = HomeMoviesSerializer
+    permission_classes = [permissions.AllowAny]
+    feed_fields = (
+        'movies_name', 'movies_preview_url', 'country', 'count', 'series_count', 'all_series', 'created_at'
+    )
+
+    def get_queryset(self):
+        try:
+            limit = max(1, min(int(self.request.GET.get('limit', settings.TRENDING_SIZE)), 100))
+        except ValueError:
+            limit = settings.TRENDING_SIZE
+        queryset = self.get_feed_queryset().filter(trending_score__gt=0).exclude(
+            add_departments__department_name__icontains="Treylerlar"
+        )
+        return queryset.order_by('-trending_score', '-id')[:limit]
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        response.data = {
+            'data': response.data
+        }
+        return response
+
+@method_decorator(catalog_condition, name='list')
+@method_decorator(catalog_condition, name='retrieve')
+class DepartmentsViewSet(CatalogCacheMixin, ModelViewSet):
     authentication_classes = [JWTAuthentication]
     serializer_class = DepartmentsSerializer
+    cache_name = 'departments'
     queryset = Add_departments.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
@@ -835,20 +779,19 @@ class DepartmentsViewSet(ModelViewSet):
         }
         return response
 
-class TrailersAPIView(generics.ListAPIView):
+class TrailersAPIView(CatalogCacheMixin, FeedQuerysetMixin, generics.ListAPIView):
     """
     Faqat Treylerlar departmentidagi filmlarni qaytaradi
     """
     serializer_class = TrailersSerializer
+    cache_name = 'trailers'
+    feed_fields = ('movies_name', 'movies_preview_url', 'country', 'count', 'series_count', 'all_series')
     
     def get_queryset(self):
         # 🔥 Yangi tartiblash
-        queryset = Add_movies.objects.filter(
+        queryset = self.get_feed_queryset().filter(
             add_departments__department_name__icontains="Treylerlar"
-        ).annotate(
-            latest_series_date=Max('series__created_at'),
-            latest_activity=Coalesce('latest_series_date', 'created_at')
-        ).order_by('-latest_activity')
+        )
         
         return queryset
     
@@ -859,45 +802,48 @@ class TrailersAPIView(generics.ListAPIView):
         }
         return response
     
-class CustomPagination(PageNumberPagination):
+class CustomPagination(FeedPagination):
     page_size = 16 
     page_size_query_param = 'page_size'
     max_page_size = 100
 
-class AllMoviesAPIView(generics.ListAPIView):
+@method_decorator(catalog_condition, name='list')
+class AllMoviesAPIView(FeedQuerysetMixin, generics.ListAPIView):
     serializer_class = AllMoviesSerializer
     pagination_class = CustomPagination
+    feed_fields = ('movies_name', 'movies_preview_url', 'country', 'count', 'series_count', 'all_series')
     
-    def get_queryset(self):
-        # 🔥 Yangi tartiblash
-        queryset = Add_movies.objects.annotate(
-            latest_series_date=Max('series__created_at'),
-            latest_activity=Coalesce('latest_series_date', 'created_at')
-        ).order_by('-latest_activity')
-        
-        queryset = queryset.exclude(
+    def exclude_trailers(self, queryset):
+        return queryset.exclude(
             add_departments__department_name__icontains="Treylerlar"
         )
-        return queryset
-    
+
+    def get_queryset(self):
+        # 🔥 Yangi tartiblash
+        queryset = self.exclude_trailers(self.get_feed_queryset())
+        # ?genre=, ?year=, ?country= (api/facets.py)
+        return apply_filters(queryset, get_filters(self.request))
+
     def list(self, request, *args, **kwargs):
         response = super().list(request, *args, **kwargs)
-        response.data = {
-            'data': response.data['results'],
-            'pagination': {
-                'count': response.data['count'],
-                'total_pages': response.data['count'] // self.pagination_class.page_size + 1,
-                'current_page': int(request.GET.get('page', 1)),
-                'page_size': self.pagination_class.page_size,
-                'next': response.data['next'],
-                'previous': response.data['previous'],
-            }
-        }
+        if request.query_params.get('facets', '').lower() in ('1', 'true'):
+            # Sidebar hisoblari keshdan: sahifa so'rovlari + versiya tekshiruvi
+            response.data['facets'] = get_facets(
+                'all-movies', self.exclude_trailers(Add_movies.objects.all()), get_filters(request),
+                catalog_version(request).version,
+            )
         return response
 
-class MovieSearchAPIView(generics.ListAPIView):
+class MovieSearchAPIView(FeedQuerysetMixin, generics.ListAPIView):
+    """
+    Nom (har qanday joyidan, 1-2 harfli so'rovlar ham), janr bo'yicha va xato yozilganda taxminiy qidiruv.
+    Natijalar eng mosidan boshlab SEARCH_MAX_RESULTS (standart 100) ta bilan cheklanadi.
+    """
     serializer_class = MovieSearchSerializer
     permission_classes = [permissions.AllowAny]
+    feed_fields = (
+        'movies_name', 'movies_preview_url', 'country', 'count', 'year', 'all_series', 'series_count', 'created_at'
+    )
     
     def get_queryset(self):
         query = self.request.GET.get('q', '').strip()
@@ -905,22 +851,36 @@ class MovieSearchAPIView(generics.ListAPIView):
         if not query:
             return Add_movies.objects.none()
         
-        # 🔥 Yangi tartiblash bilan qidiruv
-        queryset = Add_movies.objects.filter(
-            Q(movies_name__icontains=query) |
-            Q(movies_name__istartswith=query)
-        ).annotate(
-            latest_series_date=Max('series__created_at'),
-            latest_activity=Coalesce('latest_series_date', 'created_at')
-        ).order_by('-latest_activity')
-        
-        return queryset
+        # 🔥 Qidiruv backend idan (trigram indeks yoki FTS) tartiblangan id lar, so'ng bitta id__in so'rovi
+        self.ranked_ids = get_search_backend().search(query)
+        return self.get_feed_queryset().filter(id__in=self.ranked_ids).order_by()
     
     def list(self, request, *args, **kwargs):
-        response = super().list(request, *args, **kwargs)
+        queryset = self.get_queryset()
+        position = {pk: index for index, pk in enumerate(getattr(self, 'ranked_ids', []))}
+        movies = sorted(queryset, key=lambda movie: position[movie.pk])
+        response = Response(self.get_serializer(movies, many=True).data)
         response.data = {
             'data': response.data,
             'query': request.GET.get('q', ''),
             'count': len(response.data)
         }
-        return response
\ No newline at end of file
+        return response
+
+
+class SearchSuggestAPIView(APIView):
+    """Har bir tugma bosilishi uchun: bazasiz, faqat id va nom (api/search.py SuggestIndex)"""
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        query = request.GET.get('q', '').strip()
+        try:
+            limit = max(1, int(request.GET.get('limit', settings.SUGGEST_TOP_K)))
+        except ValueError:
+            limit = settings.SUGGEST_TOP_K
+        suggestions = get_suggest_index().suggest(query, limit) if query else []
+        return Response({
+            'query': query,
+            'data': [{'id': pk, 'movies_name': name} for pk, name in suggestions],
+        })
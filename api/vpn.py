@@ -0,0 +1,121 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+
+Verdict = namedtuple("Verdict", ["is_vpn", "reason"])
+
+ASN_RE = re.compile(r"^\s*(?:as)?(\d+)", re.IGNORECASE)
+
+
+def compile_names(names):
+    """
+    Nomlarni prefiks daraxti (trie) ko'rinishidagi bitta regexga yig'adi:
+    umumiy prefikslar bir marta tekshiriladi, ro'yxat kattalashsa ham matn bir marta o'tiladi.
+    """
+    trie = {}
+    for name in names:
+        node = trie
+        for char in name:
+            node = node.setdefault(char, {})
+        node[""] = None
+
+    def emit(node):
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        optional = "" in node
+        body = branches[0] if len(branches) == 1 and not optional else "(?:%s)" % "|".join(branches)
+        return body + ("?" if optional else "")
+
+    return re.compile(emit(trie)) if trie else None
+
+
+class NetworkClassifier:
+    """
+    Provayder nomlari va ASN ro'yxatidan tuzilgan VPN/hosting klassifikatori.
+    ASN aniq moslik bilan (set), nomlar esa kompilyatsiya qilingan trie-regex bilan tekshiriladi.
+    """
+
+    def __init__(self, vpn=(), vpn_asns=(), telecom=(), telecom_asns=(), version=None):
+        self.version = version
+        self.vpn_asns = frozenset(int(asn) for asn in vpn_asns)
+        self.telecom_asns = frozenset(int(asn) for asn in telecom_asns)
+        self.vpn_pattern = compile_names({name.lower() for name in vpn})
+        self.telecom_pattern = compile_names({name.lower() for name in telecom})
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        return cls(
+            vpn=data.get("vpn", ()),
+            vpn_asns=data.get("vpn_asns", ()),
+            telecom=data.get("telecom", ()),
+            telecom_asns=data.get("telecom_asns", ()),
+            version=os.stat(path).st_mtime_ns,
+        )
+
+    def classify(self, geo_data):
+        isp = str(geo_data.get("isp") or "")
+        org = str(geo_data.get("org") or "")
+        as_info = str(geo_data.get("as") or "")
+
+        match = ASN_RE.match(as_info)
+        asn = int(match.group(1)) if match else None
+        if asn in self.vpn_asns:
+            return Verdict(True, f"asn:AS{asn}")
+
+        haystack = f"{isp}\n{org}\n{as_info}".lower()
+        found = self.vpn_pattern.search(haystack) if self.vpn_pattern else None
+        if found:
+            return Verdict(True, f"provider:{found.group(0)}")
+
+        if geo_data.get("proxy"):
+            return Verdict(True, "proxy_flag")
+        if geo_data.get("hosting"):
+            return Verdict(True, "hosting_flag")
+        if asn in self.telecom_asns:
+            return Verdict(False, f"telecom_asn:AS{asn}")
+        found = self.telecom_pattern.search(haystack) if self.telecom_pattern else None
+        if found:
+            return Verdict(False, f"telecom:{found.group(0)}")
+        return Verdict(False, "no_indicator")
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+_classifier_checked_at = 0.0
+_classifier_path = None
+
+
+def get_classifier():
+    """
+    Ro'yxat fayli (VPN_PROVIDERS_PATH) o'zgarsa VPN_PROVIDERS_RELOAD_INTERVAL
+    soniya ichida qayta yuklanadi - deploy shart emas.
+    """
+    global _classifier, _classifier_checked_at, _classifier_path
+    now = time.monotonic()
+    path = settings.VPN_PROVIDERS_PATH
+    if (
+        _classifier is not None
+        and _classifier_path == path
+        and now - _classifier_checked_at < settings.VPN_PROVIDERS_RELOAD_INTERVAL
+    ):
+        return _classifier
+
+    with _classifier_lock:
+        _classifier_checked_at = now
+        try:
+            if _classifier is None or _classifier_path != path or os.stat(path).st_mtime_ns != _classifier.version:
+                _classifier = NetworkClassifier.from_file(path)
+        except (OSError, ValueError):
+            # Buzuq fayl: oldingi ro'yxat bilan ishlashda davom etamiz
+            if _classifier is None:
+                _classifier = NetworkClassifier()
+        _classifier_path = path
+        return _classifier
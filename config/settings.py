@@ -91,6 +91,91 @@ ASGI_APPLICATION = "config.asgi.application"
 
 DATABASES = {"default": env.db()}
 
+# Umumiy kesh bo'lmasa lokal xotira ishlatiladi
+# (masalan CACHE_URL=filecache:///var/tmp/anime_cache yoki redis://redis:6379/1)
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
+# Katalog javoblari versiya bo'yicha keshlanadi, count (ko'rishlar) shu muddatda yangilanadi
+CATALOG_CACHE_TIMEOUT = env.int("CATALOG_CACHE_TIMEOUT", default=300)
+# Film sahifasi hujjati (api/documents.py) keshi: eskirishini document_version aniqlaydi, muddat faqat xotira uchun
+MOVIE_DOCUMENT_TIMEOUT = env.int("MOVIE_DOCUMENT_TIMEOUT", default=300)
+
+# O'qilmagan bildirishnomalar soni keshi (yangi bildirishnoma yoki o'qishda darhol yangilanadi)
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = env.int("NOTIFICATION_UNREAD_CACHE_TIMEOUT", default=3600)
+
+# Offline IP -> davlat/ASN bazasi (python manage.py refresh_geoip bilan yangilanadi)
+GEOIP_DB_PATH = env("GEOIP_DB_PATH", default=os.path.join(BASE_DIR, "geoip", "ip2asn.bin"))
+GEOIP_SOURCE_URL = env("GEOIP_SOURCE_URL", default="https://iptoasn.com/data/ip2asn-combined.tsv.gz")
+GEOIP_DB_RELOAD_INTERVAL = env.int("GEOIP_DB_RELOAD_INTERVAL", default=60)
+# run_scheduler bazani shu oraliqda (soniya) qayta yuklaydi; yo'q bo'lsa docker-entrypoint.sh yuklaydi
+# va `check --deploy --tag geoip` (api/checks.py) ishga tushirishni to'xtatadi
+GEOIP_REFRESH_INTERVAL = env.int("GEOIP_REFRESH_INTERVAL", default=24 * 60 * 60)
+# Lokal bazada IP topilmasa tashqi HTTP geo API larga murojaat qilish
+GEOIP_HTTP_FALLBACK = env.bool("GEOIP_HTTP_FALLBACK", default=False)
+# IP bo'yicha geo natijalar keshi (soniya); topilmagan natijalar qisqaroq saqlanadi
+GEOIP_CACHE_TTL = env.int("GEOIP_CACHE_TTL", default=6 * 60 * 60)
+GEOIP_NEGATIVE_CACHE_TTL = env.int("GEOIP_NEGATIVE_CACHE_TTL", default=5 * 60)
+# Fallback provayderlari bir vaqtda so'raladi, birinchi yaroqli javob olinadi
+GEOIP_PROVIDERS = [
+    {
+        "name": "ip-api.com",
+        "url": "http://ip-api.com/json/{ip}?fields=status,country,countryCode,isp,org,as,proxy,hosting",
+        "format": "ip-api",
+    },
+    {"name": "ipapi.co", "url": "https://ipapi.co/{ip}/json/", "format": "ipapi.co"},
+    {"name": "ipwho.is", "url": "http://ipwho.is/{ip}", "format": "ipwho.is"},
+]
+GEOIP_PROVIDER_DEADLINE = env.float("GEOIP_PROVIDER_DEADLINE", default=1.5)
+GEOIP_BREAKER_FAILURES = env.int("GEOIP_BREAKER_FAILURES", default=3)
+GEOIP_BREAKER_RESET = env.int("GEOIP_BREAKER_RESET", default=60)
+# Bitta provayderga bir vaqtda (deadline dan keyin davom etayotganlari bilan) ko'pi bilan shuncha so'rov
+GEOIP_PROVIDER_MAX_IN_FLIGHT = env.int("GEOIP_PROVIDER_MAX_IN_FLIGHT", default=2)
+
+# VPN/hosting provayderlari ro'yxati (nomlar + ASN), fayl o'zgarsa avtomatik qayta yuklanadi
+VPN_PROVIDERS_PATH = env(
+    "VPN_PROVIDERS_PATH", default=os.path.join(BASE_DIR, "api", "data", "network_providers.json")
+)
+VPN_PROVIDERS_RELOAD_INTERVAL = env.int("VPN_PROVIDERS_RELOAD_INTERVAL", default=30)
+
+# Qidiruv: "memory" - xotiradagi trigram indeks, "database" - SQLite FTS5 / PostgreSQL tsvector (api/search.py)
+SEARCH_BACKEND = env("SEARCH_BACKEND", default="memory")
+# Relevantlik * (1 + og'irlik * ln(1 + count))
+SEARCH_POPULARITY_WEIGHT = env.float("SEARCH_POPULARITY_WEIGHT", default=0.1)
+# /search/ faqat shuncha eng mos filmni qaytaradi (sahifalash yo'q, oldingi icontains cheklanmagan edi)
+SEARCH_MAX_RESULTS = env.int("SEARCH_MAX_RESULTS", default=100)
+# Boshqa worker o'zgarishlari shu oraliqda tekshiriladi, indeks fonda qayta quriladi
+SEARCH_INDEX_CHECK_INTERVAL = env.float("SEARCH_INDEX_CHECK_INTERVAL", default=5.0)
+SEARCH_FUZZY_MIN_LENGTH = env.int("SEARCH_FUZZY_MIN_LENGTH", default=4)
+SEARCH_FUZZY_THRESHOLD = env.float("SEARCH_FUZZY_THRESHOLD", default=0.6)
+SEARCH_RESULT_CACHE_SIZE = env.int("SEARCH_RESULT_CACHE_SIZE", default=1024)
+
+# /search/suggest/: prefiks bo'yicha eng mashhur SUGGEST_TOP_K ta film
+SUGGEST_TOP_K = env.int("SUGGEST_TOP_K", default=10)
+# Shundan katta oraliqli prefikslar uchun top-k oldindan hisoblanadi
+SUGGEST_SCAN_LIMIT = env.int("SUGGEST_SCAN_LIMIT", default=64)
+# count (mashhurlik) katalog versiyasini oshirmaydi, shuning uchun davriy (fonda) qayta quriladi
+SUGGEST_REBUILD_INTERVAL = env.int("SUGGEST_REBUILD_INTERVAL", default=600)
+
+# O'xshash filmlar (api/similarity.py): har film uchun saqlanadigan qo'shnilar soni
+SIMILAR_TOP_K = env.int("SIMILAR_TOP_K", default=30)
+# Bir vaqtda hisoblanadigan qatorlar: xotira ~ SIMILAR_CHUNK_SIZE * filmlar soni * 12 bayt
+SIMILAR_CHUNK_SIZE = env.int("SIMILAR_CHUNK_SIZE", default=128)
+SIMILAR_WRITE_BATCH = env.int("SIMILAR_WRITE_BATCH", default=1000)
+# run_scheduler rebuild_similar_movies ni (o'zgarganlar uchun) shu oraliqda (soniya) chaqiradi
+SIMILAR_UPDATE_INTERVAL = env.int("SIMILAR_UPDATE_INTERVAL", default=60 * 60)
+
+# Ko'rishlar buferi (MovieViewDelta) run_scheduler da shu oraliqda (soniya) yig'iladi
+VIEW_COUNT_FLUSH_INTERVAL = env.float("VIEW_COUNT_FLUSH_INTERVAL", default=5.0)
+
+# Trending (api/trending.py): ko'rishlar soatlik bucketlarda, ball yarim yemirilish davri bilan so'nadi
+TRENDING_HALF_LIFE_HOURS = env.float("TRENDING_HALF_LIFE_HOURS", default=36)
+# Shundan eski soatlik bucketlar kunlikka yig'iladi, TRENDING_RETENTION_DAYS dan eskilari o'chiriladi
+TRENDING_HOURLY_HOURS = env.int("TRENDING_HOURLY_HOURS", default=48)
+TRENDING_RETENTION_DAYS = env.int("TRENDING_RETENTION_DAYS", default=14)
+TRENDING_SIZE = env.int("TRENDING_SIZE", default=20)
+# run_scheduler update_trending ni shu oraliqda (soniya) chaqiradi
+TRENDING_UPDATE_INTERVAL = env.int("TRENDING_UPDATE_INTERVAL", default=10 * 60)
+
 AUTH_USER_MODEL = "users.User"
 AUTHENTICATION_BACKENDS = ("django.contrib.auth.backends.ModelBackend",)
 
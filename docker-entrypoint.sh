@@ -0,0 +1,14 @@
+#!/bin/sh
+set -e
+
+# IP bazasi bo'lmasa yuklanadi; yuklab bo'lmasa va GEOIP_HTTP_FALLBACK o'chirilgan bo'lsa
+# tekshiruv xato beradi - IP cheklovisiz ishga tushmaymiz
+python manage.py refresh_geoip --if-stale || echo "refresh_geoip bajarilmadi" >&2
+python manage.py check --deploy --tag geoip
+
+# Davriy ishlar (ko'rishlar buferi, trending, o'xshash filmlar, IP bazasi) - bitta konteynerda
+if [ "${SCHEDULER_ENABLED:-1}" = "1" ]; then
+    python manage.py run_scheduler &
+fi
+
+exec "$@"
@@ -0,0 +1,12 @@
+# gunicorn joriy papkadagi shu faylni avtomatik o'qiydi (Dockerfile CMD)
+
+
+def post_worker_init(worker):
+    # Xotiradagi qidiruv indekslari worker so'rov qabul qilishidan oldin quriladi (api/search.py)
+    from api.search import warm_search_indexes
+
+    try:
+        warm_search_indexes()
+    except Exception:
+        # Baza vaqtincha mavjud bo'lmasa worker baribir ishga tushadi - indeks birinchi so'rovda quriladi
+        worker.log.exception("Qidiruv indekslarini oldindan qurib bo'lmadi")